@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+##
+## GBBacktester.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Union
+
+import numpy as np
+import pandas as pd
+
+import GBKernels
+from GBConstants import GBConstants
+from GBIndicators import EMAState
+from GBTickBuffer import GBTickBuffer
+from GBUtilities import GBUtilities
+from TradingStrategies.EMACrossover import EMACrossover
+
+class GBBacktester:
+    """Vectorized counterpart of replaying ticks through :func:`GreedyBoyDecisionMaker.addData` in test mode
+    with the EMA crossover strategy, giving the same balances and orders.
+
+    The ticks of consecutive days go through the reorder buffer, then the candles and the EMAs of the
+    whole range are built in one pass. The orders are then placed candle by candle on the buy and sell
+    signal arrays with the fees of the test mode of :func:`GreedyBoyDecisionMaker.AddOrder`, so the
+    cost depends on the number of orders, not on the number of ticks.
+    """
+
+    STRATEGY = 'EMACrossover'
+    """
+    Name of the strategy simulated, the tick replay is needed to test another :attr:`GBConstants.TRADED_STRATEGY`.
+    """
+
+    RESULT_COLUMNS = ['Date', 'Crypto', 'Fiat', 'OpeningPrice', 'ClosePrice', 'OverallBenefit', 'BotBenefit']
+    """
+    Columns of the results, the ones of testResults.csv written by GreedyBoyTester.
+    """
+
+    SWEEP_COLUMNS = ['Low', 'High', 'Threshold', 'Return', 'Trades', 'Drawdown']
+    """
+    Columns of the results of :func:`sweep`.
+    """
+
+    def __init__(self, interval: int = 15, low: int = 5, high: int = 40, lateness: float = GBConstants.TICK_LATENESS,
+                 threshold: float = 1.000):
+        """Constructs a backtester of the EMA crossover strategy.
+
+        :param interval: time gap of the candles (in min) (default is 15)
+        :type interval: int
+        :param low: low EMA value (default is 5)
+        :type low: int
+        :param high: high EMA value (default is 40)
+        :type high: int
+        :param lateness: seconds a tick can arrive after a more recent one, see :class:`GBTickBuffer`
+            (default is GBConstants.TICK_LATENESS)
+        :type lateness: float
+        :param threshold: minimum ratio between the EMAs to place an order, see :class:`EMACrossover` (default is 1.000)
+        :type threshold: float
+        :exception: AssertionError if low or high is not a positive integer or low >= high
+        """
+        assert isinstance(low, int) and low > 0, "Low EMA value must be a positive integer"
+        assert isinstance(high, int) and high > 0, "High EMA value must be a positive integer"
+        assert low < high, "Low EMA value must be lower than high EMA value"
+        self.interval, self.low, self.high = interval, low, high
+        self.lateness, self.threshold = lateness, threshold
+        self.orders = pd.DataFrame(columns=['Date', 'Price', 'Amount', 'Order'])
+
+    @staticmethod
+    def addOrder(buyOrSell: str, amount: float, price: float, cryptoBalance: float, fiatBalance: float,
+                 buySellLimit: float = 0) -> tuple[float, float, float]:
+        """Returns the balances after an order, with the fees of the test mode of :func:`GreedyBoyDecisionMaker.AddOrder`.
+
+        :param buyOrSell: "buy" or "sell"
+        :type buyOrSell: str
+        :param amount: amount of crypto
+        :type amount: float
+        :param price: price of the order
+        :type price: float
+        :param cryptoBalance: crypto balance before the order
+        :type cryptoBalance: float
+        :param fiatBalance: fiat balance before the order
+        :type fiatBalance: float
+        :param buySellLimit: maximum fiat value of an order, 0 if there is no limit (default is 0)
+        :type buySellLimit: float
+        :returns: (amount ordered, crypto balance, fiat balance)
+        :rtype: (float, float, float)
+        """
+        if buySellLimit != 0:
+            amount = min(amount, buySellLimit / price)
+        if buyOrSell == "buy":
+            amount = min(amount, fiatBalance / price * 0.99975)
+            return amount, cryptoBalance + amount * (0.9975), fiatBalance - amount * price
+        amount = min(amount, cryptoBalance * 0.99975)
+        return amount, cryptoBalance - amount, fiatBalance + amount * price * (0.9975)
+
+    @staticmethod
+    def position(price: float, cryptoBalance: float, fiatBalance: float) -> str:
+        """Returns the position of a decision maker holding the given balances, "buy" or "sell"."""
+        if price:
+            return "buy" if fiatBalance > cryptoBalance * price else "sell"
+        return "buy" if fiatBalance >= 10 else "sell"
+
+    @staticmethod
+    def nextSignals(signals: np.ndarray) -> np.ndarray:
+        """Returns for each candle the index of the first candle from it on where `signals` is True,
+        the number of candles if there is none.
+
+        :param signals: one boolean per candle, or one row of booleans per configuration
+        :type signals: numpy.ndarray
+        :rtype: numpy.ndarray
+        """
+        count = signals.shape[-1]
+        indexes = np.where(signals, np.arange(count), count)
+        return np.minimum.accumulate(indexes[..., ::-1], axis=-1)[..., ::-1]
+
+    def __releasedTicks(self, datas: list[pd.DataFrame]) -> tuple[np.ndarray, np.ndarray, list[int]]:
+        """Returns the ticks released by the reorder buffer while replaying each dataframe in turn,
+        and the number of ticks released at the end of each one."""
+        tickBuffer = GBTickBuffer(self.lateness)
+        epochs, prices, ends = [], [], []
+        for data in datas:
+            volumes = data['volume'].to_numpy(dtype=float) if 'volume' in data else np.zeros(len(data.index))
+            released = tickBuffer.pushMany(data['epoch'].to_numpy(dtype=float), data['price'].to_numpy(dtype=float), volumes)
+            epochs.append(released[0])
+            prices.append(released[1])
+            ends.append((ends[-1] if ends else 0) + len(released[0]))
+        return np.concatenate(epochs), np.concatenate(prices), ends
+
+    def run(self, previousDay: pd.DataFrame, days: list[tuple[float, pd.DataFrame]], cryptoBalance: float,
+            fiatBalance: float, buySellLimit: float = 0) -> pd.DataFrame:
+        """Tests consecutive days, each one starting from the given balances, the candles and indicators
+        going on from one day to the next like the warm states of GreedyBoyTester.
+
+        :param previousDay: ticks of the day before the first tested day ('epoch', 'price' and optionally 'volume')
+        :type previousDay: pandas.DataFrame
+        :param days: (timestamp of the day, ticks of the day) of each tested day, in order
+        :type days: list[tuple[float, pandas.DataFrame]]
+        :param cryptoBalance: crypto balance at the beginning of each day
+        :type cryptoBalance: float
+        :param fiatBalance: fiat balance at the beginning of each day
+        :type fiatBalance: float
+        :param buySellLimit: maximum fiat value of an order, 0 if there is no limit (default is 0)
+        :type buySellLimit: float
+        :returns: one row per tested day, see :attr:`RESULT_COLUMNS`; the orders are in :attr:`orders`
+        :rtype: pandas.DataFrame
+        """
+        epochs, prices, ends = self.__releasedTicks([previousDay] + [data for _, data in days])
+        if len(epochs) == 0:
+            return pd.DataFrame(columns=self.RESULT_COLUMNS)
+
+        # A closed candle is notified on the first tick of the next one, the order is placed at its price
+        closes = GBUtilities.ticksToCandles(epochs, prices, self.interval)['Close']
+        starts = GBKernels.bucketStarts(epochs, self.interval)[1]
+        buys, sells = EMACrossover.crossovers(EMAState(self.low).values(closes), EMAState(self.high).values(closes), self.threshold)
+        nextBuys, nextSells = self.nextSignals(buys), self.nextSignals(sells)
+
+        rows, orders = [], []
+        for (testTime, _), first, last in zip(days, ends[:-1], ends[1:]):
+            if first == last:
+                continue
+            openingPrice = prices[first - 1] if first != 0 else None
+            crypto, fiat = cryptoBalance, fiatBalance
+            position = self.position(openingPrice, crypto, fiat)
+            # Candles notified during the day: the ones whose next candle opens on a tick of the day
+            candle = max(int(np.searchsorted(starts, first)) - 1, 0)
+            lastCandle = int(np.searchsorted(starts, last)) - 1
+            while candle < lastCandle:
+                candle = nextBuys[candle] if position == "buy" else nextSells[candle]
+                if candle >= lastCandle:
+                    break
+                tick = starts[candle + 1]
+                price = prices[tick]
+                amount = fiat / price if position == "buy" else crypto
+                amount, crypto, fiat = self.addOrder(position, amount, price, crypto, fiat, buySellLimit)
+                orders.append({'Date': epochs[tick], 'Price': price, 'Amount': amount, 'Order': position})
+                position = self.position(price, crypto, fiat)
+                candle += 1
+
+            # Benefits computed in percentage, like GreedyBoyTester
+            closePrice = prices[last - 1]
+            startingMoney = fiatBalance + cryptoBalance * (openingPrice if openingPrice else closePrice)
+            rows.append({
+                'Date': testTime,
+                'Crypto': crypto,
+                'Fiat': fiat,
+                'OpeningPrice': openingPrice,
+                'ClosePrice': closePrice,
+                'OverallBenefit': ((fiat + crypto * closePrice) / startingMoney - 1) * 100,
+                'BotBenefit': ((fiat + crypto * closePrice) / (fiatBalance + cryptoBalance * closePrice) - 1) * 100
+            })
+        self.orders = pd.DataFrame(orders, columns=['Date', 'Price', 'Amount', 'Order'])
+        return pd.DataFrame(rows, columns=self.RESULT_COLUMNS)
+
+    def runFiles(self, previousFiles: list[str], days: list[tuple[float, str]], cryptoBalance: float,
+                 fiatBalance: float, buySellLimit: float = 0) -> pd.DataFrame:
+        """:func:`run` reading the ticks from csv files, so a process only receives file names.
+
+        :param previousFiles: files of the days replayed before the first tested day, in order
+        :type previousFiles: list[str]
+        :param days: (timestamp of the day, file of the day) of each tested day, in order
+        :type days: list[tuple[float, str]]
+        :param cryptoBalance: crypto balance at the beginning of each day
+        :type cryptoBalance: float
+        :param fiatBalance: fiat balance at the beginning of each day
+        :type fiatBalance: float
+        :param buySellLimit: maximum fiat value of an order, 0 if there is no limit (default is 0)
+        :type buySellLimit: float
+        :rtype: pandas.DataFrame
+        """
+        previousDays = [self.readTicks(fileName) for fileName in previousFiles]
+        previousDay = pd.concat(previousDays, ignore_index=True) if previousDays else pd.DataFrame(columns=['epoch', 'price'])
+        return self.run(previousDay, [(testTime, self.readTicks(fileName)) for testTime, fileName in days],
+                        cryptoBalance, fiatBalance, buySellLimit)
+
+    @staticmethod
+    def readTicks(fileName: str) -> pd.DataFrame:
+        """Reads the ticks of a day, skipping the header lines written again when the recorder restarted.
+
+        :param fileName: csv file ('epoch', 'price' and optionally 'volume' and 'side' columns)
+        :type fileName: str
+        :rtype: pandas.DataFrame
+        """
+        data = pd.read_csv(fileName, parse_dates=False)
+        if data['epoch'].dtype == object:
+            data = data[data['epoch'] != 'epoch']
+            data = data.astype({column: float for column in ('epoch', 'price', 'volume') if column in data})
+        return data
+
+    @staticmethod
+    def dayJobs(initial: str, testTimes: list[float], dataFile: Callable[[float], Union[str, None]], cryptoBalance: float,
+                fiatBalance: float, warmUpDays: int = 7) -> list[tuple]:
+        """Returns the jobs of :func:`runMany` testing each day of a currency on its own. A day is replayed after
+        the tested days before it and the day before them (at most `warmUpDays` days), so its indicators are the
+        ones of the sequential replay: the older days are too light in the EMAs to change an order.
+
+        :param initial: initial of the currency
+        :type initial: str
+        :param testTimes: timestamps of the tested days, in increasing order
+        :type testTimes: list[float]
+        :param dataFile: returns the csv file of a day from its timestamp, None if the day has no data
+        :type dataFile: Callable[[float], Union[str, None]]
+        :param cryptoBalance: crypto balance at the beginning of each day
+        :type cryptoBalance: float
+        :param fiatBalance: fiat balance at the beginning of each day
+        :type fiatBalance: float
+        :param warmUpDays: maximum number of days replayed before a tested day (default is 7)
+        :type warmUpDays: int
+        :rtype: list[tuple]
+        """
+        jobs, previousFiles, previousTime = [], [], None
+        for testTime in testTimes:
+            fileName = dataFile(testTime)
+            if fileName is None:
+                previousFiles = []
+                continue
+            if not previousFiles or previousTime != testTime - 86400: # Starts from the day before
+                previousFile = dataFile(testTime - 86400)
+                if previousFile is None:
+                    previousFiles = []
+                    continue
+                previousFiles = [previousFile]
+            jobs += [(initial, previousFiles[-warmUpDays:], [(testTime, fileName)], cryptoBalance, fiatBalance)]
+            previousFiles, previousTime = previousFiles + [fileName], testTime
+        return jobs
+
+    def runMany(self, jobs: list[tuple], maxWorkers: int = None) -> pd.DataFrame:
+        """Runs independent tests on a process pool, see :func:`runFiles`.
+
+        :param jobs: (currency, previousFiles, days, cryptoBalance, fiatBalance) of each test
+        :type jobs: list[tuple]
+        :param maxWorkers: number of processes (default is None, one per core)
+        :type maxWorkers: int
+        :returns: the rows of every test with a 'Currency' column, in date order then in the order of the jobs
+        :rtype: pandas.DataFrame
+        """
+        columns = self.RESULT_COLUMNS + ['Currency']
+        if len(jobs) == 0:
+            return pd.DataFrame(columns=columns)
+        with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+            futures = [executor.submit(self.runFiles, *job[1:]) for job in jobs]
+            results = [future.result().assign(Currency=job[0]) for job, future in zip(jobs, futures)]
+        results = pd.concat(results, ignore_index=True)
+        return results.sort_values('Date', kind='stable', ignore_index=True)[columns]
+
+    def sweep(self, previousDay: pd.DataFrame, data: pd.DataFrame, cryptoBalance: float, fiatBalance: float,
+              spans: list[int] = None, thresholds: list[float] = (1.000,)) -> pd.DataFrame:
+        """Tests the EMA crossover strategy with every (low, high, threshold) configuration over the same ticks,
+        the balances going on from the first tested tick to the last one.
+
+        Every EMA column is computed once, then the signals of all the configurations are a single matrix
+        and their orders are placed together, one order of every configuration per step.
+
+        :param previousDay: ticks replayed before the tested ones ('epoch', 'price' and optionally 'volume')
+        :type previousDay: pandas.DataFrame
+        :param data: tested ticks
+        :type data: pandas.DataFrame
+        :param cryptoBalance: crypto balance at the first tested tick
+        :type cryptoBalance: float
+        :param fiatBalance: fiat balance at the first tested tick
+        :type fiatBalance: float
+        :param spans: EMA values paired with each other (default is GBConstants.getEMAValues())
+        :type spans: list[int]
+        :param thresholds: minimum ratios between the EMAs to place an order (default is [1.000])
+        :type thresholds: list[float]
+        :returns: one row per configuration, see :attr:`SWEEP_COLUMNS`, the best return first: 'Return' and
+            'Drawdown' (largest fall of the value from its highest, at the candle closes) in percentage
+        :rtype: pandas.DataFrame
+        """
+        spans = sorted(set(spans if spans else GBConstants.getEMAValues()))
+        epochs, prices, ends = self.__releasedTicks([previousDay, data])
+        first = ends[0]
+        if first == len(epochs):
+            return pd.DataFrame(columns=self.SWEEP_COLUMNS)
+        closes = GBUtilities.ticksToCandles(epochs, prices, self.interval)['Close']
+        starts = GBKernels.bucketStarts(epochs, self.interval)[1]
+        emas = np.array([EMAState(span).values(closes) for span in spans])
+
+        # One row per configuration
+        configurations = [(low, high, threshold) for threshold in thresholds
+                          for low in range(len(spans)) for high in range(low + 1, len(spans))]
+        if len(configurations) == 0:
+            return pd.DataFrame(columns=self.SWEEP_COLUMNS)
+        lows, highs, ratios = (np.array(column) for column in zip(*configurations))
+        buys, sells = EMACrossover.crossovers(emas[lows], emas[highs], ratios[:, np.newaxis])
+        nextBuys, nextSells = self.nextSignals(buys), self.nextSignals(sells)
+
+        # Orders of every configuration, each step places the next order of the ones still trading
+        count, lastCandle = len(configurations), len(closes) - 1
+        rows = np.arange(count)
+        firstCandle = max(int(np.searchsorted(starts, first)) - 1, 0)
+        candles = np.full(count, firstCandle)
+        cryptos, fiats = np.full(count, float(cryptoBalance)), np.full(count, float(fiatBalance))
+        openingPrice = prices[first - 1] if first != 0 else prices[0]
+        buying = np.full(count, self.position(openingPrice, cryptoBalance, fiatBalance) == "buy")
+        trades = np.zeros(count, dtype=np.int64)
+        # Balances from each candle on, NaN where they don't change
+        cryptoSeries, fiatSeries = np.full((count, len(closes)), np.nan), np.full((count, len(closes)), np.nan)
+        cryptoSeries[:, firstCandle], fiatSeries[:, firstCandle] = cryptos, fiats
+        trading = rows
+        while len(trading) != 0:
+            nextCandles = np.where(buying[trading], nextBuys[trading, candles[trading]], nextSells[trading, candles[trading]])
+            trading, nextCandles = trading[nextCandles < lastCandle], nextCandles[nextCandles < lastCandle]
+            if len(trading) == 0:
+                break
+            price = prices[starts[nextCandles + 1]]
+            crypto, fiat, buy = cryptos[trading], fiats[trading], buying[trading]
+            # Orders of the whole balance, see addOrder
+            amount = np.where(buy, np.minimum(fiat / price, fiat / price * 0.99975), np.minimum(crypto, crypto * 0.99975))
+            cryptos[trading] = np.where(buy, crypto + amount * (0.9975), crypto - amount)
+            fiats[trading] = np.where(buy, fiat - amount * price, fiat + amount * price * (0.9975))
+            buying[trading] = fiats[trading] > cryptos[trading] * price
+            trades[trading] += 1
+            candles[trading] = nextCandles + 1
+            cryptoSeries[trading, nextCandles + 1], fiatSeries[trading, nextCandles + 1] = cryptos[trading], fiats[trading]
+
+        # Value at each candle close from the first tested one
+        filled = np.maximum.accumulate(np.where(np.isnan(cryptoSeries), 0, np.arange(len(closes))), axis=1)
+        values = fiatSeries[rows[:, np.newaxis], filled] + cryptoSeries[rows[:, np.newaxis], filled] * closes
+        values = values[:, firstCandle:]
+        startingMoney = fiatBalance + cryptoBalance * openingPrice
+        results = pd.DataFrame({
+            'Low': np.array(spans)[lows],
+            'High': np.array(spans)[highs],
+            'Threshold': ratios,
+            'Return': (values[:, -1] / startingMoney - 1) * 100,
+            'Trades': trades,
+            'Drawdown': np.max(1 - values / np.maximum.accumulate(values, axis=1), axis=1) * 100
+        })
+        return results.sort_values('Return', ascending=False, kind='stable', ignore_index=True)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+##
+## GBCandleStore.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+class GBCandleStore:
+    """Columnar candle storage, every column is a contiguous float64 array.
+
+    Rows are appended in place and the arrays grow by doubling their capacity, so
+    appending a candle or updating the last one never copies the whole history.
+    A ``pandas.DataFrame`` is only built (without copying the arrays) when
+    :func:`toDataFrame` is called.
+    """
+
+    @classmethod
+    def fromDataFrame(cls, data: pd.DataFrame, columns: list[str] = None):
+        """Constructor starting from a dataframe.
+
+        :param data: dataframe containing the candles
+        :type data: pandas.DataFrame
+        :param columns: columns of the store, every column of `data` is kept if not given
+        :type columns: list[str]
+        """
+        columns = list(columns) if columns is not None else []
+        columns += [column for column in data.columns if column not in columns]
+        store = cls(columns, max(len(data.index), 1))
+        store.appendMany({column: data[column] for column in data.columns})
+        return store
+
+    @classmethod
+    def load(cls, fileName: str) -> tuple:
+        """Constructor starting from a file written by :func:`save`.
+
+        :param fileName: name of the file
+        :type fileName: str
+        :returns: (the store, the metadata given to :func:`save`)
+        :rtype: (GBCandleStore, dict)
+        """
+        with np.load(fileName, allow_pickle=False) as snapshot:
+            data = snapshot['data']
+            columns = [str(column) for column in snapshot['columns']]
+            metadata = json.loads(str(snapshot['metadata']))
+        store = cls(columns, max(data.shape[1], 1))
+        store.data[:, :data.shape[1]] = data
+        store.size = data.shape[1]
+        return store, metadata
+
+    def __init__(self, columns: list[str], capacity: int = 256):
+        """
+        :param columns: names of the columns
+        :type columns: list[str]
+        :param capacity: number of rows allocated at first (default is 256)
+        :type capacity: int
+        """
+        self.columns = list(columns)
+        self.columnIndexes = {column: i for i, column in enumerate(self.columns)}
+        self.data = np.full((len(self.columns), max(capacity, 1)), np.nan)
+        self.size = 0
+        self.version = 0
+        self.frame, self.frameKey = None, None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __reserve(self, size: int):
+        if size <= self.data.shape[1]:
+            return
+        capacity = self.data.shape[1]
+        while capacity < size:
+            capacity *= 2
+        data = np.full((len(self.columns), capacity), np.nan)
+        data[:, :self.size] = self.data[:, :self.size]
+        self.data = data
+
+    def addColumn(self, column: str):
+        """Adds a column filled with NaN, does nothing if it already exists.
+
+        :param column: name of the column
+        :type column: str
+        """
+        if column in self.columnIndexes:
+            return
+        self.columnIndexes[column] = len(self.columns)
+        self.columns.append(column)
+        self.data = np.vstack([self.data, np.full((1, self.data.shape[1]), np.nan)])
+        self.version += 1
+
+    def append(self, row: dict):
+        """Appends a row, missing columns are set to NaN.
+
+        :param row: values of the row by column name
+        :type row: dict
+        """
+        self.__reserve(self.size + 1)
+        self.data[:, self.size] = np.nan
+        for column, value in row.items():
+            if column in self.columnIndexes:
+                self.data[self.columnIndexes[column], self.size] = np.nan if value is None else value
+        self.size += 1
+        self.version += 1
+
+    def appendMany(self, rows: dict):
+        """Appends several rows at once.
+
+        :param rows: arrays of values by column name, all of the same length
+        :type rows: dict
+        """
+        count = len(next(iter(rows.values()))) if rows else 0
+        if count == 0:
+            return
+        self.__reserve(self.size + count)
+        self.data[:, self.size:self.size + count] = np.nan
+        for column, values in rows.items():
+            if column in self.columnIndexes:
+                self.data[self.columnIndexes[column], self.size:self.size + count] = \
+                    pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+        self.size += count
+        self.version += 1
+
+    def setLast(self, columns: list[str], values: list):
+        """Sets values of the last row.
+
+        :param columns: names of the columns to set
+        :type columns: list[str]
+        :param values: values, in the same order as `columns`
+        :type values: list
+        """
+        for column, value in zip(columns, values):
+            self.data[self.columnIndexes[column], self.size - 1] = np.nan if value is None else value
+        self.version += 1
+
+    def setColumn(self, column: str, values, start: int = 0):
+        """Overwrites the values of a column from the row `start` to the end.
+
+        :param column: name of the column
+        :type column: str
+        :param values: array of `len(store) - start` values (or a single value)
+        :param start: first row to overwrite (default is 0)
+        :type start: int
+        """
+        self.addColumn(column)
+        self.data[self.columnIndexes[column], start:self.size] = values
+        self.version += 1
+
+    def dropFront(self, count: int) -> dict:
+        """Removes the `count` oldest rows and returns them. The remaining rows are moved
+        into new arrays, views returned by :func:`view` keep showing the rows they were built on.
+
+        :param count: number of rows to remove
+        :type count: int
+        :returns: arrays of the removed values by column name
+        :rtype: dict
+        """
+        count = min(count, self.size)
+        dropped = {column: self.data[i, :count].copy() for i, column in enumerate(self.columns)}
+        data = np.full(self.data.shape, np.nan)
+        data[:, :self.size - count] = self.data[:, count:self.size]
+        self.data = data
+        self.size -= count
+        self.version += 1
+        return dropped
+
+    def column(self, column: str) -> np.ndarray:
+        """Returns a view on the values of a column (no copy).
+
+        :param column: name of the column
+        :type column: str
+        """
+        return self.data[self.columnIndexes[column], :self.size]
+
+    def last(self, column: str, offset: int = 1) -> float:
+        """Returns the value of a column on the `offset`-th row starting from the end.
+
+        :param column: name of the column
+        :type column: str
+        :param offset: 1 for the last row, 2 for the one before, ... (default is 1)
+        :type offset: int
+        :exception: IndexError if the store holds less than `offset` rows
+        """
+        if not 0 < offset <= self.size:
+            raise IndexError("offset {0} out of range for {1} rows".format(offset, self.size))
+        return float(self.data[self.columnIndexes[column], self.size - offset])
+
+    def row(self, index: int) -> dict:
+        """Returns a row as a dictionary, negative indexes start from the end.
+
+        :param index: index of the row
+        :type index: int
+        """
+        index = index if index >= 0 else self.size + index
+        return {column: float(self.data[i, index]) for i, column in enumerate(self.columns)}
+
+    def toDataFrame(self, columns: list[str] = None) -> pd.DataFrame:
+        """Returns a dataframe built on top of the arrays, it is cached until the store changes.
+
+        :param columns: columns to put in the dataframe, every column if not given
+        :type columns: list[str]
+        """
+        columns = tuple(columns if columns is not None else self.columns)
+        if self.frameKey != (self.version, columns):
+            self.frame = pd.DataFrame({column: self.column(column) for column in columns}, copy=False)
+            self.frameKey = (self.version, columns)
+        return self.frame
+
+    def view(self, start: int = 0, columns: list[str] = None) -> pd.DataFrame:
+        """Returns the rows from `start` as a read-only dataframe indexed by date, the values
+        are not copied, only the index is built. Rows appended afterwards are not in the view.
+
+        :param start: index of the first row (default is 0)
+        :type start: int
+        :param columns: columns to put in the dataframe, every column if not given
+        :type columns: list[str]
+        """
+        values = self.data[:, start:self.size].view()
+        values.flags.writeable = False
+        index = pd.DatetimeIndex(pd.to_datetime(values[self.columnIndexes['Date']], unit='s'), name='Date')
+        if columns is None:
+            return pd.DataFrame(values.T, columns=self.columns, index=index, copy=False)
+        return pd.DataFrame({column: values[self.columnIndexes[column]] for column in columns}, index=index, copy=False)
+
+    def save(self, fileName: str, metadata: dict = None):
+        """Writes the candles and `metadata` into a binary ``.npz`` file. The file is replaced
+        at once, a crash while saving leaves the previous one intact.
+
+        :param fileName: name of the file
+        :type fileName: str
+        :param metadata: JSON serializable values saved with the candles
+        :type metadata: dict
+        """
+        temporaryName = fileName + '.tmp'
+        with open(temporaryName, 'wb') as file:
+            np.savez(file, data=self.data[:, :self.size], columns=np.array(self.columns, dtype=str),
+                     metadata=np.array(json.dumps(metadata or {})))
+        os.replace(temporaryName, fileName)
+
+    def memoryUsage(self) -> int:
+        """Returns the number of bytes allocated by the store."""
+        return self.data.nbytes
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+##
+## GBClients.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+import threading
+
+from github import Github
+
+from KrakenApi import KrakenApi
+
+class GBClientFactory:
+    """Builds the network clients on first use: the Github repository of the data and the Kraken API.
+
+    Objects given the same factory share its clients (the pairs of a multi-asset engine, the days of a
+    test, ...). An object never running a remote operation never builds them, so nothing is requested
+    from Github or Kraken when it is constructed.
+    """
+
+    def __init__(self, apiKey: str = None, apiPrivateKey: str = None, githubToken: str = None, repoName: str = None,
+                 krakenToken: str = None, greedyBoyRepo = None, krakenApi: KrakenApi = None):
+        """Constructs a factory, no client is built yet.
+
+        :param apiKey: Kraken API key (default is None)
+        :type apiKey: str
+        :param apiPrivateKey: Kraken private API key (default is None)
+        :type apiPrivateKey: str
+        :param githubToken: Github token (default is None)
+        :type githubToken: str
+        :param repoName: Github repo name (default is None)
+        :type repoName: str
+        :param krakenToken: Kraken websocket token, requested on first use if None (default is None)
+        :type krakenToken: str
+        :param greedyBoyRepo: Github repository to use instead of building one (default is None)
+        :type greedyBoyRepo: github.Repository.Repository
+        :param krakenApi: Kraken API to use instead of building one (default is None)
+        :type krakenApi: KrakenApi
+        """
+        self.apiKey, self.apiPrivateKey = apiKey, apiPrivateKey
+        self.githubToken, self.repoName = githubToken, repoName
+        self.krakenToken = krakenToken
+        self._greedyBoyRepo, self._krakenApi = greedyBoyRepo, krakenApi
+        # Pairs of a multi-asset engine are built concurrently
+        self.lock = threading.Lock()
+
+    @property
+    def greedyBoyRepo(self):
+        """Github repository of the data, built on first use."""
+        with self.lock:
+            if self._greedyBoyRepo is None:
+                self._greedyBoyRepo = Github(self.githubToken).get_repo(self.repoName)
+            return self._greedyBoyRepo
+
+    @property
+    def krakenApi(self) -> KrakenApi:
+        """Kraken API, built on first use."""
+        with self.lock:
+            if self._krakenApi is None:
+                self._krakenApi = KrakenApi(self.apiKey, self.apiPrivateKey, self.krakenToken)
+            return self._krakenApi
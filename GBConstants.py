@@ -32,6 +32,22 @@ class GBConstants:
     """
     The maximum token order allowed for the bot to use. Value is 500.0.
     """
+    CANDLE_RETENTION = 500
+    """
+    The number of candles kept in memory by the live data machines, older ones are moved to disk. Value is 500.
+    """
+    TICK_LATENESS = 2.0
+    """
+    The seconds a live tick can arrive after a more recent one before being dropped, ticks are reordered and deduplicated. Value is 2.0.
+    """
+    TRADED_STRATEGY = 'EMACrossover'
+    """
+    The strategy placing the orders of the live decision makers: 'EMACrossover', 'Bollinger' or 'Scalping'.
+    """
+    TICK_COLUMNS = ['epoch', 'price', 'volume', 'side']
+    """
+    The columns of the recorded trade files. Files recorded before volume and side were added only have epoch and price.
+    """
     # Static Methods
     @staticmethod
     def getEMAValues() -> list[int]:
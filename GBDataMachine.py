@@ -13,38 +13,68 @@ __email__       = "pruvostkevin0@gmail.com"
 __status__      = "Test"
 
 import pandas.core.generic as gen
-import copy
+import math
+import os
+import tempfile
+import numpy as np
 import pandas as pd
 import time
-import warnings
 from typing import Union
 
+from GBCandleStore import GBCandleStore
 from GBConstants import GBConstants
+from GBIndicatorEngine import GBIndicatorEngine
+from GBTickBuffer import GBTickBuffer
 from GBUtilities import GBUtilities
 
 class GBDataMachine:
+    CANDLE_COLUMNS = GBIndicatorEngine.CANDLE_COLUMNS + GBUtilities.VOLUME_COLUMNS
+    DEFAULT_INDICATORS = ['MA', 'Std', 'LBand', 'HBand'] + ['EMA{0}'.format(emaValue) for emaValue in GBConstants.getEMAValues()]
+
     @property
     def ordered(self) -> Union[pd.DataFrame, gen.NDFrame]:
-        """Returns the ordered data"""
-        return self._ordered
+        """Returns the ordered data, as a dataframe built on top of the candle store.
+
+        Every indicator of :attr:`viewIndicators` is activated, strategies only needing a few
+        columns should use :func:`candle` or :func:`indicator` instead."""
+        self.requireIndicators(self.viewIndicators)
+        columns = self.CANDLE_COLUMNS + self.viewIndicators
+        columns += [column for column in self._store.columns if column not in columns and column != 'BollingerGap']
+        return self._store.toDataFrame(columns)
     
     @ordered.setter
     def ordered(self, value: Union[pd.DataFrame, gen.NDFrame]):
         """Sets the ordered data"""
-        self._ordered = value
+        self._store = GBCandleStore.fromDataFrame(value, self.CANDLE_COLUMNS)
+        self.engine.setStore(self._store)
+
+    @property
+    def committedRows(self) -> Union[int, None]:
+        """Returns the number of candles pushed into the indicators running state"""
+        return self.engine.committedRows
 
     @property
     def bollingerGaps(self) -> Union[pd.DataFrame, gen.NDFrame]:
         """Returns the bollinger gaps data"""
-        return self._bollingerGaps
+        self.requireIndicators(['BollingerGap'])
+        return pd.DataFrame({
+            'Date': self._store.column('Date'),
+            'Value': self._store.column('BollingerGap')
+        }, copy=False)
     
     @bollingerGaps.setter
     def bollingerGaps(self, value: Union[pd.DataFrame, gen.NDFrame]):
         """Sets the bollinger gaps data"""
-        self._bollingerGaps = value
+        self._store.setColumn('BollingerGap', value['Value'])
+
+    @property
+    def store(self) -> GBCandleStore:
+        """Returns the candle store behind :attr:`ordered`"""
+        return self._store
 
     @classmethod
-    def fromFilename(cls, fileName: str, interval: int = 15, movingAverageSize: int = 30):
+    def fromFilename(cls, fileName: str, interval: int = 15, movingAverageSize: int = 30, streaming: bool = True,
+                     retention: int = None, lateness: float = None):
         """Constructor starting from a filename.
 
         :param fileName: Name of the file containing the data.
@@ -53,12 +83,19 @@ class GBDataMachine:
         :type interval: int
         :param movingAverageSize: Number of data taken into account to calculate a moving average. (default is 30)
         :type movingAverageSize: int
+        :param streaming: Updates indicators incrementally on each :func:`append`. (default is True)
+        :type streaming: bool
+        :param retention: Number of candles kept in memory. (default is None, everything is kept in memory)
+        :type retention: int
+        :param lateness: Seconds a tick can arrive late, see :class:`GBTickBuffer`. (default is None, ticks are used as they arrive)
+        :type lateness: float
         """
         csvData = pd.read_csv(fileName, parse_dates=True)
-        return cls(csvData, interval, movingAverageSize)
+        return cls(csvData, interval, movingAverageSize, streaming, retention, lateness=lateness)
 
     @classmethod
-    def fromDataframe(cls, data: gen.NDFrame, interval: int = 15, movingAverageSize: int = 30):
+    def fromDataframe(cls, data: gen.NDFrame, interval: int = 15, movingAverageSize: int = 30, streaming: bool = True,
+                      retention: int = None, lateness: float = None):
         """Constructor starting from a filename.
 
         :param data: Structure containing prices and dates.
@@ -67,10 +104,65 @@ class GBDataMachine:
         :type interval: int
         :param movingAverageSize: Number of data taken into account to calculate a moving average. (default is 30)
         :type movingAverageSize: int
+        :param streaming: Updates indicators incrementally on each :func:`append`. (default is True)
+        :type streaming: bool
+        :param retention: Number of candles kept in memory. (default is None, everything is kept in memory)
+        :type retention: int
+        :param lateness: Seconds a tick can arrive late, see :class:`GBTickBuffer`. (default is None, ticks are used as they arrive)
+        :type lateness: float
+        """
+        return cls(data, interval, movingAverageSize, streaming, retention, lateness=lateness)
+
+    @classmethod
+    def fromSnapshot(cls, fileName: str):
+        """Constructor starting from a file written by :func:`saveSnapshot`, nothing is computed again.
+
+        :param fileName: Name of the snapshot file.
+        :type fileName: str
+        :exception: KeyError if an indicator of the snapshot is not registered
         """
-        return cls(data, interval, movingAverageSize)
+        store, state = GBCandleStore.load(fileName)
+        machine = cls(interval=state['interval'], movingAverageSize=state['movingAverageSize'],
+                      streaming=state['streaming'], retention=state['retention'],
+                      spillDirectory=state['spillDirectory'], indicators=state['viewIndicators'])
+        if state.get('tickBuffer') is not None:
+            machine.tickBuffer = GBTickBuffer()
+            machine.tickBuffer.setState(state['tickBuffer'])
+        machine._store = store
+        machine.engine.setStore(store)
+        machine.engine.restore(state['engine'])
+        machine.pendingRows = state['pendingRows']
+        machine.spilledSegments, machine.spilledRows = state['spilledSegments'], state['spilledRows']
+        machine.newRound, machine.rolledRound = state['newRound'], state['rolledRound']
+        machine.lastEpoch = state['lastEpoch']
+        return machine
 
-    def __init__(self, data: gen.NDFrame = None, interval: int = 15, movingAverageSize: int = 30):
+    @classmethod
+    def fromWarmState(cls, state: dict, retention: int = None):
+        """Constructor starting from a state returned by :func:`warmState`, ticks following the
+        last one of the state are appended without replaying any history.
+
+        :param state: State returned by :func:`warmState`.
+        :type state: dict
+        :param retention: Number of candles kept in memory. (default is None, everything is kept in memory)
+        :type retention: int
+        :exception: KeyError if an indicator of the state is not registered
+        """
+        machine = cls(interval=state['interval'], movingAverageSize=state['movingAverageSize'],
+                      streaming=state['streaming'], retention=retention, indicators=state['viewIndicators'])
+        if state['tickBuffer'] is not None:
+            machine.tickBuffer = GBTickBuffer()
+            machine.tickBuffer.setState(state['tickBuffer'])
+        machine._store = GBCandleStore.fromDataFrame(pd.DataFrame(state['candles']), cls.CANDLE_COLUMNS)
+        machine.engine.setStore(machine._store)
+        machine.engine.restore(state['engine'])
+        machine.newRound, machine.rolledRound = state['newRound'], state['rolledRound']
+        machine.lastEpoch = state['lastEpoch']
+        machine.dispatchedDate = machine._store.last('Date', 2) if len(machine._store) >= 2 else 0
+        return machine
+
+    def __init__(self, data: gen.NDFrame = None, interval: int = 15, movingAverageSize: int = 30, streaming: bool = True,
+                 retention: int = None, spillDirectory: str = None, indicators: list[str] = None, lateness: float = None):
         """Constructs GBDataMachine with the given data formatted like a csv [epochTime, price].
 
         :param data: Structure containing prices and dates.
@@ -79,75 +171,134 @@ class GBDataMachine:
         :type interval: int
         :param movingAverageSize: Number of data taken into account to calculate a moving average. (default is 30)
         :type movingAverageSize: int
+        :param streaming: Updates indicators incrementally on each :func:`append` instead of
+            recomputing every column, the cost of a tick doesn't depend on the history length. (default is True)
+        :type streaming: bool
+        :param retention: Number of candles kept in memory, older ones are moved to disk and
+            still reachable with :func:`history`. (default is None, everything is kept in memory)
+        :type retention: int
+        :param spillDirectory: Directory where the old candles are written. (default is a new temporary directory)
+        :type spillDirectory: str
+        :param indicators: Indicator columns shown by :attr:`ordered`, strategies require their own
+            with :func:`requireIndicators`. (default is :attr:`DEFAULT_INDICATORS`)
+        :type indicators: list[str]
+        :param lateness: Seconds a tick can arrive after a more recent one, ticks are then reordered
+            and duplicates dropped by a :class:`GBTickBuffer` before being aggregated. Ticks are held
+            back `lateness` seconds, :func:`flushTicks` appends the remaining ones. (default is None,
+            ticks are used as they arrive)
+        :type lateness: float
         """
         self.interval = interval
         self.movingAverageSize = movingAverageSize
+        self.streaming = streaming
         self.intervalJustClosed = False
-        self.roundTemp = {
-            'Date': 0,
-            'Open': 0,
-            'High': 0,
-            'Low': 0,
-            'Close': 0,
-            'MA': 0,
-            'Std': 0,
-            'LBand': 0,
-            'HBand': 0,
-            'EMA5': 0,
-            'EMA10': 0,
-            'EMA20': 0,
-            'EMA40': 0,
-            'EMA50': 0,
-            'EMA100': 0,
-            'EMA200': 0
-        }
-        self.bGapRoundTemp = {
-            'Date': 0,
-            'Value': 0
-        }
-        self.newRound = pd.DataFrame(self.roundTemp, index=[0])
-        self.newGapRound = pd.DataFrame(self.bGapRoundTemp, index=[0])
-        self._bollingerGaps = pd.DataFrame()
+        self.viewIndicators = list(indicators if indicators is not None else self.DEFAULT_INDICATORS)
+        self.pendingRows = False
+        # Retention policy, candles older than the last `retention` ones are moved to disk
+        self.retention = max(retention, movingAverageSize + 1) if retention else None
+        self.spillDirectory = spillDirectory
+        self.spilledSegments = []
+        self.spilledRows = 0
+        self.newRound = self.__emptyRound()
+        # Time of the last tick appended
+        self.lastEpoch = 0
+        # Date of the last candle returned by convertForGraphicViews()
+        self.graphicViewDate = None
+        # Closed candles of a smaller interval merged into the open candle by appendCandle()
+        self.rolledRound = None
+        # Strategies notified by subscribe(), with the date of the last closed candle they were given
+        self.candleListeners, self.tickListeners = [], []
+        self.dispatchedDate = 0
+        # Reorder buffer and deduplication of the ticks
+        self.tickBuffer = GBTickBuffer(lateness) if lateness is not None else None
+        self._store = GBCandleStore(self.CANDLE_COLUMNS)
+        # Indicators are only computed once a strategy or a viewer asked for them
+        self.engine = GBIndicatorEngine(self._store, {'movingAverageSize': movingAverageSize}, self.CANDLE_COLUMNS)
         if data is not None:
             if 'Low' not in data:
-                self._ordered = pd.DataFrame()
                 self.parseToInterval(data)
             else:
-                self._ordered = data
-        else:
-            self._ordered = pd.DataFrame()
+                self.ordered = data
         return
 
+    def __emptyRound(self) -> dict:
+        return {'Date': 0, 'Open': 0, 'High': 0, 'Low': 0, 'Close': 0,
+                'Volume': 0.0, 'VWAP': math.nan, 'Trades': 0, 'BuyVolume': 0.0, 'SellVolume': 0.0}
+
     def parseToInterval(self, data: pd.DataFrame):
-        """Parses the given dataframe to the data machine
+        """Parses the given dataframe to the data machine, the 'volume' and 'side' columns
+        are optional (files recorded before they existed have none). With a `lateness`, the ticks go
+        through the reorder buffer like with :func:`append`, giving the same candles as appending them one by one.
 
-        :param data: dataframe containing the dates and prices
+        :param data: dataframe containing the dates, prices and optionally the volumes and sides
         :type data: pandas.DataFrame
         """
-        for i, row in data.iterrows():
-            self.__append(row['epoch'], row['price'])
+        volumes = data['volume'].to_numpy(dtype=float) if 'volume' in data else np.zeros(len(data.index))
+        sides = data['side'].fillna('').to_numpy(dtype=str) if 'side' in data else None
+        epochTimes, prices = data['epoch'].to_numpy(dtype=float), data['price'].to_numpy(dtype=float)
+        if self.tickBuffer is not None:
+            epochTimes, prices, volumes, sides = self.tickBuffer.pushMany(epochTimes, prices, volumes, sides)
+        if len(epochTimes) != 0:
+            self.__appendMany(epochTimes, prices, volumes, sides)
         self.update()
-
-    def __append(self, epochTime: float, price: float):
-        if not self.newRound['Date'].isnull().all() and (epochTime >= self.newRound['Date'] + 60 * self.interval).max():
-            if (
-                len(self.ordered) == 0 or
-                ('Date' not in self.ordered.columns) or 
-                (len(self.ordered) > 0 and (self.ordered.at[len(self.ordered) - 1, 'Date'] != self.newRound['Date']).all())
-            ):
-                self.ordered = pd.concat([self.ordered, self.newRound], ignore_index=True)
+        self.__skipDispatch()
+
+    def __appendMany(self, epochTimes: np.ndarray, prices: np.ndarray, volumes: np.ndarray, sides: np.ndarray = None):
+        """Vectorized :func:`__append`, the candles are built in one pass and
+        indicators are left to the next :func:`update`."""
+        candles = GBUtilities.ticksToCandles(epochTimes, prices, self.interval, self.newRound['Date'], volumes, sides)
+        if len(candles['Date']) == 0:
+            return
+        self.lastEpoch = max(self.lastEpoch, float(epochTimes.max()))
+        first = 0
+        if self.newRound['Date'] != 0 and candles['Date'][0] == self.newRound['Date']:
+            # First ticks belong to the candle being built
+            self.newRound = self.__mergeRound(self.newRound, {column: float(values[0]) for column, values in candles.items()})
+            first = 1
+        if first == len(candles['Date']):
+            return
+        self.__upsertOpenRound()
+        self._store.appendMany({column: values[first:-1] for column, values in candles.items()})
+        self.newRound = {column: float(values[-1]) for column, values in candles.items()}
+        self.intervalJustClosed = True
+
+    def __append(self, epochTime: float, price: float, volume: float = 0.0, side: str = None):
+        if self.newRound['Date'] != 0 and epochTime >= self.newRound['Date'] + 60 * self.interval:
+            if len(self._store) == 0 or self._store.last('Date') != self.newRound['Date']:
+                self._store.append(self.newRound)
                 self.intervalJustClosed = True
-            self.newRound = pd.DataFrame(self.roundTemp, index=[0])
+            self.newRound = self.__emptyRound()
+        self.lastEpoch = max(self.lastEpoch, epochTime)
         self.newRound['Close'] = price
-        if (self.newRound['Date'] == 0).all():
+        if self.newRound['Date'] == 0:
             self.newRound['Date'] = epochTime - (epochTime % (self.interval * 60))
             self.newRound['Open'] = self.newRound['High'] = self.newRound['Low'] = price
-        if (self.newRound['Low'] > price).all():
+        if self.newRound['Low'] > price:
             self.newRound['Low'] = price
-        elif (self.newRound['High'] < price).all():
+        elif self.newRound['High'] < price:
             self.newRound['High'] = price
+        self.newRound['Trades'] += 1
+        if volume > 0:
+            turnover = self.newRound['VWAP'] * self.newRound['Volume'] if self.newRound['Volume'] > 0 else 0.0
+            self.newRound['Volume'] += volume
+            self.newRound['VWAP'] = (turnover + price * volume) / self.newRound['Volume']
+            if isinstance(side, str) and side.startswith('b'):
+                self.newRound['BuyVolume'] += volume
+            elif isinstance(side, str) and side.startswith('s'):
+                self.newRound['SellVolume'] += volume
+
+    def __upsertOpenRound(self):
+        """Writes the candle being built as the last row of the store."""
+        if self.newRound['Date'] == 0:
+            return
+        if len(self._store) == 0 or self._store.last('Date') != self.newRound['Date']:
+            self._store.append(self.newRound)
+            self.intervalJustClosed = True
+        else:
+            self._store.setLast(self.CANDLE_COLUMNS[1:], [self.newRound[column] for column in self.CANDLE_COLUMNS[1:]])
 
-    def appendFormated(self, date: float, open: float, high: float, low: float, close: float):
+    def appendFormated(self, date: float, open: float, high: float, low: float, close: float,
+                       volume: float = 0.0, vwap: float = None, trades: int = 0):
         """Appends an already formated row to the data machine
 
         :param date: epoch time in seconds
@@ -160,18 +311,132 @@ class GBDataMachine:
         :type low: float
         :param close: close price
         :type close: float
+        :param volume: traded volume (default is 0)
+        :type volume: float
+        :param vwap: volume weighted average price (default is None)
+        :type vwap: float
+        :param trades: number of trades (default is 0)
+        :type trades: int
         """
-        self.ordered = pd.concat([self.ordered, pd.DataFrame({
-            'Date': date,
+        self._store.append({
+            'Date': float(date),
             'Open': float(open),
             'High': float(high),
             'Low': float(low),
             'Close': float(close),
-            'MA': 0,
-            'Std': 0,
-            'LBand': 0,
-            'HBand': 0
-        }, index=[0])], ignore_index=True)
+            'Volume': float(volume),
+            'VWAP': float(vwap) if vwap is not None else math.nan,
+            'Trades': float(trades)
+        })
+        self.pendingRows = True
+
+    def __mergeRound(self, round: Union[dict, None], candle: dict) -> dict:
+        candle = dict(self.__emptyRound(), **candle)
+        if round is None:
+            round = self.__emptyRound()
+            round.update({'Date': candle['Date'] - (candle['Date'] % (self.interval * 60)), 'Open': candle['Open'],
+                          'High': candle['High'], 'Low': candle['Low']})
+        merged = {'Date': round['Date'], 'Open': round['Open'], 'High': max(round['High'], candle['High']),
+                  'Low': min(round['Low'], candle['Low']), 'Close': candle['Close']}
+        for column in ['Volume', 'Trades', 'BuyVolume', 'SellVolume']:
+            merged[column] = round[column] + (candle[column] if not math.isnan(candle[column]) else 0.0)
+        turnover = sum(candle['VWAP'] * candle['Volume'] for candle in (round, candle) if candle['Volume'] > 0)
+        merged['VWAP'] = turnover / merged['Volume'] if merged['Volume'] > 0 else math.nan
+        return merged
+
+    def appendCandle(self, date: float, open: float, high: float, low: float, close: float, closed: bool = True,
+                     shouldPrint: bool = False, volume: float = 0.0, vwap: float = math.nan, trades: int = 0,
+                     buyVolume: float = 0.0, sellVolume: float = 0.0):
+        """Merges a candle of a smaller interval (a divisor of :attr:`interval`) into the open candle,
+        giving the same candles as appending the ticks it was built from. Not meant to be mixed with
+        :func:`append` on the same data machine.
+
+        :param date: epoch time of the candle in seconds
+        :type date: float
+        :param open: open price
+        :type open: float
+        :param high: high price
+        :type high: float
+        :param low: low price
+        :type low: float
+        :param close: close price
+        :type close: float
+        :param closed: False if the candle is still open, it is then shown in the open candle
+            but only merged for good once it is given again as closed (default is True)
+        :type closed: bool
+        :param volume: traded volume (default is 0)
+        :type volume: float
+        :param vwap: volume weighted average price (default is NaN)
+        :type vwap: float
+        :param trades: number of trades (default is 0)
+        :type trades: int
+        :param buyVolume: volume traded by buy orders (default is 0)
+        :type buyVolume: float
+        :param sellVolume: volume traded by sell orders (default is 0)
+        :type sellVolume: float
+        """
+        candle = {'Date': float(date), 'Open': float(open), 'High': float(high), 'Low': float(low), 'Close': float(close),
+                  'Volume': float(volume), 'VWAP': float(vwap), 'Trades': float(trades),
+                  'BuyVolume': float(buyVolume), 'SellVolume': float(sellVolume)}
+        if self.newRound['Date'] != 0 and candle['Date'] >= self.newRound['Date'] + 60 * self.interval:
+            if len(self._store) == 0 or self._store.last('Date') != self.newRound['Date']:
+                self._store.append(self.newRound)
+                self.intervalJustClosed = True
+            self.rolledRound = None
+        if closed:
+            self.rolledRound = self.__mergeRound(self.rolledRound, candle)
+            self.newRound = dict(self.rolledRound)
+        else:
+            self.newRound = self.__mergeRound(self.rolledRound, candle)
+        if self.streaming:
+            self.__updateLast(shouldPrint)
+        else:
+            self.update(shouldPrint)
+        self.__dispatch()
+
+    def appendCandles(self, candles: dict):
+        """Vectorized :func:`appendCandle` for closed candles.
+
+        :param candles: a dict of arrays ('Date', 'Open', 'High', 'Low', 'Close' and optionally
+            'Volume', 'VWAP', 'Trades', 'BuyVolume', 'SellVolume'), dates in increasing order
+        :type candles: dict
+        """
+        merged = GBUtilities.rollUpCandles(candles, self.interval)
+        if len(merged['Date']) == 0:
+            return
+        first = 0
+        if self.newRound['Date'] != 0 and merged['Date'][0] < self.newRound['Date'] + 60 * self.interval:
+            # First candles belong to the candle being built
+            self.rolledRound = self.__mergeRound(self.rolledRound, {
+                column: float(values[0]) for column, values in merged.items()})
+            self.newRound = dict(self.rolledRound)
+            first = 1
+        if first < len(merged['Date']):
+            self.__upsertOpenRound()
+            self._store.appendMany({column: values[first:-1] for column, values in merged.items()})
+            self.rolledRound = {column: float(values[-1]) for column, values in merged.items()}
+            self.newRound = dict(self.rolledRound)
+            self.intervalJustClosed = True
+        self.update()
+        self.__skipDispatch()
+
+    def appendOHLC(self, bars: list):
+        """Appends closed OHLC bars of an interval dividing :attr:`interval`, as returned by
+        :func:`KrakenApi.GetPrices`, resampled to :attr:`interval` in one pass with the indicators
+        computed once (see :func:`appendCandles`).
+
+        :param bars: bars formatted like [time, open, high, low, close, vwap, volume, count], values
+            may be strings, times in increasing order
+        :type bars: list
+        """
+        if len(bars) == 0:
+            return
+        values = np.asarray([bar[:8] for bar in bars], dtype=float)
+        self.appendCandles({
+            'Date': values[:, 0], 'Open': values[:, 1], 'High': values[:, 2], 'Low': values[:, 3], 'Close': values[:, 4],
+            'VWAP': values[:, 5], 'Volume': values[:, 6], 'Trades': values[:, 7],
+            'BuyVolume': np.zeros(len(values)), 'SellVolume': np.zeros(len(values))
+        })
 
     def appendFilename(self, fileName: str):
         """Appends a file into the data machine.
@@ -184,133 +449,283 @@ class GBDataMachine:
 
     def appendDataframe(self, dataFrame: pd.DataFrame):
         """Same as parseToInterval but with a different name"""
-        for i, row in dataFrame.iterrows():
-            self.__append(row['epoch'], row['price'])
-        self.update()
+        self.parseToInterval(dataFrame)
 
-    def append(self, epochTime: float, price: float, shouldPrint: bool = False):
+    def append(self, epochTime: float, price: float, shouldPrint: bool = False, volume: float = 0.0, side: str = None):
         """Appends new (epochTime, price) into the Dataframes.
 
         :param epochTime: timestamp of the price
         :type epochTime: float
         :param price: price
         :type price: float
+        :param volume: traded volume (default is 0)
+        :type volume: float
+        :param side: 'b' for a buy order, 's' for a sell order (default is None)
+        :type side: str
+        """
+        if self.tickBuffer is None:
+            return self.__appendTick(float(epochTime), float(price), float(volume), side, shouldPrint)
+        for tick in self.tickBuffer.push(float(epochTime), float(price), float(volume), side):
+            self.__appendTick(*tick, shouldPrint)
+
+    def flushTicks(self, shouldPrint: bool = False):
+        """Appends the ticks held back by the reorder buffer (see the `lateness` parameter), at the
+        end of a session. Ticks arriving afterwards with an older epoch are dropped.
+        """
+        if self.tickBuffer is None:
+            return
+        for tick in self.tickBuffer.flush():
+            self.__appendTick(*tick, shouldPrint)
+
+    def __appendTick(self, epochTime: float, price: float, volume: float, side: str, shouldPrint: bool):
+        """Appends a tick, updates the indicators and notifies the strategies."""
+        self.__append(epochTime, price, volume, side)
+        if self.streaming:
+            self.__updateLast(shouldPrint)
+        else:
+            self.update(shouldPrint)
+        self.__dispatch()
+        for strategy in self.tickListeners:
+            strategy.onTick(epochTime, price)
+
+    def subscribe(self, strategy):
+        """Notifies `strategy` of every candle closed from now on through its `onCandleClose(candle, indicators)`
+        method, and of every tick if it has an `onTick(epochTime, price)` method. Candles loaded in bulk
+        (:func:`appendDataframe`, :func:`appendCandles`, ...) are not notified.
+
+        :param strategy: strategy to notify, see :class:`IGreedyBoyStrategy`
+        :type strategy: IGreedyBoyStrategy
+        """
+        self.requireIndicators(strategy.indicators)
+        self.candleListeners.append(strategy)
+        if callable(getattr(strategy, 'onTick', None)):
+            self.tickListeners.append(strategy)
+        self.__skipDispatch()
+
+    def unsubscribe(self, strategy):
+        """Stops notifying `strategy`.
+
+        :param strategy: strategy given to :func:`subscribe`
+        :type strategy: IGreedyBoyStrategy
+        """
+        self.candleListeners = [listener for listener in self.candleListeners if listener is not strategy]
+        self.tickListeners = [listener for listener in self.tickListeners if listener is not strategy]
+
+    def __skipDispatch(self):
+        """Marks every closed candle as already notified."""
+        if len(self._store) >= 2:
+            self.dispatchedDate = max(self.dispatchedDate, self._store.last('Date', 2))
+
+    def __dispatch(self):
+        """Notifies the subscribed strategies of the candles closed since the last call."""
+        if not self.candleListeners or len(self._store) < 2 or self._store.last('Date', 2) <= self.dispatchedDate:
+            return
+        dates = self._store.column('Date')[:-1]
+        for row in range(int(np.searchsorted(dates, self.dispatchedDate, side='right')), len(dates)):
+            candle = {column: float(self._store.column(column)[row]) for column in self.CANDLE_COLUMNS}
+            self.dispatchedDate = candle['Date']
+            for strategy in self.candleListeners:
+                strategy.onCandleClose(candle, {column: float(self._store.column(column)[row])
+                                                for column in strategy.indicators})
+
+    def requireIndicators(self, columns):
+        """Activates the indicators computing `columns`, they are computed over the whole history
+        the first time and kept up to date afterwards. Candle columns are ignored.
+
+        :param columns: names of the columns needed ('EMA5', 'BollingerGap', ...)
+        :type columns: list[str]
+        :exception: KeyError if a column is not computed by any registered indicator
+        """
+        previousValues = self.engine.require(columns, self.__spilledCloses if self.spilledSegments else None)
+        if not previousValues:
+            return
+        # Candles already on disk get the new columns as well
+        start = 0
+        for segmentPath in self.spilledSegments:
+            with np.load(segmentPath) as segment:
+                columns = {column: segment[column] for column in segment.files}
+            end = start + len(columns['Close'])
+            columns.update({column: values[start:end] for column, values in previousValues.items()})
+            np.savez(segmentPath, **columns)
+            start = end
+
+    def __spilledCloses(self) -> np.ndarray:
+        closes = []
+        for segmentPath in self.spilledSegments:
+            with np.load(segmentPath) as segment:
+                closes.append(segment['Close'])
+        return np.concatenate(closes)
+
+    def indicator(self, column: str) -> np.ndarray:
+        """Returns the values of an indicator column (no copy), activating it if needed.
+
+        :param column: name of the column ('EMA5', 'MA', 'BollingerGap', ...)
+        :type column: str
+        """
+        self.requireIndicators([column])
+        return self._store.column(column)
+
+    def candle(self, offset: int = 1, indicators: list[str] = ()) -> Union[dict, None]:
+        """Returns the `offset`-th candle starting from the end with the given indicators,
+        activating them if needed.
+
+        :param offset: 1 for the candle still open, 2 for the last closed one, ... (default is 1)
+        :type offset: int
+        :param indicators: names of the indicator columns to add to the candle
+        :type indicators: list[str]
+        :returns: values by column name, None if there are not enough candles
+        :rtype: dict
+        """
+        self.requireIndicators(indicators)
+        if offset > len(self._store):
+            return None
+        return {column: self._store.last(column, offset) for column in self.CANDLE_COLUMNS + list(indicators)}
+
+    def __enforceRetention(self):
+        """Moves the oldest candles to an on-disk segment once the store holds twice the retention,
+        so spilling costs O(retention) every `retention` candles."""
+        if self.retention is None or len(self._store) < 2 * self.retention:
+            return
+        if self.spillDirectory is None:
+            self.spillDirectory = tempfile.mkdtemp(prefix="GreedyBoy-history-")
+        os.makedirs(self.spillDirectory, exist_ok=True)
+        dropped = self.engine.dropFront(len(self._store) - self.retention)
+        segmentPath = os.path.join(self.spillDirectory, "segment-{0:06d}.npz".format(len(self.spilledSegments)))
+        np.savez(segmentPath, **dropped)
+        self.spilledSegments.append(segmentPath)
+        self.spilledRows += len(dropped['Close'])
+
+    def history(self) -> pd.DataFrame:
+        """Returns every candle since the beginning, the ones moved to disk by the retention
+        policy followed by :attr:`ordered`.
+
+        :returns: the whole candle history
+        :rtype: pandas.DataFrame
         """
-        epochTime = float(epochTime)
-        price = float(price)
-        self.__append(epochTime, price)
-        self.update(shouldPrint)
+        columns = list(self.ordered.columns)
+        segments = []
+        for segmentPath in self.spilledSegments:
+            with np.load(segmentPath) as segment:
+                segments.append(pd.DataFrame({column: segment[column] for column in columns if column in segment}))
+        return pd.concat(segments + [self.ordered], ignore_index=True) if segments else self.ordered
+
+    def __updateLast(self, shouldPrint: bool = False):
+        """Streaming counterpart of :func:`update`, only the candle still open (last row) is computed
+        from the indicators running state.
+
+        :param shouldPrint: specify if the updates operations should be displayed or not
+        :type shouldPrint: bool
+        """
+        if self.committedRows is None or self.pendingRows or len(self._store) == 0:
+            return self.update(shouldPrint)
+        self.__upsertOpenRound()
+        self.engine.computeLast()
+        self.__enforceRetention()
+
+        if shouldPrint:
+            print(self._store.row(-1))
 
     def update(self, shouldPrint: bool = False):
         """Updates the GBDataMachine and computes bollinger bands, moving averages, ...
 
+        Only the rows added since the last update are computed, continuing from the
+        indicators running state.
+
         :param shouldPrint: specify if the updates operations should be displayed or not
         :type shouldPrint: bool
         """
+        self.__upsertOpenRound()
+        if len(self._store) == 0:
+            print("DataFrame is empty or missing required 'Close' column.")
+            return
 
-        warnings.filterwarnings("always", category=FutureWarning)
-
-        # if (self.ordered.at[len(self.ordered) - 1, 'Date'] != self.newRound['Date']).all():
-        #     self.ordered = pd.concat([self.ordered, self.newRound], ignore_index=True)
-        #     self.intervalJustClosed = True
-        # else:
-        #     self.ordered.at[len(self.ordered) - 1, 'High'] = self.newRound['High'].iloc[0]
-        #     self.ordered.at[len(self.ordered) - 1, 'Low'] = self.newRound['Low'].iloc[0]
-        #     self.ordered.at[len(self.ordered) - 1, 'Close'] = self.newRound['Close'].iloc[0]
-        #     self.ordered.at[len(self.ordered) - 1, 'Open'] = self.newRound['Open'].iloc[0]
-
-        if all(col in self.ordered.columns for col in ['Date', 'High', 'Low', 'Close', 'Open']):
-            # Flatten `self.newRound` if it's multi-dimensional
-            new_row = GBUtilities.ensureCorrectFormat(self.newRound, True, 'self.newRound')
-        
-            if self.ordered.empty or self.ordered.iloc[-1]['Date'] != new_row['Date']:
-                # Ensure `self.newRound` is in the correct format for concatenation
-                new_row_df = GBUtilities.createNewDataFrameRow(new_row, 'self.newRound')
-
-                # Append the new row to `self.ordered`
-                if self.ordered.empty:
-                    self.ordered = new_row_df
-                else:
-                    self.ordered = pd.concat([self.ordered, new_row_df], ignore_index=True)
-                self.intervalJustClosed = True
-            else:
-                # Update the last row with new values
-                last_index = self.ordered.index[-1]
-                self.ordered.loc[last_index, ['High', 'Low', 'Close', 'Open']] = (
-                    new_row['High'], new_row['Low'], new_row['Close'], new_row['Open']
-                )
-
-            # Calculate Moving Averages and Bollinger Bands
-            if (
-                len(self.ordered) >= self.movingAverageSize and 
-                all(col in self.ordered.columns for col in ['MA', 'Std'])
-            ):
-                self.ordered['MA'] = self.ordered['Close'].rolling(window=self.movingAverageSize).mean()
-                self.ordered['Std'] = self.ordered['Close'].rolling(window=self.movingAverageSize).std()
-                self.ordered['HBand'] = self.ordered['MA'] + (self.ordered['Std'] * 2)
-                self.ordered['LBand'] = self.ordered['MA'] - (self.ordered['Std'] * 2)
-            else:
-                self.ordered['MA'] = None
-                self.ordered['Std'] = None
-                self.ordered['HBand'] = None
-                self.ordered['LBand'] = None
-
-            # Calculate Exponential Moving Averages (EMA)
-            emaValues = GBConstants.getEMAValues()
-            for emaValue in emaValues:
-                self.ordered['EMA{0}'.format(emaValue)] = self.ordered['Close'].ewm(span=emaValue).mean()
-            # self.ordered['EMA5'] = self.ordered['Close'].ewm(span=5).mean()
-            # self.ordered['EMA10'] = self.ordered['Close'].ewm(span=10).mean()
-            # self.ordered['EMA20'] = self.ordered['Close'].ewm(span=20).mean()
-            # self.ordered['EMA50'] = self.ordered['Close'].ewm(span=50).mean()
-            # self.ordered['EMA40'] = self.ordered['Close'].ewm(span=40).mean()
-            # self.ordered['EMA100'] = self.ordered['Close'].ewm(span=100).mean()
-            # self.ordered['EMA200'] = self.ordered['Close'].ewm(span=200).mean()
-
-            # Calculate Bollinger Gaps
-            if all(col in self.ordered.columns for col in ['HBand', 'LBand']):
-                self.bollingerGaps = pd.DataFrame()
-                self.bollingerGaps['Date'] = self.ordered['Date']
-                self.bollingerGaps['Value'] = round(
-                    (self.ordered['Close'] - self.ordered['LBand']) / 
-                    (self.ordered['HBand'] - self.ordered['LBand']) * 100, 2
-                )
-            else:
-                self.bollingerGaps = pd.DataFrame()
+        self.engine.computeRows()
+        self.pendingRows = False
+        self.__enforceRetention()
 
-            # Print the last row if it exists
-            if not self.ordered.empty and shouldPrint:
-                last = self.ordered.iloc[-1]
-                print(last)
-        else:
-            print("DataFrame is empty or missing required 'Close' column.")
-        # self.ordered['MA'] = self.ordered['Close'].rolling(window=self.movingAverageSize).mean()
-        # self.ordered['EMA20'] = self.ordered['Close'].ewm(span=20).mean()
-        # self.ordered['EMA50'] = self.ordered['Close'].ewm(span=50).mean()
-        # self.ordered['EMA40'] = self.ordered['Close'].ewm(span=40).mean()
-        # self.ordered['EMA5'] = self.ordered['Close'].ewm(span=5).mean()
-        # self.ordered['Std'] = self.ordered['Close'].rolling(window=self.movingAverageSize).std()
-        # self.ordered['HBand'] = self.ordered['MA'] + (self.ordered['Std'] * 2)
-        # self.ordered['LBand'] = self.ordered['MA'] - (self.ordered['Std'] * 2)
-        # self.bollingerGaps = pd.DataFrame()
-        # self.bollingerGaps['Date'] = self.ordered['Date']
-        # self.bollingerGaps['Value'] = round(
-        #     (self.ordered['Close'] - self.ordered['LBand']) / (self.ordered['HBand'] - self.ordered['LBand']) * 100
-        # , 2)
-        # last = self.ordered.iloc[-1]
-        # if shouldPrint:
-        #     print(self.ordered.iloc[[-1]])
-
-    def convertForGraphicViews(self):
-        """Convert data and format it for :ref:`GraphViewer<GraphViewer>`.
+        # Print the last row if it exists
+        if shouldPrint:
+            print(self._store.row(-1))
+
+    def saveSnapshot(self, fileName: str):
+        """Writes the candles, the indicators running state and the open candle into a binary file,
+        :func:`fromSnapshot` then resumes from it without any replay. Candles already moved to
+        disk by the retention policy stay in their segments and are only referenced.
+
+        :param fileName: Name of the snapshot file (.npz).
+        :type fileName: str
+        """
+        self._store.save(fileName, {
+            'interval': self.interval,
+            'movingAverageSize': self.movingAverageSize,
+            'streaming': self.streaming,
+            'retention': self.retention,
+            'spillDirectory': self.spillDirectory,
+            'spilledSegments': self.spilledSegments,
+            'spilledRows': self.spilledRows,
+            'viewIndicators': self.viewIndicators,
+            'pendingRows': self.pendingRows,
+            'newRound': self.newRound,
+            'rolledRound': self.rolledRound,
+            'lastEpoch': self.lastEpoch,
+            'tickBuffer': self.tickBuffer.getState() if self.tickBuffer is not None else None,
+            'engine': self.engine.snapshot()
+        })
+
+    def warmState(self, tail: int = None) -> dict:
+        """Returns what the next session needs to go on from the last tick, meant to be saved when the
+        day closes: the running state of the indicators (EMA accumulators, rolling window), the open
+        candle and the last `tail` candles. Its size doesn't depend on the history length, and
+        :func:`fromWarmState` resumes from it without replaying the ticks of the day.
+
+        The indicators of :attr:`viewIndicators` are activated first, indicators required afterwards by
+        the resumed data machine are only computed over these candles.
+
+        :param tail: Number of candles kept, the open one included. (default is `movingAverageSize` + 1)
+        :type tail: int
+        :returns: JSON serializable state
+        :rtype: dict
+        """
+        self.requireIndicators(self.viewIndicators)
+        if len(self._store) != 0:
+            self.update()
+        start = max(len(self._store) - (tail if tail is not None else self.movingAverageSize + 1), 0)
+        engine = self.engine.snapshot()
+        if engine['committedRows'] is not None:
+            engine['committedRows'] -= start
+        return {
+            'interval': self.interval,
+            'movingAverageSize': self.movingAverageSize,
+            'streaming': self.streaming,
+            'viewIndicators': self.viewIndicators,
+            'candles': {column: self._store.column(column)[start:].tolist() for column in self._store.columns},
+            'newRound': self.newRound,
+            'rolledRound': self.rolledRound,
+            'lastEpoch': self.lastEpoch,
+            'tickBuffer': self.tickBuffer.getState() if self.tickBuffer is not None else None,
+            'engine': engine
+        }
+
+    def convertForGraphicViews(self, onlyNew: bool = False):
+        """Convert data and format it for :ref:`GraphViewer<GraphViewer>`. Both dataframes are
+        read-only views on the candle store indexed by date, nothing is copied.
 
+        :param onlyNew: only returns the candles added since the last call, starting with the last
+            candle it returned as it may have changed since (default is False)
+        :type onlyNew: bool
         :returns: (DataFrame containing data for Plot 1, Same for Plot 2)
         :rtype: (pandas.DataFrame, pandas.DataFrame)
         """
-        data1, data2 = copy.deepcopy(self.ordered), copy.deepcopy(self.bollingerGaps)
-        data1, data2 = data1.iloc[self.movingAverageSize:], data2.iloc[self.movingAverageSize:]
-        data1["Date"], data2["Date"] = pd.to_datetime(data1["Date"], unit='s'), pd.to_datetime(data2["Date"], unit='s')
-        data1, data2 = data1.set_index('Date'), data2.set_index('Date')
+        self.requireIndicators(self.viewIndicators + ['BollingerGap'])
+        start = self.movingAverageSize
+        if onlyNew and self.graphicViewDate is not None:
+            start = max(start, int(np.searchsorted(self._store.column('Date'), self.graphicViewDate)))
+        start = min(start, len(self._store))
+        if start < len(self._store):
+            self.graphicViewDate = float(self._store.column('Date')[-1])
+        # Candles and indicators shown, indexed by date, the Bollinger gaps go in the second plot
+        data1 = self._store.view(start, self.CANDLE_COLUMNS[1:] + self.viewIndicators)
+        data2 = pd.DataFrame({'Value': self._store.view(start, ['BollingerGap'])['BollingerGap']}, copy=False)
         return data1, data2
 
     def memoryUsage(self):
@@ -319,7 +734,7 @@ class GBDataMachine:
         :returns: memory usage
         :rtype: int
         """
-        return self.ordered.memory_usage(deep=True).sum() + self.bollingerGaps.memory_usage(deep=True).sum()
+        return self._store.memoryUsage()
 
     def printPrices(self):
         """Prints prices data"""
@@ -327,14 +742,15 @@ class GBDataMachine:
 
     def currentBollingerValue(self):
         """Prints the current/last bollinger value"""
-        return self.bollingerGaps.iloc[[-1]].iloc[0]['Value']
+        self.requireIndicators(['BollingerGap'])
+        return self._store.last('BollingerGap')
 
     def lastPrice(self):
         """Returns the last close price"""
-        return self.ordered.iloc[-1]["Close"] if len(self.ordered.index) != 0 else None
+        return self._store.last('Close') if len(self._store) != 0 else None
 
     def intervalClosed(self) -> bool:
         """Returns if an iteration has just been closed"""
         ret = self.intervalJustClosed
         self.intervalJustClosed = False
-        return ret
\ No newline at end of file
+        return ret
@@ -63,6 +63,8 @@ class GBDecisionMachine:
         self.newRound = copy.deepcopy(self.roundTemp)
         self.bollingerGaps = pd.DataFrame()
         self.ordered = data
+        # Number of orders returned by convertForGraphicViews()
+        self.graphicViewRows = 0
         return
 
     def __append(self, epochTime: float, price: float, amount: float, order: str):
@@ -79,14 +81,17 @@ class GBDecisionMachine:
         """
         self.__append(epochTime, price, amount, order)
 
-    def convertForGraphicViews(self):
-        """Convert data and format it for :ref:`GraphViewer<GraphViewer>`.
+    def convertForGraphicViews(self, onlyNew: bool = False):
+        """Convert data and format it for :ref:`GraphViewer<GraphViewer>`, the dataframe is
+        indexed by date and shares its columns with :attr:`ordered`, nothing is copied.
 
+        :param onlyNew: only returns the orders added since the last call (default is False)
+        :type onlyNew: bool
         :returns: (DataFrame containing decision data)
         :rtype: (pandas.DataFrame)
         """
-        data = copy.deepcopy(self.ordered)
-        print(data)
-        data["Date"] = pd.to_datetime(data["Date"], unit='s')
-        data = data.set_index('Date')
+        start = self.graphicViewRows if onlyNew else 0
+        data = pd.DataFrame(self.ordered.iloc[start:], copy=False)
+        data.index = pd.DatetimeIndex(pd.to_datetime(data["Date"], unit='s'), name='Date')
+        self.graphicViewRows = len(self.ordered.index)
         return data
\ No newline at end of file
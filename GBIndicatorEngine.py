@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+##
+## GBIndicatorEngine.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+from typing import Callable
+
+import numpy as np
+
+from GBCandleStore import GBCandleStore
+from GBIndicators import INDICATORS, findIndicator
+
+class GBIndicatorEngine:
+    """Computes the indicators required on a :class:`GBCandleStore`, shared by the data machines.
+
+    The last row of the store is the candle still open, every row before `committedRows` has
+    been pushed into the running state of the indicators. Only the indicators required with
+    :func:`require` are computed, the others cost nothing.
+    """
+    CANDLE_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close']
+
+    def __init__(self, store: GBCandleStore, settings: dict = None, candleColumns: list[str] = None):
+        """
+        :param store: candles the indicators are computed on
+        :type store: GBCandleStore
+        :param settings: settings overriding the default parameters of the indicators ({'movingAverageSize': 30}, ...)
+        :type settings: dict
+        :param candleColumns: columns built from the ticks, never computed by an indicator (default is :attr:`CANDLE_COLUMNS`)
+        :type candleColumns: list[str]
+        """
+        self.store = store
+        self.settings = dict(settings or {})
+        self.candleColumns = list(candleColumns if candleColumns is not None else self.CANDLE_COLUMNS)
+        # Active indicators by key ('EMA(span=5)', ...) with the specification they were built from
+        self.indicators = dict()
+        self.specs = dict()
+        # Key of the indicator computing each active column
+        self.columnKeys = dict()
+        self.committedRows = None
+
+    @property
+    def columns(self) -> list[str]:
+        """Returns the columns of every active indicator"""
+        return [column for indicator in self.indicators.values() for column in indicator.columns]
+
+    def setStore(self, store: GBCandleStore):
+        """Replaces the candles, every row will be computed again on the next :func:`computeRows`.
+
+        :param store: new candles
+        :type store: GBCandleStore
+        """
+        self.store = store
+        for column in self.columns:
+            self.store.addColumn(column)
+        self.committedRows = None
+
+    def require(self, columns, previousCloses: Callable[[], np.ndarray] = None) -> dict:
+        """Activates the indicators computing `columns`. When the running state already exists,
+        new indicators are computed over every candle at once and committed up to `committedRows`.
+
+        :param columns: names of the columns needed, candle columns are ignored
+        :type columns: list[str]
+        :param previousCloses: returns the closes of the candles no longer in the store, if any
+        :type previousCloses: Callable[[], numpy.ndarray]
+        :returns: values of the new columns for the candles returned by `previousCloses`
+        :rtype: dict
+        :exception: KeyError if a column is not computed by any registered indicator
+        """
+        created = []
+        for column in columns:
+            if column in self.candleColumns or column in self.columnKeys:
+                continue
+            spec, parameters = findIndicator(column, self.settings)
+            key = spec.key(parameters)
+            self.indicators[key] = spec.create(parameters)
+            self.specs[key] = (spec, parameters)
+            for indicatorColumn in self.indicators[key].columns:
+                self.columnKeys[indicatorColumn] = key
+                self.store.addColumn(indicatorColumn)
+            created.append(self.indicators[key])
+        if not created or self.committedRows is None or len(self.store) == 0:
+            return dict()
+
+        previous = previousCloses() if previousCloses is not None else np.empty(0)
+        closes = np.concatenate([previous, self.store.column('Close')])
+        previousValues = dict()
+        for indicator in created:
+            values = indicator.values(closes)
+            for column in indicator.columns:
+                self.store.setColumn(column, values[column][len(previous):])
+                previousValues[column] = values[column][:len(previous)]
+            indicator.pushMany(closes[:len(previous) + self.committedRows])
+        return previousValues
+
+    def reset(self):
+        """Clears the running state of every indicator, the next :func:`computeRows` starts from the first row."""
+        self.indicators = {key: spec.create(parameters) for key, (spec, parameters) in self.specs.items()}
+        self.committedRows = 0
+
+    def computeRows(self):
+        """Computes every row not committed yet in one pass, continuing from the running state,
+        then commits every closed candle (all but the last row)."""
+        if self.committedRows is None:
+            self.reset()
+        start = self.committedRows
+        closes = self.store.column('Close')[start:]
+        for indicator in self.indicators.values():
+            for column, values in indicator.values(closes).items():
+                self.store.setColumn(column, values, start)
+            indicator.pushMany(closes[:-1])
+        self.committedRows = len(self.store) - 1
+
+    def computeLast(self):
+        """Streaming counterpart of :func:`computeRows`, commits the candles closed since the last
+        call then computes the candle still open from the running state only."""
+        closes = self.store.column('Close')
+        if self.committedRows < len(closes) - 1:
+            for indicator in self.indicators.values():
+                indicator.pushMany(closes[self.committedRows:-1])
+            self.committedRows = len(closes) - 1
+
+        close = float(closes[-1])
+        columns, values = [], []
+        for indicator in self.indicators.values():
+            for column, value in indicator.value(close).items():
+                columns.append(column)
+                values.append(value)
+        self.store.setLast(columns, values)
+
+    def snapshot(self) -> dict:
+        """Returns the active indicators with their running state, see :func:`restore`.
+
+        :returns: JSON serializable state of the engine
+        :rtype: dict
+        """
+        return {
+            'committedRows': self.committedRows,
+            'indicators': [{'name': spec.name, 'parameters': parameters, 'state': self.indicators[key].getState()}
+                           for key, (spec, parameters) in self.specs.items()]
+        }
+
+    def restore(self, snapshot: dict):
+        """Activates the indicators of a :func:`snapshot` with their running state, the store
+        must already hold the candles and the indicator columns of the snapshot.
+
+        :param snapshot: state returned by :func:`snapshot`
+        :type snapshot: dict
+        :exception: KeyError if an indicator of the snapshot is not registered
+        """
+        self.indicators, self.specs, self.columnKeys = dict(), dict(), dict()
+        for entry in snapshot['indicators']:
+            spec, parameters = INDICATORS[entry['name']], entry['parameters']
+            key = spec.key(parameters)
+            self.indicators[key] = spec.create(parameters)
+            self.indicators[key].setState(entry['state'])
+            self.specs[key] = (spec, parameters)
+            for column in self.indicators[key].columns:
+                self.columnKeys[column] = key
+                self.store.addColumn(column)
+        self.committedRows = snapshot['committedRows']
+
+    def dropFront(self, count: int) -> dict:
+        """Removes the `count` oldest committed rows from the store and returns them.
+
+        :param count: number of rows to remove, at most `committedRows`
+        :type count: int
+        """
+        count = min(count, self.committedRows)
+        self.committedRows -= count
+        return self.store.dropFront(count)
@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+##
+## GBIndicators.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+import math
+import re
+from collections import deque
+from typing import Union
+
+import numpy as np
+
+import GBKernels
+
+class EMAState:
+    """Running state of an exponential moving average, giving the same values as
+    ``pandas.Series.ewm(span=span).mean()`` (adjusted weights).
+
+    Only the closed candles are pushed into the state, the open candle is evaluated
+    with :func:`value` without modifying anything.
+    """
+
+    def __init__(self, span: int):
+        """
+        :param span: span of the EMA (5 for EMA5, ...)
+        :type span: int
+        """
+        self.span = span
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def seed(self, ema: float, count: int):
+        """Rebuilds the running state from an already computed EMA value.
+
+        :param ema: EMA value of the last closed candle
+        :type ema: float
+        :param count: number of candles taken into account by `ema`
+        :type count: int
+        """
+        self.denominator = (1.0 - self.decay ** count) / (1.0 - self.decay)
+        self.numerator = ema * self.denominator
+
+    def value(self, price: float) -> float:
+        """Returns the EMA value if `price` was the next value of the series.
+
+        :param price: price of the candle being evaluated
+        :type price: float
+        """
+        return (price + self.decay * self.numerator) / (1.0 + self.decay * self.denominator)
+
+    def push(self, price: float):
+        """Commits `price` into the running state.
+
+        :param price: close price of a closed candle
+        :type price: float
+        """
+        self.numerator = price + self.decay * self.numerator
+        self.denominator = 1.0 + self.decay * self.denominator
+
+    def values(self, prices: np.ndarray) -> np.ndarray:
+        """Returns the EMA values of `prices` continuing the running state, without committing them.
+
+        :param prices: prices following the ones already pushed
+        :type prices: numpy.ndarray
+        """
+        newMeans = GBKernels.ewmMean(prices, (self.span - 1) / 2)
+        weights = self.decay ** np.arange(1, len(prices) + 1)
+        newDenominators = (1.0 - weights) / (1.0 - self.decay)
+        return (newMeans * newDenominators + weights * self.numerator) / (newDenominators + weights * self.denominator)
+
+    def pushMany(self, prices: np.ndarray):
+        """Commits every price of `prices` into the running state.
+
+        :param prices: close prices of closed candles
+        :type prices: numpy.ndarray
+        """
+        if len(prices) < 32:
+            for price in prices:
+                self.push(float(price))
+            return
+        last = float(self.values(prices)[-1])
+        weight = self.decay ** len(prices)
+        self.denominator = weight * self.denominator + (1.0 - weight) / (1.0 - self.decay)
+        self.numerator = last * self.denominator
+
+class RollingWindowState:
+    """Running sums of the last `size - 1` closed values, giving the same mean and
+    standard deviation as ``pandas.Series.rolling(window=size)`` once the open
+    candle is added to the window.
+
+    Values are shifted by the first pushed price to keep the sum of squares accurate.
+    """
+
+    def __init__(self, size: int):
+        """
+        :param size: size of the rolling window
+        :type size: int
+        """
+        self.size = size
+        self.window = deque(maxlen=max(size - 1, 0))
+        self.shift = None
+        self.total = 0.0
+        self.squares = 0.0
+
+    def push(self, price: float):
+        """Commits `price` into the window, dropping the oldest value if needed.
+
+        :param price: close price of a closed candle
+        :type price: float
+        """
+        if self.window.maxlen == 0:
+            return
+        if self.shift is None:
+            self.shift = price
+        x = price - self.shift
+        if len(self.window) == self.window.maxlen:
+            old = self.window[0]
+            self.total -= old
+            self.squares -= old * old
+        self.window.append(x)
+        self.total += x
+        self.squares += x * x
+
+    def pushMany(self, prices: np.ndarray):
+        """Commits every price of `prices` into the window.
+
+        :param prices: close prices of closed candles
+        :type prices: numpy.ndarray
+        """
+        for price in prices[max(len(prices) - self.window.maxlen, 0):]:
+            self.push(float(price))
+
+    def value(self, price: float) -> Union[tuple[float, float], tuple[None, None]]:
+        """Returns (mean, std) of the window if `price` was the next value of the series,
+        (None, None) if there is not enough data yet.
+
+        :param price: price of the candle being evaluated
+        :type price: float
+        """
+        if len(self.window) < self.window.maxlen:
+            return None, None
+        if self.size < 2:
+            return price, math.nan
+        shift = self.shift if self.shift is not None else price
+        x = price - shift
+        total, squares = self.total + x, self.squares + x * x
+        variance = (squares - total * total / self.size) / (self.size - 1)
+        return total / self.size + shift, math.sqrt(variance) if variance > 0 else 0.0
+
+    def values(self, prices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the rolling means and standard deviations of `prices` continuing the window,
+        without committing them (NaN while the window is not full).
+
+        :param prices: prices following the ones already pushed
+        :type prices: numpy.ndarray
+        """
+        tail = np.asarray(self.window, dtype=float) + (self.shift if self.shift is not None else 0.0)
+        means, stds = GBKernels.rollingMeanStd(np.concatenate([tail, np.asarray(prices, dtype=float)]), self.size)
+        return means[len(tail):], stds[len(tail):]
+
+def bollingerGap(close: float, lBand: Union[float, None], hBand: Union[float, None]) -> float:
+    """Returns the position of `close` between the bollinger bands in percent (rounded to 2 decimals).
+
+    :param close: close price
+    :type close: float
+    :param lBand: low bollinger band
+    :type lBand: float
+    :param hBand: high bollinger band
+    :type hBand: float
+    """
+    if lBand is None or hBand is None or hBand == lBand:
+        return math.nan
+    return round((close - lBand) / (hBand - lBand) * 100, 2)
+
+class EMAIndicator:
+    """Exponential moving average of the close prices, stored in the column ``EMA{span}``."""
+
+    def __init__(self, span: int):
+        """
+        :param span: span of the EMA
+        :type span: int
+        """
+        self.columns = ['EMA{0}'.format(span)]
+        self.state = EMAState(span)
+
+    def values(self, closes: np.ndarray) -> dict:
+        """Returns the columns values for `closes`, continuing the running state."""
+        return {self.columns[0]: self.state.values(closes)}
+
+    def value(self, close: float) -> dict:
+        """Returns the columns values of the open candle."""
+        return {self.columns[0]: self.state.value(close)}
+
+    def pushMany(self, closes: np.ndarray):
+        """Commits the close prices of closed candles."""
+        self.state.pushMany(closes)
+
+    def getState(self) -> dict:
+        """Returns the running state, see :func:`setState`."""
+        return {'numerator': self.state.numerator, 'denominator': self.state.denominator}
+
+    def setState(self, state: dict):
+        """Restores a running state returned by :func:`getState`."""
+        self.state.numerator, self.state.denominator = state['numerator'], state['denominator']
+
+class BollingerIndicator:
+    """Moving average, standard deviation, bollinger bands and bollinger gap of the close prices,
+    stored in the columns ``MA``, ``Std``, ``HBand``, ``LBand`` and ``BollingerGap``."""
+
+    def __init__(self, movingAverageSize: int):
+        """
+        :param movingAverageSize: size of the moving average window
+        :type movingAverageSize: int
+        """
+        self.columns = ['MA', 'Std', 'HBand', 'LBand', 'BollingerGap']
+        self.state = RollingWindowState(movingAverageSize)
+
+    def values(self, closes: np.ndarray) -> dict:
+        """Returns the columns values for `closes`, continuing the running state."""
+        movingAverage, std = self.state.values(closes)
+        hBand, lBand = movingAverage + (std * 2), movingAverage - (std * 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gaps = np.round((closes - lBand) / (hBand - lBand) * 100, 2)
+        return {'MA': movingAverage, 'Std': std, 'HBand': hBand, 'LBand': lBand, 'BollingerGap': gaps}
+
+    def value(self, close: float) -> dict:
+        """Returns the columns values of the open candle."""
+        mean, std = self.state.value(close)
+        hBand = mean + std * 2 if mean is not None else None
+        lBand = mean - std * 2 if mean is not None else None
+        return {'MA': mean, 'Std': std, 'HBand': hBand, 'LBand': lBand, 'BollingerGap': bollingerGap(close, lBand, hBand)}
+
+    def pushMany(self, closes: np.ndarray):
+        """Commits the close prices of closed candles."""
+        self.state.pushMany(closes)
+
+    def getState(self) -> dict:
+        """Returns the running state, see :func:`setState`."""
+        return {'window': list(self.state.window), 'shift': self.state.shift,
+                'total': self.state.total, 'squares': self.state.squares}
+
+    def setState(self, state: dict):
+        """Restores a running state returned by :func:`getState`."""
+        self.state.window.clear()
+        self.state.window.extend(state['window'])
+        self.state.shift, self.state.total, self.state.squares = state['shift'], state['total'], state['squares']
+
+class SMMAIndicator:
+    """Smoothed moving average of the close prices, stored in the column ``SMMA{window}``.
+
+    The first value is the simple average of the first `window` closes, the next ones are
+    ``(previous * window + close) / (window + 1)``, an exponential average with ``com=window``
+    computed in one pass by :func:`GBKernels.ewmMean`. Values are rounded to 10 decimals.
+    """
+
+    def __init__(self, window: int):
+        """
+        :param window: window size of the SMMA
+        :type window: int
+        """
+        self.window = window
+        self.columns = ['SMMA{0}'.format(window)]
+        self.count = 0
+        self.total = 0.0
+        self.previous = None
+
+    def __smoothed(self, closes: np.ndarray) -> np.ndarray:
+        """Returns the SMMA values of `closes` continuing the running state, not rounded
+        (NaN while less than `window` closes have been seen)."""
+        closes = np.asarray(closes, dtype=float)
+        values = np.full(len(closes), np.nan)
+        if self.previous is not None:
+            seed, first = self.previous, 0
+        else:
+            # First value is the simple average of the first `window` closes
+            first = self.window - 1 - self.count
+            if first >= len(closes):
+                return values
+            values[first] = (self.total + closes[:first + 1].sum()) / self.window
+            seed, first = values[first], first + 1
+        values[first:] = GBKernels.ewmMean(np.concatenate([[seed], closes[first:]]), self.window, adjust=False)[1:]
+        return values
+
+    def values(self, closes: np.ndarray) -> dict:
+        """Returns the columns values for `closes`, continuing the running state."""
+        return {self.columns[0]: np.round(self.__smoothed(closes), 10)}
+
+    def value(self, close: float) -> dict:
+        """Returns the columns values of the open candle."""
+        if self.previous is None and self.count < self.window - 1:
+            return {self.columns[0]: None}
+        return {self.columns[0]: round(float(self.__smoothed([close])[0]), 10)}
+
+    def pushMany(self, closes: np.ndarray):
+        """Commits the close prices of closed candles."""
+        if len(closes) == 0:
+            return
+        last = self.__smoothed(closes)[-1]
+        if not math.isnan(last):
+            self.previous = float(last)
+        self.count += len(closes)
+        self.total += float(np.sum(closes))
+
+    def getState(self) -> dict:
+        """Returns the running state, see :func:`setState`."""
+        return {'count': self.count, 'total': self.total, 'previous': self.previous}
+
+    def setState(self, state: dict):
+        """Restores a running state returned by :func:`getState`."""
+        self.count, self.total, self.previous = state['count'], state['total'], state['previous']
+
+class IndicatorSpec:
+    """Declaration of an indicator: its name, its parameters and the class implementing it.
+
+    The implementation is built with the parameters as keyword arguments and must provide
+    ``columns``, ``values(closes)`` (batch), ``value(close)`` (open candle), ``pushMany(closes)``
+    (streaming) and ``getState()``/``setState(state)`` (snapshots, JSON serializable values),
+    like :class:`EMAIndicator`.
+    """
+
+    def __init__(self, name: str, pattern: str, implementation: type, parameters: dict = None):
+        """
+        :param name: name of the indicator ('EMA', 'Bollinger', ...)
+        :type name: str
+        :param pattern: regular expression matching the columns computed by the indicator,
+            named groups are integer parameters ('EMA(?P<span>\\d+)')
+        :type pattern: str
+        :param implementation: class implementing the indicator
+        :type implementation: type
+        :param parameters: parameters not found in the column name with their default value,
+            data machines override them with their own settings (movingAverageSize, ...)
+        :type parameters: dict
+        """
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.implementation = implementation
+        self.parameters = dict(parameters or {})
+
+    def match(self, column: str, settings: dict) -> Union[dict, None]:
+        """Returns the parameters of the indicator computing `column`, None if it doesn't compute it.
+
+        :param column: name of the column
+        :type column: str
+        :param settings: settings of the data machine overriding the default parameters
+        :type settings: dict
+        """
+        match = self.pattern.fullmatch(column)
+        if match is None:
+            return None
+        parameters = {key: settings.get(key, value) for key, value in self.parameters.items()}
+        parameters.update({key: int(value) for key, value in match.groupdict().items()})
+        return parameters
+
+    def key(self, parameters: dict) -> str:
+        """Returns the unique name of the indicator built with `parameters` ('EMA(span=5)', ...)."""
+        return '{0}({1})'.format(self.name, ', '.join('{0}={1}'.format(key, parameters[key]) for key in sorted(parameters)))
+
+    def create(self, parameters: dict):
+        """Builds the indicator with `parameters`."""
+        return self.implementation(**parameters)
+
+INDICATORS = dict()
+"""
+Registered indicators by name, see :func:`registerIndicator`.
+"""
+
+def registerIndicator(spec: IndicatorSpec):
+    """Registers an indicator, its columns can then be required from any data machine.
+
+    :param spec: declaration of the indicator
+    :type spec: IndicatorSpec
+    """
+    INDICATORS[spec.name] = spec
+
+def findIndicator(column: str, settings: dict = None) -> tuple[IndicatorSpec, dict]:
+    """Returns the registered indicator computing `column` and its parameters.
+
+    :param column: name of the column ('EMA5', 'BollingerGap', 'SMMA40', ...)
+    :type column: str
+    :param settings: settings of the data machine overriding the default parameters
+    :type settings: dict
+    :exception: KeyError if no registered indicator computes `column`
+    """
+    for spec in INDICATORS.values():
+        parameters = spec.match(column, settings or {})
+        if parameters is not None:
+            return spec, parameters
+    raise KeyError("Unknown indicator column '{0}'".format(column))
+
+registerIndicator(IndicatorSpec('EMA', r'EMA(?P<span>\d+)', EMAIndicator))
+registerIndicator(IndicatorSpec('Bollinger', r'MA|Std|LBand|HBand|BollingerGap', BollingerIndicator, {'movingAverageSize': 30}))
+registerIndicator(IndicatorSpec('SMMA', r'SMMA(?P<window>\d+)', SMMAIndicator))
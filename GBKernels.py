@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+##
+## GBKernels.py
+##
+
+"""Inner loops of the data machines and strategies, compiled with Numba when it is installed.
+
+Every kernel is written as a plain loop, compiled once (and cached on disk) by Numba, and has
+a NumPy/pandas counterpart used when Numba is not installed, like on the AWS Lambda collector
+without the Numba layer. Both give the same values, the exponential averages are bit-identical
+to ``pandas.Series.ewm``.
+"""
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+import math
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Read-only deployments (AWS Lambda) cache the compiled kernels in the temporary directory
+if not os.access(os.path.dirname(os.path.abspath(__file__)), os.W_OK):
+    os.environ.setdefault('NUMBA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'numba-cache'))
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+"""
+True if the kernels are compiled with Numba, False if the NumPy implementations are used.
+"""
+
+def _compiled(loop):
+    """Returns `loop` compiled by Numba, None if Numba is not installed."""
+    return numba.njit(cache=True)(loop) if NUMBA_AVAILABLE else None
+
+##
+## Tick-to-candle bucketing
+##
+
+def _bucketStartsLoop(epochs: np.ndarray, interval: int, openDate: float) -> tuple:
+    size = interval * 60.0
+    dates = np.empty(len(epochs))
+    starts = np.empty(len(epochs), dtype=np.int64)
+    count = 0
+    highest = openDate if openDate else -math.inf
+    for i in range(len(epochs)):
+        if epochs[i] > highest:
+            highest = epochs[i]
+        date = openDate if openDate and highest < openDate + size else highest - highest % size
+        if count == 0 or date != dates[count - 1]:
+            dates[count] = date
+            starts[count] = i
+            count += 1
+    return dates[:count], starts[:count]
+
+def _bucketStartsNumpy(epochs: np.ndarray, interval: int, openDate: float) -> tuple:
+    highestEpochs = np.maximum.accumulate(epochs if not openDate else np.maximum(epochs, openDate))
+    dates = highestEpochs - (highestEpochs % (interval * 60))
+    if openDate:
+        dates[highestEpochs < openDate + interval * 60] = openDate
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(dates)) + 1])
+    return dates[starts], starts
+
+_bucketStartsCompiled = _compiled(_bucketStartsLoop)
+
+def bucketStarts(epochs: np.ndarray, interval: int, openDate: float = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the date of every candle and the index of its first tick. Each tick belongs to the
+    bucket of the highest epoch seen so far, so late ticks stay in the open candle.
+
+    :param epochs: epoch times of the ticks in seconds, at least one
+    :type epochs: numpy.ndarray
+    :param interval: candle size in minutes
+    :type interval: int
+    :param openDate: date of the candle currently open, 0 if there is none
+    :type openDate: float
+    :returns: (dates of the candles, index of the first tick of each candle)
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    epochs = np.asarray(epochs, dtype=float)
+    if _bucketStartsCompiled is not None:
+        return _bucketStartsCompiled(epochs, interval, float(openDate))
+    return _bucketStartsNumpy(epochs, interval, openDate)
+
+##
+## Exponential moving averages
+##
+
+def _ewmMeanLoop(values: np.ndarray, com: float, adjust: bool) -> np.ndarray:
+    # Same operations as pandas, values are bit-identical to Series.ewm(com=com, adjust=adjust).mean()
+    alpha = 1.0 / (1.0 + com)
+    oldWeightFactor = 1.0 - alpha
+    newWeight = 1.0 if adjust else alpha
+    means = np.empty(len(values))
+    if len(values) == 0:
+        return means
+    weighted, oldWeight = values[0], 1.0
+    means[0] = weighted
+    for i in range(1, len(values)):
+        oldWeight *= oldWeightFactor
+        if weighted != values[i]:
+            weighted = (oldWeight * weighted + newWeight * values[i]) / (oldWeight + newWeight)
+        oldWeight = oldWeight + newWeight if adjust else 1.0
+        means[i] = weighted
+    return means
+
+_ewmMeanCompiled = _compiled(_ewmMeanLoop)
+
+def ewmMean(values: np.ndarray, com: float, adjust: bool = True) -> np.ndarray:
+    """Returns ``pandas.Series(values).ewm(com=com, adjust=adjust).mean()`` for values without NaN.
+
+    :param values: values to average
+    :type values: numpy.ndarray
+    :param com: center of mass, ``(span - 1) / 2`` for a span, ``window`` for a SMMA
+    :type com: float
+    :param adjust: adjusted weights (EMA) or recursive smoothing (SMMA) (default is True)
+    :type adjust: bool
+    """
+    values = np.asarray(values, dtype=float)
+    if _ewmMeanCompiled is not None:
+        return _ewmMeanCompiled(values, float(com), adjust)
+    if len(values) < 32:
+        # Few candles (streaming), cheaper than building a series
+        return _ewmMeanLoop(values, com, adjust)
+    return pd.Series(values).ewm(com=com, adjust=adjust).mean().to_numpy()
+
+##
+## Rolling mean and standard deviation
+##
+
+def _rollingMeanStdLoop(values: np.ndarray, size: int) -> tuple:
+    means = np.full(len(values), np.nan)
+    stds = np.full(len(values), np.nan)
+    if len(values) == 0:
+        return means, stds
+    # Values are shifted by the first one to keep the sum of squares accurate
+    shift = values[0]
+    total, squares = 0.0, 0.0
+    for i in range(len(values)):
+        x = values[i] - shift
+        total += x
+        squares += x * x
+        if i >= size:
+            old = values[i - size] - shift
+            total -= old
+            squares -= old * old
+        if i >= size - 1:
+            means[i] = total / size + shift
+            if size > 1:
+                variance = (squares - total * total / size) / (size - 1)
+                stds[i] = math.sqrt(variance) if variance > 0 else 0.0
+    return means, stds
+
+_rollingMeanStdCompiled = _compiled(_rollingMeanStdLoop)
+
+def rollingMeanStd(values: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the rolling means and standard deviations of `values`, like
+    ``pandas.Series.rolling(window=size)`` (NaN while the window is not full).
+
+    :param values: values without NaN
+    :type values: numpy.ndarray
+    :param size: size of the rolling window
+    :type size: int
+    :returns: (means, standard deviations)
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    values = np.asarray(values, dtype=float)
+    if _rollingMeanStdCompiled is not None:
+        return _rollingMeanStdCompiled(values, size)
+    rolling = pd.Series(values).rolling(window=size)
+    return rolling.mean().to_numpy(), rolling.std().to_numpy()
+
+##
+## Crossover detection
+##
+
+def _alternatingSignalsLoop(buys: np.ndarray, sells: np.ndarray, buyFirst: bool) -> tuple:
+    indexes = np.empty(len(buys), dtype=np.int64)
+    sides = np.empty(len(buys), dtype=np.int8)
+    count = 0
+    buying = buyFirst
+    for i in range(len(buys)):
+        if (buying and buys[i]) or (not buying and sells[i]):
+            indexes[count] = i
+            sides[count] = 1 if buying else -1
+            count += 1
+            buying = not buying
+    return indexes[:count], sides[:count]
+
+def _alternatingSignalsNumpy(buys: np.ndarray, sells: np.ndarray, buyFirst: bool) -> tuple:
+    # Signals are the first candle of each run of the same side, skipping a first run on the wrong side
+    signs = np.where(buys, 1, np.where(sells, -1, 0)).astype(np.int8)
+    candidates = np.flatnonzero(signs)
+    if len(candidates) == 0:
+        return candidates.astype(np.int64), signs[:0]
+    runStarts = np.concatenate([[True], signs[candidates[1:]] != signs[candidates[:-1]]])
+    indexes = candidates[runStarts]
+    if signs[indexes[0]] != (1 if buyFirst else -1):
+        indexes = indexes[1:]
+    return indexes.astype(np.int64), signs[indexes]
+
+_alternatingSignalsCompiled = _compiled(_alternatingSignalsLoop)
+
+def alternatingSignals(buys: np.ndarray, sells: np.ndarray, buyFirst: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the candles where a position alternating between buying and selling changes: the first
+    buy signal while waiting to buy, then the first sell signal while waiting to sell, and so on.
+
+    :param buys: one boolean per candle, True where a buy would be placed (EMA5 above EMA40, ...)
+    :type buys: numpy.ndarray
+    :param sells: one boolean per candle, True where a sell would be placed, never True with `buys`
+    :type sells: numpy.ndarray
+    :param buyFirst: True if the first signal must be a buy, False for a sell (default is True)
+    :type buyFirst: bool
+    :returns: (indexes of the candles, 1 for a buy and -1 for a sell)
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    buys, sells = np.asarray(buys, dtype=np.bool_), np.asarray(sells, dtype=np.bool_)
+    if _alternatingSignalsCompiled is not None:
+        return _alternatingSignalsCompiled(buys, sells, buyFirst)
+    return _alternatingSignalsNumpy(buys, sells, buyFirst)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+##
+## GBMultiAssetEngine.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+class GBMultiAssetEngine:
+    """Runs the decision makers of several pairs in a single process, fed by a single websocket.
+
+    Each pair has its own queue of work (trades, balance refreshes, ...). The work of a pair is run
+    in order by at most one thread at a time, so a decision maker is never used concurrently, while
+    different pairs run concurrently on a thread pool: a pair waiting for Kraken doesn't hold the others.
+    """
+
+    @classmethod
+    def create(cls, initials: list[str], decisionMaker: Callable, maxWorkers: int = None):
+        """Constructs the engine, building the decision makers of every pair concurrently
+        (each one loads the data of the day before).
+
+        :param initials: initials of the pairs
+        :type initials: list[str]
+        :param decisionMaker: builds the decision maker of a pair from its initial
+        :type decisionMaker: Callable
+        :param maxWorkers: maximum number of pairs run at the same time (default is one per pair)
+        :type maxWorkers: int
+        """
+        engine = cls(maxWorkers=maxWorkers if maxWorkers else max(len(initials), 1))
+        for initial, maker in zip(initials, engine.executor.map(decisionMaker, initials)):
+            engine.add(initial, maker)
+        return engine
+
+    def __init__(self, decisionMakers: dict = None, maxWorkers: int = None):
+        """Constructs the engine with the given decision makers by pair initial.
+
+        :param decisionMakers: decision maker of each pair, see :func:`add` (default is None)
+        :type decisionMakers: dict
+        :param maxWorkers: maximum number of pairs run at the same time (default is the ThreadPoolExecutor default)
+        :type maxWorkers: int
+        """
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="GreedyBoyPair")
+        self.decisionMakers = dict()
+        self.pending = dict()
+        self.running = set()
+        self.condition = threading.Condition()
+        for initial, decisionMaker in (decisionMakers or dict()).items():
+            self.add(initial, decisionMaker)
+
+    @property
+    def initials(self) -> list[str]:
+        """Initials of the pairs run by the engine."""
+        return list(self.decisionMakers)
+
+    def add(self, initial: str, decisionMaker):
+        """Adds a pair.
+
+        :param initial: initial of the pair ('ETH', ...)
+        :type initial: str
+        :param decisionMaker: decision maker of the pair, with an `addData(epoch, price, volume, side)` method
+        :type decisionMaker: GreedyBoyDecisionMaker
+        """
+        with self.condition:
+            self.decisionMakers[initial] = decisionMaker
+            self.pending[initial] = deque()
+
+    def __contains__(self, initial: str) -> bool:
+        return initial in self.decisionMakers
+
+    def __getitem__(self, initial: str):
+        return self.decisionMakers[initial]
+
+    def dispatch(self, initial: str, trades: list[tuple]):
+        """Queues trades of a pair, returns without waiting for them to be processed.
+
+        :param initial: initial of the pair
+        :type initial: str
+        :param trades: trades (epoch, price, volume, side) in the order they were received
+        :type trades: list[tuple]
+        """
+        decisionMaker = self.decisionMakers[initial]
+        self.submit(initial, lambda: [decisionMaker.addData(*trade) for trade in trades])
+
+    def submit(self, initial: str, function: Callable, *args):
+        """Queues `function(*args)` after the work already queued for a pair.
+
+        :param initial: initial of the pair
+        :type initial: str
+        :param function: work to run, like a method of the decision maker of the pair
+        :type function: Callable
+        """
+        with self.condition:
+            self.pending[initial].append((function, args))
+            if initial in self.running:
+                return
+            self.running.add(initial)
+        self.executor.submit(self.__run, initial)
+
+    def __run(self, initial: str):
+        """Runs the queued work of a pair until its queue is empty."""
+        while True:
+            with self.condition:
+                if not self.pending[initial]:
+                    self.running.discard(initial)
+                    self.condition.notify_all()
+                    return
+                function, args = self.pending[initial].popleft()
+            try:
+                function(*args)
+            except Exception:
+                # A failing pair doesn't stop the others
+                print("Error on " + initial + ":")
+                traceback.print_exc()
+
+    def join(self, timeout: float = None) -> bool:
+        """Waits until the queued work of every pair is done.
+
+        :param timeout: maximum waiting time in seconds (default is None, no limit)
+        :type timeout: float
+        :returns: False if the timeout expired first
+        :rtype: bool
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.running, timeout)
+
+    def close(self):
+        """Waits for the queued work and stops the threads."""
+        self.join()
+        self.executor.shutdown()
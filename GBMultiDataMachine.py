@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+##
+## GBMultiDataMachine.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+import pandas.core.generic as gen
+import numpy as np
+import pandas as pd
+
+from GBDataMachine import GBDataMachine
+from GBTickBuffer import GBTickBuffer
+
+class GBMultiDataMachine:
+    """Builds candles of several intervals from a single tick stream.
+
+    Ticks only go into the data machine of the smallest interval, the other intervals are
+    rolled up from its candles with :func:`GBDataMachine.appendCandle`, giving the same
+    candles as appending the ticks to each of them. Closed candles are rolled up as soon as
+    they close, the candle still open only when an interval is read with :func:`timeframe`,
+    so an interval nobody reads costs nothing between two closes.
+    """
+
+    @classmethod
+    def fromFilename(cls, fileName: str, intervals: list[int] = (15,), movingAverageSize: int = 30,
+                     streaming: bool = True, retention: int = None, lateness: float = None):
+        """Constructor starting from a filename.
+
+        :param fileName: Name of the file containing the data.
+        :type fileName: str
+        :param intervals: Time gaps of the candles (in min), each one a multiple of the smallest. (default is [15])
+        :type intervals: list[int]
+        :param movingAverageSize: Number of data taken into account to calculate a moving average. (default is 30)
+        :type movingAverageSize: int
+        :param streaming: Updates indicators incrementally on each :func:`append`. (default is True)
+        :type streaming: bool
+        :param retention: Number of candles kept in memory by each interval. (default is None, everything is kept in memory)
+        :type retention: int
+        :param lateness: Seconds a tick can arrive late, see :class:`GBTickBuffer`. (default is None, ticks are used as they arrive)
+        :type lateness: float
+        """
+        csvData = pd.read_csv(fileName, parse_dates=True)
+        return cls(csvData, intervals, movingAverageSize, streaming, retention, lateness)
+
+    def __init__(self, data: gen.NDFrame = None, intervals: list[int] = (15,), movingAverageSize: int = 30,
+                 streaming: bool = True, retention: int = None, lateness: float = None):
+        """Constructs GBMultiDataMachine with the given data formatted like a csv [epochTime, price].
+
+        :param data: Structure containing prices and dates.
+        :type data: gen.NDFrame
+        :param intervals: Time gaps of the candles (in min), each one a multiple of the smallest. (default is [15])
+        :type intervals: list[int]
+        :param movingAverageSize: Number of data taken into account to calculate a moving average. (default is 30)
+        :type movingAverageSize: int
+        :param streaming: Updates indicators incrementally on each :func:`append`. (default is True)
+        :type streaming: bool
+        :param retention: Number of candles kept in memory by each interval. (default is None, everything is kept in memory)
+        :type retention: int
+        :param lateness: Seconds a tick can arrive late, ticks are reordered and deduplicated by the
+            smallest interval before being rolled up, see :class:`GBTickBuffer`. (default is None, ticks are used as they arrive)
+        :type lateness: float
+        :exception: AssertionError if an interval is not a multiple of the smallest one
+        """
+        self.intervals = sorted(set(intervals))
+        assert len(self.intervals) != 0, "At least one interval is needed"
+        assert all(interval % self.intervals[0] == 0 for interval in self.intervals), \
+            "Every interval must be a multiple of the smallest one"
+        self.machines = {interval: GBDataMachine(interval=interval, movingAverageSize=movingAverageSize,
+                                                 streaming=streaming, retention=retention)
+                         for interval in self.intervals}
+        self.base = self.machines[self.intervals[0]]
+        if lateness is not None:
+            self.base.tickBuffer = GBTickBuffer(lateness)
+        # Date of the last closed base candle rolled up into the other intervals
+        self.rolledDate = 0
+        # Intervals whose open candle doesn't include the last ticks yet
+        self.staleIntervals = set()
+        if data is not None:
+            self.appendDataframe(data)
+
+    def timeframe(self, interval: int) -> GBDataMachine:
+        """Returns the data machine building the candles of `interval` minutes.
+
+        :param interval: time gap of the candles (in min)
+        :type interval: int
+        """
+        machine = self.machines[interval]
+        if interval in self.staleIntervals:
+            self.staleIntervals.discard(interval)
+            if self.base.newRound['Date'] != 0:
+                self.__appendCandle(machine, self.base.newRound, closed=False)
+        return machine
+
+    @staticmethod
+    def __appendCandle(machine: GBDataMachine, candle: dict, closed: bool = True):
+        machine.appendCandle(candle['Date'], candle['Open'], candle['High'], candle['Low'], candle['Close'], closed,
+                             volume=candle['Volume'], vwap=candle['VWAP'], trades=candle['Trades'],
+                             buyVolume=candle['BuyVolume'], sellVolume=candle['SellVolume'])
+
+    def __closedCandles(self) -> dict:
+        """Returns the base candles closed since the last roll-up."""
+        store = self.base.store
+        if len(store) < 2 or store.last('Date', 2) <= self.rolledDate:
+            return dict()
+        dates = store.column('Date')[:-1]
+        first = int(np.searchsorted(dates, self.rolledDate, side='right'))
+        self.rolledDate = float(dates[-1])
+        return {column: store.column(column)[first:-1].copy() for column in GBDataMachine.CANDLE_COLUMNS}
+
+    def append(self, epochTime: float, price: float, shouldPrint: bool = False, volume: float = 0.0, side: str = None):
+        """Appends new (epochTime, price) into every interval.
+
+        :param epochTime: timestamp of the price
+        :type epochTime: float
+        :param price: price
+        :type price: float
+        :param volume: traded volume (default is 0)
+        :type volume: float
+        :param side: 'b' for a buy order, 's' for a sell order (default is None)
+        :type side: str
+        """
+        self.base.append(epochTime, price, shouldPrint, volume, side)
+        closed = self.__closedCandles()
+        for interval in self.intervals[1:]:
+            for i in range(len(closed.get('Date', []))):
+                self.__appendCandle(self.machines[interval], {column: values[i] for column, values in closed.items()})
+            self.staleIntervals.add(interval)
+
+    def appendDataframe(self, dataFrame: pd.DataFrame):
+        """Appends a dataframe of (epoch, price) into every interval, candles are built in one pass.
+
+        :param dataFrame: dataframe containing the dates and prices
+        :type dataFrame: pandas.DataFrame
+        """
+        self.base.appendDataframe(dataFrame)
+        closed = self.__closedCandles()
+        for interval in self.intervals[1:]:
+            if closed:
+                self.machines[interval].appendCandles(closed)
+            self.staleIntervals.add(interval)
+
+    def appendFilename(self, fileName: str):
+        """Appends a file into every interval.
+
+        :param fileName: name of the file
+        :type fileName: str
+        """
+        csvData = pd.read_csv(fileName, parse_dates=True)
+        return self.appendDataframe(csvData)
+
+    def memoryUsage(self) -> int:
+        """Returns memory usage of every interval
+
+        :returns: memory usage
+        :rtype: int
+        """
+        return sum(machine.memoryUsage() for machine in self.machines.values())
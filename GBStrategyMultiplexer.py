@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+##
+## GBStrategyMultiplexer.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+from typing import Callable, Union
+
+import pandas as pd
+import pandas.core.generic as gen
+
+from GBConstants import GBConstants
+from GBDataMachine import GBDataMachine
+from IGreedyBoyDecisionMaker_module import IGreedyBoyDecisionMaker
+from IGreedyBoyStrategy_module import IGreedyBoyStrategy
+
+class GBVirtualDecisionMaker(IGreedyBoyDecisionMaker):
+    """Decision maker placing the orders of a strategy on a virtual balance, with the fees of the
+    test mode of :class:`GreedyBoyDecisionMaker`. The candles and indicators are read from a data
+    machine shared with other strategies.
+    """
+
+    # IGreedBoyDecisionMaker Implementation
+    @property
+    def buyOrSellPosition(self) -> Union[str, None]:
+        return self._buyOrSellPosition
+
+    @buyOrSellPosition.setter
+    def buyOrSellPosition(self, value: str):
+        assert value in ("buy", "sell"),\
+            "buyOrSellPosition must be 'buy' or 'sell'"
+        self._buyOrSellPosition = value
+
+    @property
+    def ordered(self) -> Union[pd.DataFrame, gen.NDFrame]:
+        return self.dataMachine.ordered
+
+    @property
+    def bollingerGaps(self) -> Union[pd.DataFrame, gen.NDFrame]:
+        return self.dataMachine.bollingerGaps
+
+    def candle(self, offset: int = 1, indicators: list[str] = ()) -> Union[dict, None]:
+        return self.dataMachine.candle(offset, indicators)
+
+    def isIntervalClosed(self) -> bool:
+        return self.dataMachine.intervalClosed()
+
+    def AddOrderMax(self, buyOrSell: str):
+        """Adds an order of the whole balance.
+
+        :param buyOrSell: "buy" or "sell"
+        :type buyOrSell: str
+        """
+        assert buyOrSell in ("buy", "sell"), "buyOrSell must be 'buy' or 'sell'"
+        price = self.dataMachine.lastPrice()
+        amount = self.fiatBalance / price if buyOrSell == "buy" else self.cryptoBalance
+        self.AddOrder(buyOrSell, amount, price)
+
+    def __init__(self, dataMachine: GBDataMachine, cryptoBalance: float = 0.0,
+                 fiatBalance: float = GBConstants.FIAT_BALANCE_CHECK, buySellLimit: float = 0):
+        """Constructs a virtual decision maker reading `dataMachine`.
+
+        :param dataMachine: data machine shared by the strategies
+        :type dataMachine: GBDataMachine
+        :param cryptoBalance: initial crypto balance (default is 0)
+        :type cryptoBalance: float
+        :param fiatBalance: initial fiat balance (default is GBConstants.FIAT_BALANCE_CHECK)
+        :type fiatBalance: float
+        :param buySellLimit: maximum fiat value of an order, 0 if there is no limit (default is 0)
+        :type buySellLimit: float
+        """
+        self.dataMachine = dataMachine
+        self.cryptoBalance, self.fiatBalance = cryptoBalance, fiatBalance
+        self.buySellLimit = buySellLimit
+        self.lastOrder = None
+        self.orders = []
+        self._buyOrSellPosition = None
+        self.__setBuyOrSellPosition()
+
+    def __setBuyOrSellPosition(self):
+        price = self.dataMachine.lastPrice()
+        if price:
+            self.buyOrSellPosition = "buy" if self.fiatBalance > self.cryptoBalance * price else "sell"
+        else:
+            self.buyOrSellPosition = "buy" if self.fiatBalance >= 10 else "sell"
+
+    def AddOrder(self, buyOrSell: str, amount: float, price: float = None):
+        """Adds an order to the virtual balance and to the order log.
+
+        :param buyOrSell: "buy" or "sell"
+        :type buyOrSell: str
+        :param amount: amount of crypto
+        :type amount: float
+        :param price: price of the order, the last price if None (default is None)
+        :type price: float
+        """
+        assert buyOrSell in ("buy", "sell"), "buyOrSell must be 'buy' or 'sell'"
+        if not price:
+            price = self.dataMachine.lastPrice()
+        if self.buySellLimit != 0:
+            amount = min(amount, self.buySellLimit / price)
+
+        if buyOrSell == "buy":
+            amount = min(amount, self.fiatBalance / price * 0.99975)
+            self.cryptoBalance += amount * (0.9975)
+            self.fiatBalance -= amount * price
+        else:
+            amount = min(amount, self.cryptoBalance * 0.99975)
+            self.cryptoBalance -= amount
+            self.fiatBalance += amount * price * (0.9975)
+        self.lastOrder = {'Date': self.dataMachine.lastEpoch, 'Price': price, 'Amount': amount, 'Order': buyOrSell}
+        self.orders.append(self.lastOrder)
+        self.__setBuyOrSellPosition()
+
+    def value(self, price: float = None) -> float:
+        """Returns the value of the balance in fiat.
+
+        :param price: price of the crypto, the last price if None (default is None)
+        :type price: float
+        :rtype: float
+        """
+        price = price if price else self.dataMachine.lastPrice()
+        return self.fiatBalance + self.cryptoBalance * (price if price else 0.0)
+
+class GBStrategyMultiplexer:
+    """Runs several strategies on the updates of a single data machine, each one on its own virtual
+    balance (see :class:`GBVirtualDecisionMaker`) with its own order log.
+
+    Strategies are subscribed to the data machine, so the candles are built once and an indicator
+    read by several strategies is computed once: a shadow strategy only costs its decisions.
+    """
+
+    def __init__(self, dataMachine: GBDataMachine):
+        """Constructs a multiplexer over `dataMachine`.
+
+        :param dataMachine: data machine whose updates are given to the strategies
+        :type dataMachine: GBDataMachine
+        """
+        self.dataMachine = dataMachine
+        self.strategies = dict()
+        self.decisionMakers = dict()
+
+    def add(self, name: str, strategy: Callable[[IGreedyBoyDecisionMaker], IGreedyBoyStrategy],
+            cryptoBalance: float = 0.0, fiatBalance: float = GBConstants.FIAT_BALANCE_CHECK,
+            buySellLimit: float = 0) -> IGreedyBoyStrategy:
+        """Adds a strategy notified from the next update on.
+
+        :param name: name of the strategy in the results
+        :type name: str
+        :param strategy: builds the strategy from its decision maker, a strategy class or a function
+            like ``lambda decisionMaker: EMACrossover(decisionMaker, 9, 21)``
+        :type strategy: Callable
+        :param cryptoBalance: initial crypto balance (default is 0)
+        :type cryptoBalance: float
+        :param fiatBalance: initial fiat balance (default is GBConstants.FIAT_BALANCE_CHECK)
+        :type fiatBalance: float
+        :param buySellLimit: maximum fiat value of an order, 0 if there is no limit (default is 0)
+        :type buySellLimit: float
+        :returns: the strategy
+        :rtype: IGreedyBoyStrategy
+        :exception: AssertionError if a strategy already has this name
+        """
+        assert name not in self.strategies, "A strategy named " + name + " already exists"
+        decisionMaker = GBVirtualDecisionMaker(self.dataMachine, cryptoBalance, fiatBalance, buySellLimit)
+        self.decisionMakers[name] = decisionMaker
+        self.strategies[name] = strategy(decisionMaker)
+        self.dataMachine.subscribe(self.strategies[name])
+        return self.strategies[name]
+
+    def remove(self, name: str):
+        """Stops notifying a strategy, its balance and orders are forgotten.
+
+        :param name: name given to :func:`add`
+        :type name: str
+        """
+        self.dataMachine.unsubscribe(self.strategies.pop(name))
+        del self.decisionMakers[name]
+
+    def orders(self, name: str) -> pd.DataFrame:
+        """Returns the orders of a strategy.
+
+        :param name: name given to :func:`add`
+        :type name: str
+        :returns: one row per order ('Date', 'Price', 'Amount', 'Order')
+        :rtype: pandas.DataFrame
+        """
+        return pd.DataFrame(self.decisionMakers[name].orders, columns=['Date', 'Price', 'Amount', 'Order'])
+
+    def results(self) -> pd.DataFrame:
+        """Returns the balance of every strategy at the last price.
+
+        :returns: one row per strategy ('Name', 'Crypto', 'Fiat', 'Value', 'Orders')
+        :rtype: pandas.DataFrame
+        """
+        return pd.DataFrame([{
+            'Name': name,
+            'Crypto': decisionMaker.cryptoBalance,
+            'Fiat': decisionMaker.fiatBalance,
+            'Value': decisionMaker.value(),
+            'Orders': len(decisionMaker.orders)
+        } for name, decisionMaker in self.decisionMakers.items()], columns=['Name', 'Crypto', 'Fiat', 'Value', 'Orders'])
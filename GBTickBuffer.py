@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+##
+## GBTickBuffer.py
+##
+
+__author__      = "Kevin Pruvost"
+__copyright__   = "Copyright 2021, GreedyBoy"
+__credits__     = ["Kevin Pruvost", "Hugo Mathieu-Steinbach"]
+__license__     = "Proprietary"
+__version__     = "1.0.0"
+__maintainer__  = "Kevin Pruvost"
+__email__       = "pruvostkevin0@gmail.com"
+__status__      = "Test"
+
+import heapq
+import math
+import numpy as np
+import pandas as pd
+
+class GBTickBuffer:
+    """Reorders the ticks and drops the duplicates before they are aggregated into candles.
+
+    A tick is held until the highest epoch received goes `lateness` seconds past it (the watermark),
+    ticks are then released in epoch order, ticks of the same epoch in the order they were received.
+    A tick arriving once the watermark went past it is dropped, as well as a tick equal on
+    (epoch, price, volume) to one already received, like the trades given again by a websocket
+    reconnection or a REST backfill overlapping the recorded ticks. Candles then only depend on
+    the ticks received, not on their arrival order (except between ticks of the same epoch, kept
+    in the order the exchange sent them).
+    """
+
+    def __init__(self, lateness: float = 0.0):
+        """Constructs an empty buffer.
+
+        :param lateness: Seconds a tick can arrive after a more recent one. (default is 0, ticks are
+            released at once and late ones are dropped)
+        :type lateness: float
+        """
+        self.lateness = float(lateness)
+        # Ticks held back: (epoch, arrival, price, volume, side)
+        self.heap = []
+        self.arrivals = 0
+        self.pendingKeys = set()
+        self.highestEpoch = -math.inf
+        # Epoch of the last tick released, with the keys of the ticks released at this epoch
+        self.releasedEpoch = -math.inf
+        self.releasedKeys = set()
+        self.duplicates = 0
+        self.lateTicks = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    @property
+    def watermark(self) -> float:
+        """Epoch up to which ticks are released."""
+        return self.highestEpoch - self.lateness
+
+    def push(self, epochTime: float, price: float, volume: float = 0.0, side: str = None) -> list[tuple]:
+        """Adds a tick and returns the ticks released by it.
+
+        :param epochTime: timestamp of the tick
+        :type epochTime: float
+        :param price: price
+        :type price: float
+        :param volume: traded volume (default is 0)
+        :type volume: float
+        :param side: 'b' for a buy order, 's' for a sell order (default is None)
+        :type side: str
+        :returns: the released ticks (epoch, price, volume, side), in epoch order
+        :rtype: list[tuple]
+        """
+        key = (epochTime, price, volume)
+        if epochTime < self.releasedEpoch:
+            self.lateTicks += 1
+            return []
+        if key in self.pendingKeys or (epochTime == self.releasedEpoch and key in self.releasedKeys):
+            self.duplicates += 1
+            return []
+        heapq.heappush(self.heap, (epochTime, self.arrivals, price, volume, side))
+        self.arrivals += 1
+        self.pendingKeys.add(key)
+        self.highestEpoch = max(self.highestEpoch, epochTime)
+        return self.__release(self.watermark)
+
+    def flush(self) -> list[tuple]:
+        """Releases every tick held back, at the end of a session.
+
+        :returns: the released ticks (epoch, price, volume, side), in epoch order
+        :rtype: list[tuple]
+        """
+        return self.__release(math.inf)
+
+    def __release(self, watermark: float) -> list[tuple]:
+        released = []
+        while self.heap and self.heap[0][0] <= watermark:
+            epochTime, _, price, volume, side = heapq.heappop(self.heap)
+            key = (epochTime, price, volume)
+            self.pendingKeys.discard(key)
+            if epochTime != self.releasedEpoch:
+                self.releasedEpoch, self.releasedKeys = epochTime, set()
+            self.releasedKeys.add(key)
+            released.append((epochTime, price, volume, side))
+        return released
+
+    def pushMany(self, epochs: np.ndarray, prices: np.ndarray, volumes: np.ndarray, sides: np.ndarray = None) -> tuple:
+        """Vectorized :func:`push`, gives the same ticks and state as pushing the ticks one by one.
+
+        The watermark goes up through the batch in arrival order: a tick is late if a tick of a more recent
+        epoch was released before it arrived, the duplicates are then the ticks of a key already kept.
+
+        :param epochs: timestamps of the ticks
+        :type epochs: numpy.ndarray
+        :param prices: prices of the ticks
+        :type prices: numpy.ndarray
+        :param volumes: traded volumes of the ticks
+        :type volumes: numpy.ndarray
+        :param sides: sides of the ticks (default is None)
+        :type sides: numpy.ndarray
+        :returns: the released (epochs, prices, volumes, sides), in epoch order, sides are '' when unknown
+        :rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        """
+        ticks = pd.DataFrame({
+            'epoch': np.asarray(epochs, dtype=float),
+            'price': np.asarray(prices, dtype=float),
+            'volume': np.asarray(volumes, dtype=float),
+            'side': np.asarray(sides, dtype=object) if sides is not None else None
+        })
+        epochs = ticks['epoch'].to_numpy()
+        count = len(epochs)
+
+        # Watermark once each tick is pushed, late and duplicated ticks never raise it
+        highestEpochs = np.maximum.accumulate(np.maximum(epochs, self.highestEpoch))
+        watermarks = highestEpochs - self.lateness
+        # A tick kept is released by its own push or by the first one taking the watermark past it,
+        # the ticks held back by the first one doing so
+        heldEpochs = np.array([tick[0] for tick in self.heap], dtype=float)
+        releaseSteps = np.maximum(np.arange(count), np.searchsorted(watermarks, epochs, side='left'))
+        heldReleaseSteps = np.searchsorted(watermarks, heldEpochs, side='left')
+        # Epoch of the last tick released before each push, late and duplicated ticks never go past it
+        releasedEpochs = np.full(count + 2, -np.inf)
+        releasedEpochs[0] = self.releasedEpoch
+        np.maximum.at(releasedEpochs, releaseSteps + 1, epochs)
+        np.maximum.at(releasedEpochs, heldReleaseSteps + 1, heldEpochs)
+        releasedEpochs = np.maximum.accumulate(releasedEpochs)[:count]
+
+        late = epochs < releasedEpochs
+        self.lateTicks += int(late.sum())
+        ticks = ticks[~late]
+        # A tick on time of a key already kept is a duplicate: either still held back, or released at its epoch
+        duplicated = ticks.duplicated(['epoch', 'price', 'volume']).to_numpy()
+        epochs = ticks['epoch'].to_numpy()
+        known = (epochs == self.releasedEpoch) | np.isin(epochs, [key[0] for key in self.pendingKeys])
+        for row in np.flatnonzero(known & ~duplicated):
+            key = (ticks['epoch'].iat[row], ticks['price'].iat[row], ticks['volume'].iat[row])
+            if key in self.pendingKeys or (key[0] == self.releasedEpoch and key in self.releasedKeys):
+                duplicated[row] = True
+        self.duplicates += int(duplicated.sum())
+        ticks = ticks[~duplicated].assign(arrival=np.arange(self.arrivals, self.arrivals + int((~duplicated).sum())))
+        self.arrivals += len(ticks.index)
+        if count != 0:
+            self.highestEpoch = float(highestEpochs[-1])
+
+        # Ticks held back are merged with the new ones, then everything under the watermark is released
+        if self.heap:
+            held = pd.DataFrame(self.heap, columns=['epoch', 'arrival', 'price', 'volume', 'side'])
+            ticks = pd.concat([held, ticks], ignore_index=True)
+        ticks = ticks.iloc[np.lexsort((ticks['arrival'].to_numpy(), ticks['epoch'].to_numpy()))]
+        releasedCount = int(np.searchsorted(ticks['epoch'].to_numpy(), self.watermark, side='right'))
+        released, kept = ticks.iloc[:releasedCount], ticks.iloc[releasedCount:]
+        self.heap = list(kept[['epoch', 'arrival', 'price', 'volume', 'side']].itertuples(index=False, name=None))
+        heapq.heapify(self.heap)
+        self.pendingKeys = set(kept[['epoch', 'price', 'volume']].itertuples(index=False, name=None))
+        if releasedCount != 0:
+            lastEpoch = released['epoch'].iat[-1]
+            if lastEpoch != self.releasedEpoch:
+                self.releasedEpoch, self.releasedKeys = lastEpoch, set()
+            last = released[released['epoch'] == lastEpoch]
+            self.releasedKeys.update(last[['epoch', 'price', 'volume']].itertuples(index=False, name=None))
+        return released['epoch'].to_numpy(), released['price'].to_numpy(), released['volume'].to_numpy(), \
+            released['side'].fillna('').to_numpy(dtype=str)
+
+    def getState(self) -> dict:
+        """Returns the held ticks and the deduplication state, for a snapshot.
+
+        :rtype: dict
+        """
+        return {
+            'lateness': self.lateness,
+            'heap': [list(tick) for tick in self.heap],
+            'arrivals': self.arrivals,
+            'highestEpoch': self.highestEpoch,
+            'releasedEpoch': self.releasedEpoch,
+            'releasedKeys': [list(key) for key in self.releasedKeys],
+            'duplicates': self.duplicates,
+            'lateTicks': self.lateTicks
+        }
+
+    def setState(self, state: dict):
+        """Restores a state returned by :func:`getState`.
+
+        :param state: the state
+        :type state: dict
+        """
+        self.lateness = state['lateness']
+        self.heap = [tuple(tick) for tick in state['heap']]
+        heapq.heapify(self.heap)
+        self.pendingKeys = set((tick[0], tick[2], tick[3]) for tick in self.heap)
+        self.arrivals = state['arrivals']
+        self.highestEpoch, self.releasedEpoch = state['highestEpoch'], state['releasedEpoch']
+        self.releasedKeys = set(tuple(key) for key in state['releasedKeys'])
+        self.duplicates, self.lateTicks = state['duplicates'], state['lateTicks']
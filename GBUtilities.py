@@ -1,10 +1,16 @@
+import numpy as np
 import pandas as pd
 from GBConstants import GBConstants
+import GBKernels
 
 class GBUtilities:
     """
     A class that contains utility functions for GreedyBoy.
     """
+    VOLUME_COLUMNS = ['Volume', 'VWAP', 'Trades', 'BuyVolume', 'SellVolume']
+    """
+    The columns added to the candles built with volumes.
+    """
     @staticmethod
     def getMaxFiatBalance(fiatBalance: float, testTime: float = None) -> float:
         """
@@ -60,4 +66,78 @@ class GBUtilities:
 
         # Exclude empty or all-NA columns before concatenation
         new_row_df = new_row_df.dropna(how='all', axis=1)
-        return new_row_df
\ No newline at end of file
+        return new_row_df
+    @staticmethod
+    def ticksToCandles(epochs: np.ndarray, prices: np.ndarray, interval: int, openDate: float = 0,
+                       volumes: np.ndarray = None, sides: np.ndarray = None) -> dict:
+        """
+        Aggregates ticks into candles in one pass, giving the same candles as appending the ticks one by one.
+        A tick opens a new candle when its epoch reaches the end of the current candle, so each tick
+        belongs to the bucket of the highest epoch seen so far (late ticks stay in the open candle).
+        :param epochs: The epoch times of the ticks, in seconds.
+        :param prices: The prices of the ticks.
+        :param interval: The candle size, in minutes.
+        :param openDate: The date of the candle currently open, 0 if there is none.
+        :param volumes: The volumes of the ticks, adds the volume columns to the candles if given.
+        :param sides: The sides of the ticks ('b' for buy, 's' for sell), used with `volumes`.
+        :return: A dict of arrays ('Date', 'Open', 'High', 'Low', 'Close' and, with `volumes`,
+            'Volume', 'VWAP', 'Trades', 'BuyVolume', 'SellVolume'), one value per candle.
+        """
+        epochs, prices = np.asarray(epochs, dtype=float), np.asarray(prices, dtype=float)
+        columns = ['Date', 'Open', 'High', 'Low', 'Close'] + (GBUtilities.VOLUME_COLUMNS if volumes is not None else [])
+        if len(epochs) == 0:
+            return {column: np.empty(0) for column in columns}
+        dates, starts = GBKernels.bucketStarts(epochs, interval, openDate)
+        ends = np.concatenate([starts[1:], [len(prices)]])
+        candles = {
+            'Date': dates,
+            'Open': prices[starts],
+            'High': np.maximum.reduceat(prices, starts),
+            'Low': np.minimum.reduceat(prices, starts),
+            'Close': prices[ends - 1]
+        }
+        if volumes is not None:
+            volumes = np.nan_to_num(np.asarray(volumes, dtype=float))
+            sides = np.asarray(sides, dtype=str) if sides is not None else np.full(len(prices), '')
+            candles.update(GBUtilities.__volumeColumns(
+                np.add.reduceat(volumes, starts), np.add.reduceat(volumes * prices, starts), ends - starts,
+                np.add.reduceat(np.where(np.char.startswith(sides, 'b'), volumes, 0.0), starts),
+                np.add.reduceat(np.where(np.char.startswith(sides, 's'), volumes, 0.0), starts)))
+        return candles
+
+    @staticmethod
+    def __volumeColumns(volume: np.ndarray, turnover: np.ndarray, trades: np.ndarray,
+                        buyVolume: np.ndarray, sellVolume: np.ndarray) -> dict:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = np.where(volume > 0, turnover / volume, np.nan)
+        return {'Volume': volume, 'VWAP': vwap, 'Trades': trades.astype(float), 'BuyVolume': buyVolume, 'SellVolume': sellVolume}
+    @staticmethod
+    def rollUpCandles(candles: dict, interval: int) -> dict:
+        """
+        Merges consecutive candles of a smaller interval into candles of `interval` minutes.
+        :param candles: A dict of arrays ('Date', 'Open', 'High', 'Low', 'Close' and optionally the
+            volume columns), dates in increasing order.
+        :param interval: The size of the merged candles, in minutes, a multiple of the size of `candles`.
+        :return: A dict of arrays with the same columns as `candles`, one value per merged candle.
+        """
+        dates = np.asarray(candles['Date'], dtype=float)
+        if len(dates) == 0:
+            return {column: np.empty(0) for column in candles}
+        dates = dates - (dates % (interval * 60))
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(dates)) + 1])
+        ends = np.concatenate([starts[1:], [len(dates)]])
+        merged = {
+            'Date': dates[starts],
+            'Open': np.asarray(candles['Open'], dtype=float)[starts],
+            'High': np.maximum.reduceat(np.asarray(candles['High'], dtype=float), starts),
+            'Low': np.minimum.reduceat(np.asarray(candles['Low'], dtype=float), starts),
+            'Close': np.asarray(candles['Close'], dtype=float)[ends - 1]
+        }
+        if 'Volume' in candles:
+            def sums(column):
+                return np.add.reduceat(np.nan_to_num(np.asarray(candles[column], dtype=float)), starts)
+            volume = np.nan_to_num(np.asarray(candles['Volume'], dtype=float))
+            turnover = np.add.reduceat(np.nan_to_num(np.asarray(candles['VWAP'], dtype=float)) * volume, starts)
+            merged.update(GBUtilities.__volumeColumns(sums('Volume'), turnover, sums('Trades'),
+                                                      sums('BuyVolume'), sums('SellVolume')))
+        return merged
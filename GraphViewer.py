@@ -41,6 +41,8 @@ class GraphViewer:
     :type animateCallback: Function
     :param fullscreen: De/Activates fullscreen mode for Matplotlib.
     :type fullscreen: bool
+    :param dataMachine: Data machine whose views are taken again on each animation loop. (default is None)
+    :type dataMachine: GBDataMachine
 
     Draws in 2 plots, the **bollinger bands**, the **bollinger gaps** and the
     **price chart** of a given cryptocurrency.
@@ -74,8 +76,10 @@ class GraphViewer:
     ani = None
     """Contains the animation callback."""
 
-    def __init__(self, priceData: pandas.DataFrame, bollingerData: pandas.DataFrame, animateCallback = None, fullscreen: bool = True):
+    def __init__(self, priceData: pandas.DataFrame, bollingerData: pandas.DataFrame, animateCallback = None, fullscreen: bool = True,
+                 dataMachine: GBDataMachine = None):
         self.setPricesData(priceData, bollingerData)
+        self.dataMachine = dataMachine
         self.draw = None
 
         s = mplfinance.make_mpf_style(base_mpf_style='mike', rc={'font.size': 12})
@@ -120,6 +124,8 @@ class GraphViewer:
 
         def animate(ival):
             if animateCallback: animateCallback()
+            # Views on the candle store, nothing is copied
+            if self.dataMachine: self.setPricesData(*self.dataMachine.convertForGraphicViews())
             if (20 + ival) > len(self.bollingerData):
                 print('no more data to plot')
                 ani.event_source.interval *= 3
@@ -143,7 +149,7 @@ class GraphViewer:
 
     def setPricesData(self, priceData: pandas.DataFrame, bollingerData: pandas.DataFrame):
         self.priceData, self.bollingerData = priceData, bollingerData
-        self.bollinger_bands = self.priceData[['HBand', 'LBand']]
+        self.bollinger_bands = pandas.DataFrame({'HBand': self.priceData['HBand'], 'LBand': self.priceData['LBand']}, copy=False)
 
     def setReportData(self, reportData: pandas.DataFrame):
         self.reportData = reportData
@@ -8,15 +8,18 @@ import _thread
 import csv
 import time, base64, hashlib, hmac, urllib, json
 import tempfile
-from github import Github
+from GBClients import GBClientFactory
 from GreedyBoyDecisionMaker import GreedyBoyDecisionMaker
 from GBConstants import GBConstants
+from GBMultiAssetEngine import GBMultiAssetEngine
 
 currencyInitials = [
     "ADA", "BCH", "DASH", "DOT", "ETC", "OMG", "NANO", "WAVES", "QTUM",
 	"ETH", "GNO", "KAVA", "KEEP", "LINK", "XBT", "XDG", "XRP", "LTC",
 	"XMR", "UNI"
 ]
+# Pairs traded by a decision maker, any of the recorded currencyInitials
+tradedInitials = currencyInitials[:1]
 
 class GreedyBoy:
     ##
@@ -56,6 +59,7 @@ class GreedyBoy:
         self.dataFiles = dict()
         self.dataWriters = dict()
         for i in range(len(currencyInitials)):
+            fieldnames = GBConstants.TICK_COLUMNS
             try:
                 self.dataFiles[currencyInitials[i]] = None
                 self.dataWriters[currencyInitials[i]] = None
@@ -63,6 +67,7 @@ class GreedyBoy:
                 githubFileContent = githubFile.decoded_content.decode('ascii')
                 empty = not csv.Sniffer().has_header(githubFileContent)
                 if not empty:
+                    fieldnames = githubFileContent.splitlines()[0].split(',')
                     self.dataFile = open(self.dataPaths[i], "w")
                     self.dataFile.write(githubFileContent)
                     self.dataFile.close()
@@ -72,17 +77,24 @@ class GreedyBoy:
                 self.dataFile.write("")
                 self.dataFile.close()
             self.dataFiles[currencyInitials[i]] = open(self.dataPaths[i], "a")
-            self.dataWriters[currencyInitials[i]] = csv.DictWriter(self.dataFiles[currencyInitials[i]], fieldnames=["epoch", "price"], lineterminator="\n")
+            self.dataWriters[currencyInitials[i]] = csv.DictWriter(self.dataFiles[currencyInitials[i]], fieldnames=fieldnames, extrasaction="ignore", lineterminator="\n")
             if empty:
                 self.dataWriters[currencyInitials[i]].writeheader()
-        # Decision Maker
-        self.decisionMaker = GreedyBoyDecisionMaker(
-            self.apiKey, self.apiPrivateKey, self.githubToken, self.repoName,     # Api Key, Api Private Key, Github repo
-            self.branchName, currencyInitials[0], self.dataPaths[0],              # Branch name, trading initial, temp path of today's data
-            self.ordersDataPath, self.githubOrdersPath, self.token                # temp path containing orders, kraken token
-        )
-        self.decisionMaker.setBuySellLimit(10)
-        self.decisionMaker.AddOrder("buy", GBConstants.MAX_TOKEN_ORDER)
+        # Decision Makers, one per traded pair, sharing the Github repo and the Kraken API
+        self.clients.krakenToken = self.token
+        self.krakenApi = self.clients.krakenApi
+        def createDecisionMaker(initial):
+            decisionMaker = GreedyBoyDecisionMaker(
+                self.apiKey, self.apiPrivateKey, self.githubToken, self.repoName,                     # Api Key, Api Private Key, Github repo
+                self.branchName, initial, self.dataPaths[currencyInitials.index(initial)],            # Branch name, trading initial, temp path of today's data
+                self.ordersDataPaths[initial], self.githubOrdersPaths[initial], self.token,           # temp path containing orders, kraken token
+                clients=self.clients
+            )
+            decisionMaker.setBuySellLimit(10)
+            decisionMaker.AddOrder("buy", GBConstants.MAX_TOKEN_ORDER)
+            return decisionMaker
+        self.engine = GBMultiAssetEngine.create(tradedInitials, createDecisionMaker)
+        self.decisionMaker = self.engine[tradedInitials[0]]
         return
         """ self.decisionMakerTimer = time.time()
 
@@ -92,18 +104,15 @@ class GreedyBoy:
             now = time.time()
             if now - self.decisionMakerTimer >= 10: # if 10 seconds passed
                 self.decisionMakerTimer = now
-                self.decisionMaker.getCryptoAndFiatBalance()
+                for initial in self.engine.initials:
+                    self.engine.submit(initial, self.engine[initial].getCryptoAndFiatBalance)
 
             if now >= self.limitTime: self.ws.close()
             j = json.loads(message)
             for initial in currencyInitials:
                 initialEur = initial + "/USD"
                 if isinstance(j, list) and j[-1] == initialEur:
-                    for info in j[1]:
-                        print(initialEur + "[" + time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(float(info[2]))) + "]: " + info[0] + "€")
-                        if initial == self.decisionMaker.initial:
-                            self.decisionMaker.addData(float(info[2]), float(info[0]))
-                        self.dataWriters[initial].writerow({"epoch": str(info[2]), "price": str(info[0])})
+                    self.onTrades(initial, j[1])
 
         def ws_open(ws):
             for initial in currencyInitials:
@@ -114,9 +123,24 @@ class GreedyBoy:
             print("Stopping !!!")
 
         self.ws = websocket.WebSocketApp("wss://ws.kraken.com/", on_open=ws_open, on_message=ws_message, on_close=ws_close)
-        self.decisionMaker.krakenApi.AddOrder("buy", "market", 100)
+        self.krakenApi.AddOrder("buy", "market", 100)
         self.ws.run_forever() """
 
+    def onTrades(self, initial: str, trades: list):
+        """Records the trades of a pair received from the websocket, and queues them to the decision
+        maker of the pair if it is traded, see :func:`GBMultiAssetEngine.dispatch`.
+
+        :param initial: initial of the pair
+        :type initial: str
+        :param trades: Kraken trades [price, volume, time, side, ...] in the order they were received
+        :type trades: list
+        """
+        if self.engine is not None and initial in self.engine: # Processed by the thread of the pair
+            self.engine.dispatch(initial, [(float(info[2]), float(info[0]), float(info[1]), info[3]) for info in trades])
+        for info in trades:
+            print(initial + "/USD[" + time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(float(info[2]))) + "]: " + info[0] + "€")
+            self.dataWriters[initial].writerow({"epoch": str(info[2]), "price": str(info[0]), "volume": str(info[1]), "side": str(info[3])})
+
     ##
     ## GITHUB PART
     ##
@@ -128,7 +152,7 @@ class GreedyBoy:
         timer = time.perf_counter()
 
         def sendToGithub(dataFile, dataPath, githubPath: str):
-            if not dataFile.closed:
+            if dataFile is not None and not dataFile.closed:
                 dataFile.close()
             dataFile = open(dataPath, "r")
             cnt = dataFile.read()
@@ -167,11 +191,20 @@ class GreedyBoy:
                     branch=self.branchName
                 )
 
+        if self.engine is not None:
+            self.engine.close()
         for i, initial in enumerate(currencyInitials):
             sendToGithub(self.dataFiles[initial], self.dataPaths[i], self.githubDataPaths[i])
-        try:
-            sendToGithub(self.dataFiles[currencyInitials[0]], self.ordersDataPath, self.githubOrdersPath)
-        except: 0
+        for initial in tradedInitials:
+            try:
+                sendToGithub(self.dataFiles[initial], self.ordersDataPaths[initial], self.githubOrdersPaths[initial])
+            except: 0
+            # Next day starts from the state of the data machine instead of replaying today's data
+            try:
+                decisionMaker = self.engine[initial]
+                sendToGithub(None, decisionMaker.saveWarmState(),
+                             decisionMaker.warmStateGithubDirectory + os.path.splitext(self.githubDataFilename)[0] + ".json")
+            except: 0
 
         print("Sending files took " + str(time.perf_counter() - timer) + " seconds.")
 
@@ -189,13 +222,14 @@ class GreedyBoy:
         self.githubToken, self.branchName = githubToken, dataBranchName
 
         # For orders history
-        self.ordersDataPath = tempfile.gettempdir() + "/reports" + currencyInitials[0] + ".csv"
-        self.githubOrdersPath = "./reports/" + currencyInitials[0] + "-reports.csv"
+        self.ordersDataPaths = {initial: tempfile.gettempdir() + "/reports" + initial + ".csv" for initial in tradedInitials}
+        self.githubOrdersPaths = {initial: "./reports/" + initial + "-reports.csv" for initial in tradedInitials}
+        self.engine = None
 
-        # Github repo
-        g = Github(githubToken)
+        # Github repo, the Kraken API is built once the token is got
         self.repoName = repoName
-        self.greedyBoyRepo = g.get_repo(repoName)
+        self.clients = GBClientFactory(apiKey, apiPrivateKey, githubToken, repoName)
+        self.greedyBoyRepo = self.clients.greedyBoyRepo
 
         # Start a new thread for the WebSocket interface
         thr = _thread.start_new_thread(self.ws_thread, (limitTime,))
@@ -0,0 +1,94 @@
+###
+### GreedyBoyChecks
+###
+import threading, time, sys
+import numpy as np
+import pandas as pd
+
+from GBBacktester import GBBacktester
+from GBConstants import GBConstants
+from GBDataMachine import GBDataMachine
+from GBMultiAssetEngine import GBMultiAssetEngine
+from GBTickBuffer import GBTickBuffer
+
+# Day checked by default, a full day of ticks (96 candles of 15 minutes)
+dataFile = "price_history/ETH/18-01-2025.csv"
+# Seconds a tick can arrive after the ticks following it in the shuffled replay, more than the lateness
+# so that some ticks are late
+arrivalJitter = 5.0
+
+def shuffleArrivals(data: pd.DataFrame, jitter: float = arrivalJitter, seed: int = 0) -> pd.DataFrame:
+    """Returns the ticks in the order they would arrive if each one was delayed by up to `jitter` seconds."""
+    delays = np.random.default_rng(seed).uniform(0.0, jitter, len(data.index))
+    return data.iloc[np.argsort(data['epoch'].to_numpy() + delays, kind='stable')].reset_index(drop=True)
+
+def getVolumes(data: pd.DataFrame) -> np.ndarray:
+    return data['volume'].to_numpy(dtype=float) if 'volume' in data.columns else np.zeros(len(data.index))
+
+def checkTickBuffer(data: pd.DataFrame, lateness: float = GBConstants.TICK_LATENESS) -> str:
+    """Checks that GBTickBuffer.pushMany releases the same ticks as push, with the same buffer state."""
+    epochs, prices, volumes = data['epoch'].to_numpy(dtype=float), data['price'].to_numpy(dtype=float), getVolumes(data)
+    streamed, pushed = GBTickBuffer(lateness), []
+    for tick in zip(epochs, prices, volumes):
+        pushed += [released[:3] for released in streamed.push(*tick)]
+    bulk = GBTickBuffer(lateness)
+    released = bulk.pushMany(epochs, prices, volumes)
+    assert pushed == list(zip(*released[:3])), "pushMany and push released different ticks"
+    states = [dict(buffer.getState(), heap=sorted(buffer.heap), releasedKeys=sorted(buffer.releasedKeys))
+              for buffer in (streamed, bulk)]
+    assert states[0] == states[1], "pushMany and push left different states"
+    return str(len(pushed)) + " ticks released, " + str(bulk.lateTicks) + " late, " + str(bulk.duplicates) + " duplicates"
+
+def checkIngest(data: pd.DataFrame, lateness: float = GBConstants.TICK_LATENESS) -> str:
+    """Checks that GBDataMachine builds the same candles from ticks loaded at once or appended one by one."""
+    bulk = GBDataMachine(interval=15, lateness=lateness)
+    bulk.appendDataframe(data)
+    streamed = GBDataMachine(interval=15, lateness=lateness)
+    for epochTime, price, volume in zip(data['epoch'].to_numpy(dtype=float), data['price'].to_numpy(dtype=float), getVolumes(data)):
+        streamed.append(epochTime, price, volume=volume)
+    bulkCandles = bulk.history()[GBDataMachine.CANDLE_COLUMNS].to_numpy(dtype=float)
+    streamedCandles = streamed.history()[GBDataMachine.CANDLE_COLUMNS].to_numpy(dtype=float)
+    assert bulkCandles.shape == streamedCandles.shape, "Bulk and streaming ingest built a different number of candles"
+    assert np.allclose(bulkCandles, streamedCandles, equal_nan=True), "Bulk and streaming ingest built different candles"
+    return str(len(bulkCandles)) + " identical candles"
+
+class StubDecisionMaker:
+    """Records the trades given by GBMultiAssetEngine, and whether two threads ever gave them at once."""
+
+    def __init__(self):
+        self.epochs, self.active, self.overlaps = [], 0, 0
+        self.lock = threading.Lock()
+
+    def addData(self, epoch, price, volume=0.0, side=None):
+        with self.lock:
+            self.active += 1
+            self.overlaps += self.active > 1
+        time.sleep(0.001) # Like a request to Kraken, so that other threads run meanwhile
+        self.epochs.append(epoch)
+        with self.lock:
+            self.active -= 1
+
+def checkMultiAssetEngine(initials: list[str] = ("ADA", "ETH", "XDG", "XBT"), batches: int = 25, batchSize: int = 4) -> str:
+    """Checks that GBMultiAssetEngine gives the trades of each pair in order, never from two threads at once."""
+    engine = GBMultiAssetEngine({initial: StubDecisionMaker() for initial in initials})
+    for batch in range(batches):
+        for initial in initials:
+            engine.dispatch(initial, [(float(batch * batchSize + i), 1.0, 0.0, 'b') for i in range(batchSize)])
+    engine.close()
+    for initial in initials:
+        assert engine[initial].epochs == [float(i) for i in range(batches * batchSize)], "Trades of " + initial + " out of order"
+        assert engine[initial].overlaps == 0, "Trades of " + initial + " processed concurrently"
+    return str(len(initials)) + " pairs, " + str(batches * batchSize) + " trades each, in order"
+
+def main(fileName: str = None):
+    fileName = fileName if fileName else dataFile
+    data = GBBacktester.readTicks(fileName)
+    shuffled = shuffleArrivals(data)
+    print("Tick buffer, " + fileName + ": " + checkTickBuffer(data))
+    print("Tick buffer, " + fileName + " shuffled: " + checkTickBuffer(shuffled))
+    print("Ingest, " + fileName + ": " + checkIngest(data))
+    print("Ingest, " + fileName + " shuffled: " + checkIngest(shuffled))
+    print("Multi-asset engine: " + checkMultiAssetEngine())
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
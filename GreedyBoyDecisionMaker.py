@@ -4,7 +4,10 @@
 
 import time
 import tempfile
+import json
+import os
 from typing import Any, Union
+from github import UnknownObjectException
 import pandas as pd
 import pandas.core.generic as gen
 import requests
@@ -12,13 +15,16 @@ import csv
 
 #from pdoc import reset
 
+from GBClients import GBClientFactory
 from GBDataMachine import GBDataMachine
+from GBStrategyMultiplexer import GBStrategyMultiplexer
 from GBUtilities import GBUtilities
 from IGreedyBoyDecisionMaker_module import IGreedyBoyDecisionMaker
 from KrakenApi import KrakenApi
-from github import Github
 from GBConstants import GBConstants
+from TradingStrategies.BollingerStrategy import BollingerStrategy
 from TradingStrategies.EMACrossover import EMACrossover
+from TradingStrategies.ScalpingStrategy import ScalpingStrategy
 
 class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
     # IGreedBoyDecisionMaker Implementation
@@ -40,8 +46,21 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
     def bollingerGaps(self) -> Union[pd.DataFrame, gen.NDFrame]:
         return self.dataMachine.bollingerGaps
 
+    def candle(self, offset: int = 1, indicators: list[str] = ()) -> Union[dict, None]:
+        return self.dataMachine.candle(offset, indicators)
+
     def isIntervalClosed(self) -> bool:
         return self.dataMachine.intervalClosed()
+
+    @property
+    def greedyBoyRepo(self):
+        """Github repository of the data, built on first use by :attr:`clients`."""
+        return self.clients.greedyBoyRepo
+
+    @property
+    def krakenApi(self) -> KrakenApi:
+        """Kraken API, built on first use by :attr:`clients`."""
+        return self.clients.krakenApi
     
     def AddOrderMax(self, buyOrSell: str):
         """
@@ -49,7 +68,7 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
         :param buyOrSell: The type of order to add, which can be "buy" or "sell".
         """
         assert buyOrSell in ("buy", "sell"), "buyOrSell must be 'buy' or 'sell'"
-        price = float(self.dataMachine.ordered.iloc[-1]["Close"])  # Gets Last price registered
+        price = self.dataMachine.lastPrice()  # Gets Last price registered
         amount = self.fiatBalance / price if buyOrSell == "buy" else self.cryptoBalance
         self.AddOrder(buyOrSell, amount, price)
 
@@ -62,22 +81,27 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
         self.orderFile.close()
 
     def __readLastOrders(self):
-        try:
-            empty = True
-            self.orders = None
-            self.orderWriter = None
-            githubFile = self.greedyBoyRepo.get_contents(self.ordersGithubPath, self.branchName)
-            githubFileContent = githubFile.decoded_content.decode('ascii')
-            empty = not csv.Sniffer().has_header(githubFileContent)
-            if not empty:
-                self.orderFile = open(self.ordersDataTempPath, "w")
-                self.orderFile.write(githubFileContent)
-                self.orderFile.close()
-                self.dataMachine = GBDataMachine.fromFilename(self.ordersDataTempPath, interval=15)
-        except:
+        empty = True
+        self.orders = None
+        self.orderWriter = None
+        if self.testTime: # Tests start without orders
             self.orderFile = open(self.ordersDataTempPath, "w")
             self.orderFile.write("")
             self.orderFile.close()
+        else:
+            try:
+                githubFile = self.greedyBoyRepo.get_contents(self.ordersGithubPath, self.branchName)
+                githubFileContent = githubFile.decoded_content.decode('ascii')
+                empty = not csv.Sniffer().has_header(githubFileContent)
+                if not empty:
+                    self.orderFile = open(self.ordersDataTempPath, "w")
+                    self.orderFile.write(githubFileContent)
+                    self.orderFile.close()
+                    self.dataMachine = GBDataMachine.fromFilename(self.ordersDataTempPath, interval=15)
+            except:
+                self.orderFile = open(self.ordersDataTempPath, "w")
+                self.orderFile.write("")
+                self.orderFile.close()
         self.orderFile = open(self.ordersDataTempPath, "a")
         self.orderWriter = csv.DictWriter(self.orderFile, fieldnames=['Date', 'Price', 'Amount', 'Order'], lineterminator="\n")
         if empty:
@@ -96,29 +120,74 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
         else:
             self.buyOrSellPosition = "buy" if self.fiatBalance >= 10 else "sell"
 
+    def __loadSnapshot(self) -> bool:
+        """Resumes the data machine from the snapshot of a previous run if it is less than a day old."""
+        try:
+            dataMachine = GBDataMachine.fromSnapshot(self.snapshotPath)
+        except FileNotFoundError:
+            return False
+        except Exception as error: # Corrupt, truncated or from an incompatible version
+            print("Couldn't resume from the snapshot " + self.snapshotPath + ", warming up instead:", repr(error))
+            return False
+        if dataMachine.lastEpoch < time.time() - 86400:
+            return False
+        self.dataMachine = dataMachine
+        return True
+
+    def __readWarmState(self) -> Union[dict, None]:
+        """Reads the data machine state saved at the end of the day before, None if there is none."""
+        warmStatePath = self.warmStateGithubDirectory + os.path.splitext(self.githubDataFilename)[0] + ".json"
+        try:
+            githubFile = self.greedyBoyRepo.get_contents(warmStatePath, self.branchName)
+            return json.loads(githubFile.decoded_content.decode('ascii'))
+        except UnknownObjectException:
+            return None
+        except Exception as error:
+            print("Couldn't read the warm state " + warmStatePath + ", warming up instead:", repr(error))
+            return None
+
+    def saveWarmState(self) -> str:
+        """Writes the data machine state to go on from the next day, see :func:`GBDataMachine.warmState`.
+        :return: The path of the written file, to be sent with the data of the day.
+        """
+        with open(self.warmStateTempPath, "w") as warmStateFile:
+            json.dump(self.dataMachine.warmState(), warmStateFile)
+        return self.warmStateTempPath
+
+    def __saveSnapshot(self):
+        """Saves the data machine once per candle, a restart then resumes from it."""
+        if self.testTime or self.dataMachine.newRound['Date'] == self.snapshotDate:
+            return
+        self.snapshotDate = self.dataMachine.newRound['Date']
+        self.dataMachine.saveSnapshot(self.snapshotPath)
+
     def start(self):
         self.__readLastOrders()
-        self.dataMachine = GBDataMachine(interval=15)
+        self.dataMachine = GBDataMachine(interval=15, retention=GBConstants.CANDLE_RETENTION,
+                                         lateness=GBConstants.TICK_LATENESS)
+        resumed = not self.testTime and self.__loadSnapshot()
+        if not resumed and not self.testTime and self.warmState is None:
+            self.warmState = self.__readWarmState()
+        if not resumed and self.warmState is not None:
+            # Seeded from the end of the day before, ticks up to its lastEpoch are already in
+            self.dataMachine = GBDataMachine.fromWarmState(self.warmState, retention=GBConstants.CANDLE_RETENTION)
+            resumed = True
 
         ###################################
         # Getting data from the day before
-        if not self.testTime:
-            lastTime = time.time() - 86401
-            resp = self.krakenApi.GetPrices(self.initial, 5, lastTime)
+        if not self.testTime and not resumed:
+            # 5 minutes bars of the last day then 1 minute bars from the last one (still open), both resampled
+            # to the interval of the data machine and computed at once
+            bars = []
+            resp = self.krakenApi.GetPrices(self.initial, 5, time.time() - 86401)
             if resp: # If request actually got useful information
-                for result in resp:
-                    self.dataMachine.appendFormated(result[0], result[1], result[2], result[3], result[4])
-                lastTime = resp[-1][0] - 1
-            resp = self.krakenApi.GetPrices(self.initial, 1, lastTime)
-            if resp:
-                for result in resp:
-                    self.dataMachine.append(result[0], result[1])
-                    self.dataMachine.append(result[0], result[2])
-                    self.dataMachine.append(result[0], result[3])
-                    self.dataMachine.append(result[0], result[4])
-                    self.dataMachine.append(result[0], result[5])
-
-        if self.dataMachine.ordered.size == 0:
+                bars = resp[:-1]
+                resp = self.krakenApi.GetPrices(self.initial, 1, resp[-1][0])
+                if resp:
+                    bars += [bar for bar in resp if bar[0] >= bars[-1][0] + 5 * 60] if bars else resp
+            self.dataMachine.appendOHLC(bars)
+
+        if len(self.dataMachine.store) == 0 and not self.testTime: # Tests replay their own days
             self.dataFiles = dict()
             try:
                self.dataFiles[self.initial] = None
@@ -129,21 +198,33 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
                    self.dataFile = open(self.dataPathWrite, "w")
                    self.dataFile.write(githubFileContent)
                    self.dataFile.close()
-                   self.dataMachine = GBDataMachine.fromFilename(self.dataPathWrite)
+                   self.dataMachine = GBDataMachine.fromFilename(self.dataPathWrite, retention=GBConstants.CANDLE_RETENTION,
+                                                                lateness=GBConstants.TICK_LATENESS)
             except: 0
 
         #################################
         # Trying to add data from today
         try:
-            lastDate = self.dataMachine.ordered.iloc[-1]["Date"]
+            lastDate = self.dataMachine.store.last('Date')
             #self.dataMachine = GBDataMachine.fromFilename(self.dataPathWrite if not empty else self.todayDataFilename)
             todayData = pd.read_csv(self.todayDataFilename, parse_dates=True)
-            todayData = todayData.drop(todayData[todayData.epoch < lastDate].index)
+            if resumed: # Ticks up to lastEpoch are already in the snapshot
+                todayData = todayData.drop(todayData[todayData.epoch <= self.dataMachine.lastEpoch].index)
+            else:
+                todayData = todayData.drop(todayData[todayData.epoch < lastDate].index)
             self.dataMachine.appendDataframe(todayData)
         except: 0
 
+        self.dataMachine.subscribe(self.strategy)
+        # Shadow strategies, run on virtual balances with the candles and indicators of the data machine
+        self.shadowStrategies = GBStrategyMultiplexer(self.dataMachine) if self.shadowStrategyBuilders else None
+        for name, strategy in self.shadowStrategyBuilders.items():
+            self.shadowStrategies.add(name, strategy)
         print("Memory usage :", self.dataMachine.memoryUsage())
-        self.getCryptoAndFiatBalance()
+        if self.testTime: # Balances of the tests are set with setCustomBalance
+            self.__setBuyOrSellPosition()
+        else:
+            self.getCryptoAndFiatBalance()
         print("Initial balance :")
         print("\t " + str(self.cryptoBalance) + " " + self.initial)
         print("\t$" + str(self.fiatBalance))
@@ -159,7 +240,7 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
         assert buyOrSell in ("buy", "sell"), "buyOrSell must be 'buy' or 'sell'"
 
         if not price:
-            price = self.dataMachine.ordered.iloc[-1]["Close"] # Gets Last price registered
+            price = self.dataMachine.lastPrice() # Gets Last price registered
 
         if self.buySellLimit != 0:
             maxAmount = self.buySellLimit / price # Gets max amount to buy or sell
@@ -170,7 +251,8 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
         elif buyOrSell == "sell":
             amount = min(amount, self.cryptoBalance * 0.99975)
 
-        self.krakenApi.AddOrder(buyOrSell, "market", amount, self.initial)
+        if not self.testTime:
+            self.krakenApi.AddOrder(buyOrSell, "market", amount, self.initial)
         self.__writeRowToTemp({'Date': self.lastData, 'Price': str(price), 'Amount': str(amount), 'Order': buyOrSell})
         self.lastOrder = {'Date': self.lastData, 'Price': price, 'Amount': amount, 'Order': buyOrSell}
         if self.testTime:
@@ -183,19 +265,16 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
             self.__setBuyOrSellPosition()
         else:
             self.getCryptoAndFiatBalance()
-        self.highest = self.lowest = 50
 
         print("Current balance :")
         print("\t " + str(self.cryptoBalance) + " " + self.initial)
         print("\t$" + str(self.fiatBalance))
         print("Added to reports : " + str(self.lastOrder))
 
-    def addData(self, epoch, price):
+    def addData(self, epoch, price, volume=0.0, side=None):
         self.lastData = epoch
-        self.dataMachine.append(epoch, price, False)
-#        if self.dataMachine.intervalClosed():
-        self.makeDecision()
-        #print(self.dataMachine.iloc[:5].to_csv(index=False))
+        self.dataMachine.append(epoch, price, False, volume, side)
+        self.__saveSnapshot()
 
     def getCryptoAndFiatBalance(self):
         self.cryptoBalance, self.fiatBalance = self.krakenApi.GetCryptoAndFiatBalance(self.initial, GBConstants.FIAT_CURRENCY)
@@ -219,116 +298,20 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
         self.cryptoBalance, self.fiatBalance = cryptoBalance, fiatBalance
         self.__setBuyOrSellPosition()
 
-    ######################################################################
-    ## Decisions Making
-    def makeDecision(self):
-#         ########################################################################
-#         ## Bollinger Strategy
-#         def bollingerStrategy():
-#             curBolVal = self.dataMachine.currentBollingerValue()
-
-#             if not self.buyOrSellPosition: return
-#             if curBolVal <= 100 - self.bollingerTolerance and curBolVal >= self.bollingerTolerance: return
-
-#             if curBolVal > self.highest: self.highest = curBolVal
-#             elif curBolVal < self.lowest: self.lowest = curBolVal
-
-#             if self.lastOrder and self.lastOrder['Date'] + self.dataMachine.interval * 60 < self.lastData:
-#                 lastPrice = self.dataMachine.lastPrice()
-#                 if self.lastOrder['Order'] == "buy":
-#                     if lastPrice < self.lastOrder['Price']:
-#                         print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])))
-#                         print("Current bollinger value :", curBolVal)
-#                         return self.AddOrderMax("sell")
-#                 elif self.lastOrder['Order'] == "sell":
-#                     if lastPrice > self.lastOrder['Price']:
-#                         print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])))
-#                         print("Current bollinger value :", curBolVal)
-#                         return self.AddOrderMax("buy")
-
-#             if self.buyOrSellPosition == "buy":
-#                 if self.lowest < 0 and \
-#                         curBolVal - self.lowest >= self.bollingerTolerance:
-#                     print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])))
-#                     print("Current bollinger value :", curBolVal)
-#                     self.AddOrderMax("buy")
-#             elif self.buyOrSellPosition == "sell":
-#                 if self.highest > 100 and \
-#                         self.highest - curBolVal >= self.bollingerTolerance:
-#                     print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])))
-#                     print("Current bollinger value :", curBolVal)
-#                     self.AddOrderMax("sell")
-
-#         ########################################################################
-#         ## Scalping Strategy
-#         def scalpingStrategy(): # Begins by selling, so you need the crypto first
-#             if not self.buyOrSellPosition: return
-
-#             if self.scalping is not None: # Sold
-#                 last = self.dataMachine.ordered.iloc[-1]
-#                 closePrice = last['Close']
-#                 if closePrice >= self.scalping['Min'] * self.scalping['MaxPercentage'] or\
-#                     closePrice <= self.scalping['SellPrice'] / ((self.scalping['MaxPercentage'] - 1) * 1.2 + 1):
-#                     print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])))
-#                     print("Close: {0:6.5f}, EMA20: {1:6.5f}, EMA50: {2:6.5f}, Percentage : {3:6.3f}".format(
-#                         closePrice, last['EMA20'], last['EMA50'], (self.scalping['SellPrice'] / closePrice - 1) * 100 - 0.2))
-#                     self.AddOrderMax("buy")
-#                     self.scalping = None
-# #                elif closePrice < self.scalping['Min']:
-#  #                   self.scalping['Min'] = closePrice
-#             elif self.dataMachine.intervalClosed():
-#                 last = self.dataMachine.ordered.iloc[-2]
-#                 ema20, ema50 = last['EMA20'], last['EMA50']
-#                 closePrice = last['Close']
-#                 if last['Open'] < closePrice \
-#                     and last['Low'] <= ema20 and last['Open'] <= ema20 \
-#                     and last['High'] >= ema20 and last['High'] < ema50 \
-#                     and ema50 / closePrice >= 1.008:
-#                     print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])))
-#                     print("Close: {0:6.5f}, EMA20: {1:6.5f}, EMA50: {2:6.5f}, Percentage : {3:6.3f}".format(closePrice, ema20, ema50, (ema50 / closePrice - 1) * 100))
-#                     self.AddOrderMax("sell")
-#                     self.scalping = {
-#                         'MaxPercentage': ema50 / closePrice,
-#                         'SellPrice': max(closePrice, ema20),
-#                         'Min': closePrice
-#                     }
-
-#         ####################################
-#         ## EMA Crossover
-#         def emaCrossover():
-#             if not self.buyOrSellPosition: return
-
-#             if not self.dataMachine.intervalClosed():
-#                 return
-
-#             last = self.dataMachine.ordered.iloc[-2]
-#             closePrice, ema5, ema40 = last['Close'], last['EMA5'], last['EMA40']
-#             # print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])) +
-#             #       " || Close: {0:6.5f}, EMA5: {1:6.5f}, EMA40: {2:6.5f}".format(closePrice, ema5, ema40))
-#             if self.buyOrSellPosition == "buy":
-#                 if ema5 > ema40 and ema5 / ema40 >= 1.000:
-#                     print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])) +
-#                          " || Close: {0:6.5f}, EMA5: {1:6.5f}, EMA40: {2:6.5f}".format(closePrice, ema5, ema40))
-#                     self.AddOrderMax("buy")
-#             elif self.buyOrSellPosition == "sell":
-#                 if ema5 < ema40 and ema40 / ema5 >= 1.000:
-#                     print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])) +
-#                          " || Close: {0:6.5f}, EMA5: {1:6.5f}, EMA40: {2:6.5f}".format(closePrice, ema5, ema40))
-#                     self.AddOrderMax("sell")
-#                     print("")
-
-        #return bollingerStrategy()
-        #return scalpingStrategy()
-        #return emaCrossover()
-        #return self.emaCrossover.run5_40()
-        return self.emaCrossover.run(5, 40)
-
     def __init__(self, apiKey, apiPrivateKey, githubToken, repoName, dataBranchName, initial, todayDataFilename,
-                 ordersTempPath, ordersGithubPath, krakenToken = None, bollingerTolerance: float = 20, testTime: float = None):
+                 ordersTempPath, ordersGithubPath, krakenToken = None, bollingerTolerance: float = 20, testTime: float = None,
+                 clients: GBClientFactory = None, warmState: dict = None, strategy: str = GBConstants.TRADED_STRATEGY,
+                 shadowStrategies: dict = None):
         self.initial = initial
         self.dataPathWrite = tempfile.gettempdir() + "/data" + initial + "_old.csv"
+        self.snapshotPath = tempfile.gettempdir() + "/dataMachine" + initial + ".npz"
+        self.snapshotDate = None
         self.githubDataFilename = time.strftime(GBConstants.DATE_FORMAT, time.localtime(time.time() - 86400)) + ".csv"
         self.githubDataPath = "./price_history/" + initial + "/" + self.githubDataFilename
+        # Data machine state at the end of each day, by pair and interval
+        self.warmStateGithubDirectory = "./warm_state/" + initial + "/15/"
+        self.warmStateTempPath = tempfile.gettempdir() + "/warmState" + initial + ".json"
+        self.warmState = warmState
 
         self.ordersDataTempPath, self.ordersGithubPath = ordersTempPath, ordersGithubPath
 
@@ -340,24 +323,27 @@ class GreedyBoyDecisionMaker(IGreedyBoyDecisionMaker):
         # For testing purposes
         self.testTime = testTime
 
-        # Github repo
-        g = Github(githubToken)
-        self.greedyBoyRepo = g.get_repo(repoName)
-
-        # Kraken API
-        self.krakenApi = KrakenApi(apiKey, apiPrivateKey, krakenToken)
+        # Github repo and Kraken API, built on first use, shared with the pairs of a multi-asset engine or the days of a test when given
+        self.clients = clients if clients else GBClientFactory(apiKey, apiPrivateKey, githubToken, repoName, krakenToken)
 
         # Decision making
         self.lastOrder, self.lastData = None, None
         self._buyOrSellPosition = None  # "buy" / "sell"
         self.cryptoBalance = self.fiatBalance = 0
+        self.buySellLimit = 0 # 0 if no limit
             ## Bollinger Strat
         self.bollingerTolerance = bollingerTolerance
-        self.lowest = self.highest = 50
-        self.buySellLimit = 0 # 0 if no limit
+        self.bollingerStrategy = BollingerStrategy(self, bollingerTolerance, 15)
             ## Scalping Start
-        self.scalping = None
+        self.scalpingStrategy = ScalpingStrategy(self)
         # EMA Crossover
         self.emaCrossover = EMACrossover(self)
+        # Strategy placing the orders, the only one notified by the data machine
+        self.strategies = {"EMACrossover": self.emaCrossover, "Bollinger": self.bollingerStrategy, "Scalping": self.scalpingStrategy}
+        assert strategy in self.strategies, "strategy must be one of " + ", ".join(self.strategies)
+        self.strategy = self.strategies[strategy]
+        # Shadow strategies by name, built by GBStrategyMultiplexer.add on virtual balances, like
+        # {"EMACrossover9_21": lambda decisionMaker: EMACrossover(decisionMaker, 9, 21)}, none by default
+        self.shadowStrategyBuilders = shadowStrategies if shadowStrategies else dict()
 
         self.start()
\ No newline at end of file
@@ -65,15 +65,8 @@ def main():
                 print("Error while loading", pair, ": No data")
                 continue
 
-            frame = pd.DataFrame()
-            for priceTab in prices:
-                frame = pd.concat([frame, pd.DataFrame({
-                    'Date': priceTab[0],
-                    'Open': priceTab[1],
-                    'High': priceTab[2],
-                    'Low': priceTab[3],
-                    'Close': priceTab[4]
-                }, index=[0])], ignore_index=True)
+            frame = pd.DataFrame([priceTab[:5] for priceTab in prices],
+                                 columns=['Date', 'Open', 'High', 'Low', 'Close']).astype(float)
             dataFile = open(dataPath, "w")
             dataFile.write(frame.to_csv(index=False))
             dataFile.close()
@@ -110,9 +103,8 @@ def main():
         #fiatBalance = fixFiatBalance
 
         gbDM.setCustomBalance(cryptoBalance, fiatBalance)
-        for x in range(1, len(testDatas[pair].index)):
-            row = testDatas[pair].iloc[x]
-            gbDM.addFormatedData(row['Date'], row['Open'], row['High'], row['Low'], row['Close'])
+        for row in testDatas[pair].iloc[1:].itertuples(index=False):
+            gbDM.addFormatedData(row.Date, row.Open, row.High, row.Low, row.Close)
 
         # Log
         startingMoney = fiatBalance + cryptoBalance * beginningPrice
@@ -0,0 +1,79 @@
+###
+### GreedyBoyOfflineTester
+###
+import datetime
+
+from GBBacktester import GBBacktester
+import tempfile, time, csv, os, sys
+from typing import Dict, List
+from GBConstants import GBConstants
+
+# Tests the price_history directory of the repository by default, no Github, Kraken token nor config.csv needed
+dataDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_history")
+# Currencies tested, every currency of the directory if empty
+testedInitials = []
+# Number of most recent days tested for each currency, every day if 0
+testedDayCount = 0
+# Maximum days replayed before a tested day, see GBBacktester.dayJobs
+warmUpDays = 7
+
+def getPriceHistoryDirectory(directory: str) -> str:
+    """Returns the directory containing a folder of daily files per currency: `directory` itself or its price_history folder."""
+    priceHistory = os.path.join(directory, "price_history")
+    return priceHistory if os.path.isdir(priceHistory) else directory
+
+def getInitials(directory: str) -> List[str]:
+    return sorted(initial for initial in os.listdir(directory) if os.path.isdir(os.path.join(directory, initial)))
+
+def getTestFiles(directory: str, initial: str) -> Dict[float, str]:
+    """Returns the files of the days of a currency containing ticks, by timestamp of the day."""
+    testFiles = dict()
+    for fileName in os.listdir(os.path.join(directory, initial)):
+        fileDate, extension = os.path.splitext(fileName)
+        if extension != ".csv":
+            continue
+        try:
+            fileDateTime = datetime.datetime.strptime(fileDate, GBConstants.DATE_FORMAT)
+        except ValueError:
+            continue
+        path = os.path.join(directory, initial, fileName)
+        with open(path) as f: # Skips the days recorded without any tick
+            f.readline()
+            if not f.readline().strip():
+                continue
+        testFiles[(fileDateTime - datetime.datetime(1970, 1, 1)).total_seconds()] = path
+    return testFiles
+
+def main(directory: str = None):
+    assert GBConstants.TRADED_STRATEGY == GBBacktester.STRATEGY, \
+        "GBBacktester only simulates " + GBBacktester.STRATEGY + ", test " + GBConstants.TRADED_STRATEGY + " with GreedyBoyTester"
+    directory = getPriceHistoryDirectory(directory if directory else dataDirectory)
+    initials = testedInitials if testedInitials else getInitials(directory)
+
+    # Test Configurations
+    cryptoBalance, fiatBalance = 0.0, GBConstants.FIAT_BALANCE_CHECK
+
+    jobs = []
+    for initial in initials:
+        testFiles = getTestFiles(directory, initial)
+        testTimes = sorted(testFiles)[1:] # The first day is only replayed before the second one
+        if testedDayCount:
+            testTimes = testTimes[-testedDayCount:]
+        jobs += GBBacktester.dayJobs(initial, testTimes, testFiles.get, cryptoBalance, fiatBalance, warmUpDays)
+    print("Testing", len(jobs), "days of", len(initials), "currencies from", directory, "...")
+
+    # Log test
+    testLog = open(tempfile.gettempdir() + "/testResults.csv", "w")
+    testLogWriter = csv.DictWriter(
+        testLog,
+        fieldnames=GBBacktester.RESULT_COLUMNS + ['Currency'],
+        lineterminator="\n"
+    )
+    testLogWriter.writeheader()
+    for row in GBBacktester().runMany(jobs).to_dict('records'):
+        testLogWriter.writerow(row)
+        print("Results of " + row['Currency'] + " " + time.strftime(GBConstants.PRINT_DATE_FORMAT, time.gmtime(row['Date'])) + ": " + str(row))
+    testLog.close()
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
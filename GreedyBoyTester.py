@@ -3,21 +3,32 @@
 ###
 import datetime
 
+from GBBacktester import GBBacktester
 from GreedyBoyDecisionMaker import GreedyBoyDecisionMaker
 from ConfigManager import getConfig
-from KrakenApi import get_kraken_token
+from GBClients import GBClientFactory
 import tempfile, time, csv, os
-from typing import List
-from github import Github
+from typing import List, Union
 import pandas as pd
 import requests
 from GBConstants import GBConstants
 
 # Testing with Dogecoin
 currencyInitial = "ETH"
-
-def getTestTimeList(greedyBoyRepo, branchName) -> List[float]:
-    githubDataPath = "./price_history/" + currencyInitial + "/"
+# Currencies tested by GBBacktester, each day of each currency in its own process
+testedInitials = [currencyInitial]
+# Tests with GBBacktester instead of replaying every tick through a GreedyBoyDecisionMaker,
+# only if it simulates the traded strategy
+vectorizedBacktest = True
+# Tests every EMA pair with GBBacktester.sweep instead, over the tested days of currencyInitial
+sweepBacktest = False
+sweepThresholds = [1.000, 1.001, 1.002, 1.005]
+# Maximum days replayed before a day tested by GBBacktester (the tested days before it and the day before them),
+# the older days are too light in the EMAs to change an order
+warmUpDays = 7
+
+def getTestTimeList(greedyBoyRepo, branchName, initial: str = currencyInitial) -> List[float]:
+    githubDataPath = "./price_history/" + initial + "/"
 
     tab = []
     try:
@@ -33,32 +44,107 @@ def getTestTimeList(greedyBoyRepo, branchName) -> List[float]:
 
     return tab
 
+def loadTestFile(greedyBoyRepo, branchName, initial: str, testTime: float) -> Union[str, None]:
+    """Downloads the data of a day if it is not already in the temporary directory.
+    :return: The path of the data file, None if the day has no data.
+    """
+    dataPath = tempfile.gettempdir() + "/data" + initial + str(testTime) + ".csv"
+
+    if os.path.exists(dataPath):
+        return dataPath
+
+    githubDataFilename = time.strftime(GBConstants.DATE_FORMAT, time.gmtime(testTime)) + ".csv"
+    githubDataPath = "./price_history/" + initial + "/" + githubDataFilename
+
+    try:
+        githubFile = greedyBoyRepo.get_contents(githubDataPath, branchName)
+
+        if githubFile.content == '':
+            githubResponse = requests.get(githubFile.download_url)
+            githubResponse.raise_for_status()
+            githubFileContent = githubResponse.text
+        else:
+            githubFileContent = githubFile.decoded_content.decode('ascii')
+        empty = not csv.Sniffer().has_header(githubFileContent)
+        if not empty:
+            with open(dataPath, "w") as f:
+                f.write(githubFileContent)
+            return dataPath
+    except Exception as e:
+        print("Couldn't load file", githubDataPath, ":", e)
+    return None
+
+def getBacktestJobs(greedyBoyRepo, branchName, initial: str, cryptoBalance: float, fiatBalance: float) -> List[tuple]:
+    """Returns the jobs of GBBacktester.runMany testing the days of a currency, see GBBacktester.dayJobs."""
+    testTimes = getTestTimeList(greedyBoyRepo, branchName, initial)
+    testTimes.sort()
+
+    # Same days as the tick replay
+    testedTimes = []
+    for i, testTime in enumerate(testTimes):
+        if len(testTimes) >= 5 and testTime < testTimes[-5]:
+            continue
+        if i == 0 or i + 1 == len(testTimes):
+            continue
+        if testTimes[i - 1] != testTime - 86400:
+            continue
+        testedTimes += [testTime]
+
+    def dataFile(testTime: float) -> Union[str, None]:
+        print("Loading", initial, time.strftime(GBConstants.PRINT_DATE_FORMAT, time.gmtime(testTime)), "...")
+        return loadTestFile(greedyBoyRepo, branchName, initial, testTime)
+
+    return GBBacktester.dayJobs(initial, testedTimes, dataFile, cryptoBalance, fiatBalance, warmUpDays)
+
 def main():
     apiKey, apiPrivateKey, githubToken, repoName, dataBranchName = getConfig()
     ordersDataPath = tempfile.gettempdir() + "/reports" + currencyInitial + ".csv"
     githubOrdersPath = "./reports/" + currencyInitial + "-reports.csv"
-    krakenToken = get_kraken_token(apiKey, apiPrivateKey)
 
-    # Github repo
-    g = Github(githubToken)
-    repoName = repoName
-    greedyBoyRepo = g.get_repo(repoName)
+    # Github repo, shared by the decision makers of every day, no Kraken token is needed to test
+    clients = GBClientFactory(apiKey, apiPrivateKey, githubToken, repoName)
+    greedyBoyRepo = clients.greedyBoyRepo
 
     # Loop
     testTimes = getTestTimeList(greedyBoyRepo, dataBranchName)
     testTimes.sort()
 
+    # Test Configurations
+    cryptoBalance, fiatBalance = 0.0, GBConstants.FIAT_BALANCE_CHECK # 15000 XDG, 0 dollars
+
+    if sweepBacktest:
+        # Ranked configurations, the days going on from one to the next with the same balance
+        jobs = getBacktestJobs(greedyBoyRepo, dataBranchName, currencyInitial, cryptoBalance, fiatBalance)
+        if len(jobs) == 0:
+            return
+        print("Beginning sweep...")
+        previousDay = pd.concat([GBBacktester.readTicks(path) for path in jobs[0][1]], ignore_index=True)
+        data = pd.concat([GBBacktester.readTicks(path) for job in jobs for _, path in job[2]], ignore_index=True)
+        results = GBBacktester().sweep(previousDay, data, cryptoBalance, fiatBalance, thresholds=sweepThresholds)
+        results.to_csv(tempfile.gettempdir() + "/sweepResults.csv", index=False)
+        print(results.to_string(index=False))
+        return
+
     # Log test
     testLog = open(tempfile.gettempdir() + "/testResults.csv", "w")
     testLogWriter = csv.DictWriter(
         testLog,
-        fieldnames=['Date', 'Crypto', 'Fiat', 'OpeningPrice', 'ClosePrice', 'OverallBenefit', 'BotBenefit'],
+        fieldnames=['Date', 'Crypto', 'Fiat', 'OpeningPrice', 'ClosePrice', 'OverallBenefit', 'BotBenefit', 'Currency'],
         lineterminator="\n"
     )
     testLogWriter.writeheader()
 
-    # Test Configurations
-    cryptoBalance, fiatBalance = 0.0, GBConstants.FIAT_BALANCE_CHECK # 15000 XDG, 0 dollars
+    if vectorizedBacktest and GBConstants.TRADED_STRATEGY == GBBacktester.STRATEGY:
+        # Every day of every currency is tested in parallel, the rows are written in date order
+        jobs = []
+        for initial in testedInitials:
+            jobs += getBacktestJobs(greedyBoyRepo, dataBranchName, initial, cryptoBalance, fiatBalance)
+        print("Beginning tests...")
+        for row in GBBacktester().runMany(jobs).to_dict('records'):
+            testLogWriter.writerow(row)
+            print("Results of " + row['Currency'] + " " + time.strftime(GBConstants.PRINT_DATE_FORMAT, time.gmtime(row['Date'])) + ": " + str(row))
+        testLog.close()
+        return
 
     # Loading test files
     testDatas = []
@@ -66,41 +152,13 @@ def main():
         if i + 1 == len(testTimes): continue
 
         print("Loading", time.strftime(GBConstants.PRINT_DATE_FORMAT, time.gmtime(testTime)), "...")
-
-        dataPath = tempfile.gettempdir() + "/data" + currencyInitial + str(testTime) + ".csv"
-
-        if os.path.exists(dataPath):
-            testDatas += [pd.read_csv(dataPath, parse_dates=False)]
-            continue
-
-        githubDataFilename = time.strftime(GBConstants.DATE_FORMAT, time.gmtime(testTime)) + ".csv"
-        githubDataPath = "./price_history/" + currencyInitial + "/" + githubDataFilename
-
-        try:
-            githubFile = greedyBoyRepo.get_contents(githubDataPath, dataBranchName)
-
-            if githubFile.content == '':
-                githubResponse = requests.get(githubFile.download_url)
-                githubResponse.raise_for_status()
-                githubFileContent = githubResponse.text
-                empty = not csv.Sniffer().has_header(githubFileContent)
-                if not empty:
-                    with open(dataPath, "w") as f:
-                        f.write(githubFileContent)
-                    testDatas += [pd.read_csv(dataPath, parse_dates=False)]
-            else:
-                githubFileContent = githubFile.decoded_content.decode('ascii')
-                empty = not csv.Sniffer().has_header(githubFileContent)
-                if not empty:
-                    with open(dataPath, "w") as f:
-                        f.write(githubFileContent)
-                testDatas += [pd.read_csv(dataPath, parse_dates=False)]
-        except Exception as e:
-            print("Couldn't load file", githubDataPath, ":", e) 
-            0
+        dataPath = loadTestFile(greedyBoyRepo, dataBranchName, currencyInitial, testTime)
+        testDatas += [GBBacktester.readTicks(dataPath) if dataPath else None]
 
 
     print("Beginning tests...")
+    # Data machine states at the end of each tested day, the next day starts from them
+    warmStates = dict()
     for i, testTime in enumerate(testTimes):
         # Skip if not enough data for the last 5 days
         if len(testTimes) >= 5 and testTime < testTimes[-5]: 
@@ -122,13 +180,15 @@ def main():
         gbDM = GreedyBoyDecisionMaker(
             apiKey, apiPrivateKey, githubToken, repoName,   # Api Key, Api Private Key, Github repo
             dataBranchName, currencyInitial, "dataPath",      # Branch name, trading initial, temp path of today's data
-            ordersDataPath, githubOrdersPath, krakenToken,  # temp path containing orders, kraken token
-            testTime=testTime                               # Test Time
+            ordersDataPath, githubOrdersPath,               # temp path containing orders
+            testTime=testTime, clients=clients,             # Test Time, shared clients
+            warmState=warmStates.get(testTimes[i - 1])      # End of the day before, if it was tested
         )
-        if len(testDatas) > 0 and (0 <= i - 1 < len(testDatas)):
-            gbDM.dataMachine.appendDataframe(testDatas[i - 1])
-        else:
-            continue
+        if testTimes[i - 1] not in warmStates: # Replays the day before
+            if 0 <= i - 1 < len(testDatas) and testDatas[i - 1] is not None:
+                gbDM.dataMachine.appendDataframe(testDatas[i - 1])
+            else:
+                continue
 
         # To get for comparisons
         beginningPrice = gbDM.dataMachine.lastPrice()
@@ -136,12 +196,13 @@ def main():
         gbDM.setCustomBalance(cryptoBalance, fiatBalance)
         if i < len(testDatas) and testDatas[i] is not None and not testDatas[i].empty:
             for j, row in testDatas[i].iterrows():
-                gbDM.addData(row['epoch'], row['price'])
+                gbDM.addData(row['epoch'], row['price'], row.get('volume', 0.0), row.get('side'))
         else:
             continue
+        warmStates[testTime] = gbDM.dataMachine.warmState()
 
-        # Log
-        startingMoney = fiatBalance + cryptoBalance * beginningPrice
+        # Log, the closing price stands for the opening one if no tick of the day before was released
+        startingMoney = fiatBalance + cryptoBalance * (beginningPrice if beginningPrice else gbDM.dataMachine.lastPrice())
 
         # Benefits computed in percentage
         overallBenefit = (gbDM.fiatBalance + gbDM.cryptoBalance * gbDM.dataMachine.lastPrice()) / startingMoney
@@ -158,7 +219,8 @@ def main():
             'OpeningPrice': beginningPrice,
             'ClosePrice': gbDM.dataMachine.lastPrice(),
             'OverallBenefit': overallBenefit,
-            'BotBenefit': botBenefit
+            'BotBenefit': botBenefit,
+            'Currency': currencyInitial
         }
         testLogWriter.writerow(row)
         print("Results of " + time.strftime(GBConstants.PRINT_DATE_FORMAT, time.gmtime(testTime)) + ": " + str(row))
@@ -42,6 +42,16 @@ class IGreedyBoyDecisionMaker(ABC):
         """
         pass
 
+    @abstractmethod
+    def candle(self, offset: int = 1, indicators: list[str] = ()) -> Union[dict, None]:
+        """
+        Returns a candle with the given indicators, only the indicators asked for are computed.
+        :param offset: 1 for the candle still open, 2 for the last closed one, ...
+        :param indicators: The indicator columns needed ('EMA5', 'BollingerGap', ...).
+        :return: The values of the candle by column name, None if there are not enough candles.
+        """
+        pass
+
     @abstractmethod
     def isIntervalClosed(self) -> bool:
         """
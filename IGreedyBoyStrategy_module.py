@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+
+class IGreedyBoyStrategy(ABC):
+    """
+    Strategy notified by a data machine (see GBDataMachine.subscribe) instead of being called on every tick.
+    Strategies also interested in the ticks define an `onTick(epochTime, price)` method, the others
+    cost nothing between two candle closes.
+    """
+
+    # Properties
+    @property
+    @abstractmethod
+    def indicators(self) -> list[str]:
+        """
+        The indicator columns given to onCandleClose, computed once for every strategy reading them.
+        :return: The indicator columns ('EMA5', 'BollingerGap', ...).
+        """
+        pass
+
+    @abstractmethod
+    def onCandleClose(self, candle: dict, indicators: dict):
+        """
+        Called once for every closed candle, right after the tick opening the next one.
+        :param candle: The values of the closed candle by column name ('Date', 'Open', 'Close', ...).
+        :param indicators: The values of the indicator columns of the closed candle, see `indicators`.
+        """
+        pass
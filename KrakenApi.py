@@ -8,6 +8,7 @@ import urllib.request as req
 import urllib
 import requests
 import _thread
+import threading
 import tempfile
 import time, base64, hashlib, hmac, json
 
@@ -49,11 +50,16 @@ class KrakenApi:
     """
 
     def kraken_post_request(self, uri_path, data):
-        headers = {}
-        headers['API-Key'] = self.apiKey
-        # get_kraken_signature() as defined in the 'Authentication' section
-        headers['API-Sign'] = get_kraken_signature(uri_path, data, self.apiPrivateKey)
-        req = requests.post((self.apiUrl + uri_path), headers=headers, data=data)
+        # Pairs share the API key from several threads, Kraken needs increasing nonces
+        with self.nonceLock:
+            if 'nonce' in data:
+                self.nonce = max(int(data['nonce']), self.nonce + 1)
+                data['nonce'] = str(self.nonce)
+            headers = {}
+            headers['API-Key'] = self.apiKey
+            # get_kraken_signature() as defined in the 'Authentication' section
+            headers['API-Sign'] = get_kraken_signature(uri_path, data, self.apiPrivateKey)
+            req = requests.post((self.apiUrl + uri_path), headers=headers, data=data)
         return req
 
     def kraken_get_request(self, uri_path):
@@ -199,11 +205,25 @@ class KrakenApi:
         self.apiUrl = "https://api.kraken.com"
         self.apiKey, self.apiPrivateKey = apiKey, apiPrivateKey
         self.nonce = 0
+        self.nonceLock = threading.Lock()
 
-        # Kraken Token
-        self.token = token if token else self.getToken()
+        # Kraken Token, requested on first use
+        self._token = token
+        self.tokenLock = threading.Lock()
         #print(self.token)
 
+    @property
+    def token(self) -> str:
+        """Kraken websocket token, requested from Kraken on first use if none was given."""
+        with self.tokenLock:
+            if not self._token:
+                self._token = self.getToken()
+            return self._token
+
+    @token.setter
+    def token(self, value: str):
+        self._token = value
+
 if __name__ == '__main__':
     apiTest = KrakenApi("jN1hIQ7abFkjmn/ffco27/E2PC7/OfLatbX87vG5wa6vDlZP0GQTsoDa",
                     "Stha4yXDkHon3dnBBW8+nl7G+YVZvWC88OlltVKh5FhKuYJ0Z5sTgO9qe6a7bZKXfrapKMLgkNbJYuffnzvgtw==",
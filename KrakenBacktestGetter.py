@@ -48,6 +48,7 @@ class KrakenBacktestGetter:
         self.dataFiles = dict()
         self.dataWriters = dict()
         for i in range(len(currencyInitials)):
+            fieldnames = GBConstants.TICK_COLUMNS
             try:
                 self.dataFiles[currencyInitials[i]] = None
                 self.dataWriters[currencyInitials[i]] = None
@@ -55,6 +56,7 @@ class KrakenBacktestGetter:
                 githubFileContent = githubFile.decoded_content.decode('ascii')
                 empty = not csv.Sniffer().has_header(githubFileContent)
                 if not empty:
+                    fieldnames = githubFileContent.splitlines()[0].split(',')
                     self.dataFile = open(self.dataPaths[i], "w")
                     self.dataFile.write(githubFileContent)
                     self.dataFile.close()
@@ -66,7 +68,7 @@ class KrakenBacktestGetter:
                 self.dataFile.write("")
                 self.dataFile.close()
             self.dataFiles[currencyInitials[i]] = open(self.dataPaths[i], "a")
-            self.dataWriters[currencyInitials[i]] = csv.DictWriter(self.dataFiles[currencyInitials[i]], fieldnames=["epoch", "price"], lineterminator="\n")
+            self.dataWriters[currencyInitials[i]] = csv.DictWriter(self.dataFiles[currencyInitials[i]], fieldnames=fieldnames, extrasaction="ignore", lineterminator="\n")
             if empty:
                 self.dataWriters[currencyInitials[i]].writeheader()
 
@@ -77,7 +79,7 @@ class KrakenBacktestGetter:
                 initialEur = initial + "/USD"
                 if isinstance(j, list) and j[-1] == initialEur:
                     for info in j[1]:
-                        self.dataWriters[initial].writerow({"epoch": str(info[2]), "price": str(info[0])})
+                        self.dataWriters[initial].writerow({"epoch": str(info[2]), "price": str(info[0]), "volume": str(info[1]), "side": str(info[3])})
                         print(initialEur + "[" + time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(float(info[2]))) + "]: " + info[0] + "$")
 
         def ws_open(ws):
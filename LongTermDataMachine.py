@@ -15,11 +15,37 @@ __status__      = "Test"
 import math
 
 import pandas.core.generic as gen
-import copy
 import pandas as pd
 import numpy as np
+from typing import Union
+
+from GBCandleStore import GBCandleStore
+from GBIndicatorEngine import GBIndicatorEngine
+from GBUtilities import GBUtilities
 
 class LongTermDataMachine:
+    CANDLE_COLUMNS = GBIndicatorEngine.CANDLE_COLUMNS
+    DEFAULT_INDICATORS = ['SMMA5', 'SMMA40']
+
+    @property
+    def ordered(self) -> Union[pd.DataFrame, gen.NDFrame]:
+        """Returns the ordered data, as a dataframe built on top of the candle store"""
+        self.requireIndicators(self.viewIndicators)
+        columns = self.CANDLE_COLUMNS + self.viewIndicators
+        columns += [column for column in self._store.columns if column not in columns]
+        return self._store.toDataFrame(columns)
+
+    @ordered.setter
+    def ordered(self, value: Union[pd.DataFrame, gen.NDFrame]):
+        """Sets the ordered data"""
+        self._store = GBCandleStore.fromDataFrame(value, self.CANDLE_COLUMNS)
+        self.engine.setStore(self._store)
+
+    @property
+    def store(self) -> GBCandleStore:
+        """Returns the candle store behind :attr:`ordered`"""
+        return self._store
+
     @classmethod
     def fromFilename(cls, fileName: str, interval: int = 15, movingAverageSize: int = 30):
         """Constructor starting from a filename.
@@ -47,7 +73,41 @@ class LongTermDataMachine:
         """
         return cls(data, interval, movingAverageSize)
 
-    def __init__(self, data: gen.NDFrame = None, interval: int = 1440, movingAverageSize: int = 30):
+    @classmethod
+    def fromSnapshot(cls, fileName: str):
+        """Constructor starting from a file written by :func:`saveSnapshot`, nothing is computed again.
+
+        :param fileName: Name of the snapshot file.
+        :type fileName: str
+        :exception: KeyError if an indicator of the snapshot is not registered
+        """
+        store, state = GBCandleStore.load(fileName)
+        machine = cls(interval=state['interval'], movingAverageSize=state['movingAverageSize'],
+                      indicators=state['viewIndicators'])
+        machine._store = store
+        machine.engine.setStore(store)
+        machine.engine.restore(state['engine'])
+        machine.requireIndicators(machine.viewIndicators + ['BollingerGap'])
+        machine.newRound = state['newRound']
+        return machine
+
+    def saveSnapshot(self, fileName: str):
+        """Writes the candles, the indicators running state and the open candle into a binary file,
+        :func:`fromSnapshot` then resumes from it without any replay.
+
+        :param fileName: Name of the snapshot file (.npz).
+        :type fileName: str
+        """
+        self._store.save(fileName, {
+            'interval': self.interval,
+            'movingAverageSize': self.movingAverageSize,
+            'viewIndicators': self.viewIndicators,
+            'newRound': self.newRound,
+            'engine': self.engine.snapshot()
+        })
+
+    def __init__(self, data: gen.NDFrame = None, interval: int = 1440, movingAverageSize: int = 30,
+                 indicators: list[str] = None):
         """Constructs GBDataMachine with the given data formatted like a csv [epochTime, price].
 
         :param data: Structure containing prices and dates.
@@ -56,28 +116,34 @@ class LongTermDataMachine:
         :type interval: int
         :param movingAverageSize: Number of data taken into account to calculate a moving average. (default is 30)
         :type movingAverageSize: int
+        :param indicators: Indicator columns shown by :attr:`ordered`, strategies require their own
+            with :func:`requireIndicators`. (default is :attr:`DEFAULT_INDICATORS`)
+        :type indicators: list[str]
         """
         self.movingAverageSize = movingAverageSize
         self.interval = interval
         self.intervalJustClosed = False
+        self.viewIndicators = list(indicators if indicators is not None else self.DEFAULT_INDICATORS)
         self.roundTemp = {
             'Date': 0,
             'Open': 0,
             'High': 0,
             'Low': 0,
-            'Close': 0,
-            'SMMA5': None,
-            'SMMA40': None
+            'Close': 0
         }
-        self.newRound = pd.DataFrame(self.roundTemp, index=[0])
+        self.newRound = self.roundTemp.copy()
+        # Date of the last candle returned by convertForGraphicViews()
+        self.graphicViewDate = None
+        self._store = GBCandleStore(self.CANDLE_COLUMNS)
+        # Indicators are only computed once a strategy or a viewer asked for them
+        self.engine = GBIndicatorEngine(self._store, {'movingAverageSize': movingAverageSize})
+        # Columns of the graphic views, kept up to date with the candles
+        self.requireIndicators(self.viewIndicators + ['BollingerGap'])
         if data is not None:
             if 'Low' not in data:
-                self.ordered = pd.DataFrame()
                 self.parseToInterval(data)
             else:
                 self.ordered = data
-        else:
-            self.ordered = pd.DataFrame()
         return
     
     def parseToInterval(self, data: pd.DataFrame):
@@ -99,20 +165,63 @@ class LongTermDataMachine:
         if not required_columns.issubset(data.columns):
             raise ValueError(f"Error: DataFrame must contain the required columns: {required_columns}")
 
-        # Process each row in the DataFrame
-        for i, row in data.iterrows():
-            # Ensure valid data in each row
-            try:
-                epoch_time = float(row['epoch'])
-                price = float(row['price'])
-                self._append(epoch_time, price)
-            except (ValueError, TypeError) as e:
-                print(f"Error processing row {i}: {e}")
-                continue  # Skip invalid rows
+        # Ensure valid data in each row
+        epochs = pd.to_numeric(data['epoch'], errors='coerce')
+        prices = pd.to_numeric(data['price'], errors='coerce')
+        invalid = epochs.isna() | prices.isna() | (epochs <= 0)
+        for i in data.index[invalid.to_numpy()]:
+            print(f"Error processing row {i}: invalid epoch or price")  # Skip invalid rows
+        self._appendMany(epochs[~invalid].to_numpy(dtype=float), prices[~invalid].to_numpy(dtype=float))
 
         # Call the update method after processing
         self.update()
 
+    def _appendMany(self, epochTimes: np.ndarray, prices: np.ndarray):
+        """
+        Vectorized version of `_append`, builds every candle in one pass.
+
+        Args:
+            epochTimes (np.ndarray): The epoch times in seconds.
+            prices (np.ndarray): The price values.
+
+        Returns:
+            None
+        """
+        candles = GBUtilities.ticksToCandles(epochTimes, prices, self.interval, self.newRound['Date'])
+        if len(candles['Date']) == 0:
+            return
+
+        first = 0
+        if self.newRound['Date'] != 0 and candles['Date'][0] == self.newRound['Date']:
+            # First ticks belong to the candle being built
+            self.newRound['High'] = max(self.newRound['High'], float(candles['High'][0]))
+            self.newRound['Low'] = min(self.newRound['Low'], float(candles['Low'][0]))
+            self.newRound['Close'] = float(candles['Close'][0])
+            first = 1
+
+        if first < len(candles['Date']):
+            self._upsertOpenRound()
+            self._store.appendMany({column: values[first:-1] for column, values in candles.items()})
+            self.newRound = {column: float(values[-1]) for column, values in candles.items()}
+            self.intervalJustClosed = True
+
+    def _upsertOpenRound(self):
+        """
+        Writes the candle being built as the last row of the store.
+
+        Returns:
+            None
+        """
+        if self.newRound['Date'] == 0:
+            return
+        if len(self._store) == 0 or self._store.last('Date') != self.newRound['Date']:
+            self._store.append(self.newRound)
+            self.intervalJustClosed = True
+        else:
+            self._store.setLast(['High', 'Low', 'Close', 'Open'], [
+                self.newRound['High'], self.newRound['Low'], self.newRound['Close'], self.newRound['Open']
+            ])
+
     # def parseToInterval(self, data: gen.NDFrame):
     #     for i, row in data.iterrows():
     #         self._append(row['epoch'], row['price'])
@@ -134,94 +243,26 @@ class LongTermDataMachine:
             raise ValueError(f"Invalid `epochTime`: {epochTime}. Must be a positive number.")
         if not isinstance(price, (float, int)):
             raise ValueError(f"Invalid `price`: {price}. Must be a number.")
-
-        # Ensure `self.newRound` is initialized properly
-        if not hasattr(self, 'newRound') or self.newRound is None:
-            raise AttributeError("`self.newRound` is not initialized.")
-        if not hasattr(self, 'ordered'):
-            raise AttributeError("`self.ordered` is not initialized.")
         if not hasattr(self, 'interval') or not isinstance(self.interval, (int, float)) or self.interval <= 0:
             raise ValueError("`self.interval` must be a positive number.")
 
         # Handle interval-based logic
-        # Extract `Date` from `self.newRound` and ensure it's scalar
-        if isinstance(self.newRound, dict):
-            # Extract from a dictionary
-            new_round_date = self.newRound.get('Date', 0)
-        elif isinstance(self.newRound, pd.DataFrame):
-            # Extract the first element from a DataFrame
-            if 'Date' in self.newRound.columns and not self.newRound.empty:
-                new_round_date = self.newRound.iloc[0]['Date']
-            else:
-                new_round_date = 0
-        else:
-            raise ValueError("Unsupported type for `self.newRound`.")
-
-        # Ensure `new_round_date` is scalar
-        if isinstance(new_round_date, pd.Series):
-            new_round_date = new_round_date.iloc[0]
-
-        # Perform the comparison safely
-        if new_round_date != 0 and epochTime >= new_round_date + 60 * self.interval:
-            # Ensure the last row of `self.ordered` has a scalar `Date`
-            last_date = self.ordered.iloc[-1]['Date'] if not self.ordered.empty else None
-            if last_date is None or last_date != new_round_date:
-                # Append `self.newRound` to `self.ordered`
-                try:
-                    # Ensure `self.newRound` is in the correct format for concatenation
-                    if isinstance(self.newRound, pd.DataFrame):
-                        # If it's already a DataFrame, use the first row
-                        new_row = self.newRound.iloc[0].to_dict()
-                    elif isinstance(self.newRound, pd.Series):
-                        # If it's a Series, convert it to a dictionary
-                        new_row = self.newRound.to_dict()
-                    elif isinstance(self.newRound, dict):
-                        # If it's a dictionary, use it directly
-                        new_row = self.newRound
-                    else:
-                        raise ValueError("`self.newRound` must be a dict, Series, or DataFrame.")
-
-                    # Create a new DataFrame row and append it to `self.ordered`
-                    self.ordered = pd.concat([self.ordered, pd.DataFrame([new_row])], ignore_index=True)
-                    self.intervalJustClosed = True
-                except Exception as e:
-                    print(f"Error appending to `self.ordered`: {e}")
-                    return
-
-            # Reset `self.newRound` using `self.roundTemp`
-            if hasattr(self, 'roundTemp') and isinstance(self.roundTemp, dict):
-                self.newRound = self.roundTemp.copy()
-            else:
-                raise AttributeError("`self.roundTemp` is not properly initialized.")
+        if self.newRound['Date'] != 0 and epochTime >= self.newRound['Date'] + 60 * self.interval:
+            if len(self._store) == 0 or self._store.last('Date') != self.newRound['Date']:
+                self._store.append(self.newRound)
+                self.intervalJustClosed = True
+            self.newRound = self.roundTemp.copy()
 
         # Update `self.newRound` with the new price
         self.newRound['Close'] = price
-        # Safely extract the 'Date' value from `self.newRound`
-        new_round_date2 = self.newRound.get('Date', 0)
-
-        # If `self.newRound` is a DataFrame or Series, ensure we extract the scalar
-        if isinstance(new_round_date2, pd.Series) or isinstance(new_round_date2, pd.DataFrame):
-            new_round_date2 = new_round_date2.iloc[0] if not new_round_date2.empty else 0
-
-        # Perform the comparison with the scalar value
-        if new_round_date2 == 0:
+        if self.newRound['Date'] == 0:
             self.newRound['Date'] = epochTime - (epochTime % (self.interval * 60))
             self.newRound['Open'] = self.newRound['High'] = self.newRound['Low'] = price
 
         # Update High and Low prices
-        low = self.newRound['Low']
-        high = self.newRound['High']
-
-        # Handle cases where `low` or `high` are pandas Series
-        if isinstance(low, pd.Series):
-            low = low.iloc[0]
-        if isinstance(high, pd.Series):
-            high = high.iloc[0]
-
-        # Perform comparisons with scalar values
-        if low > price:
+        if self.newRound['Low'] > price:
             self.newRound['Low'] = price
-        elif high < price:
+        elif self.newRound['High'] < price:
             self.newRound['High'] = price
 
     # def _append(self, epochTime: float, price: float):
@@ -253,15 +294,13 @@ class LongTermDataMachine:
         :param close: close price
         :type close: float
         """
-        self.ordered = pd.concat([self.ordered, pd.DataFrame({
-            'Date': date,
+        self._store.append({
+            'Date': float(date),
             'Open': float(open),
             'High': float(high),
             'Low': float(low),
-            'Close': float(close),
-            'SMMA5': None,
-            'SMMA40': None
-        }, index=[0])], ignore_index=True)
+            'Close': float(close)
+        })
 
     def appendFilename(self, fileName):
         """Appends a file into the data machine.
@@ -274,13 +313,15 @@ class LongTermDataMachine:
 
     def appendDataframe(self, dataFrame: pd.DataFrame):
         """Same as parseToInterval but with a different name"""
-        for i, row in dataFrame.iterrows():
-            self._append(row['epoch'], row['price'])
-        self.update()
+        self.parseToInterval(dataFrame)
 
     def appendFormatedDataframe(self, dataFrame: pd.DataFrame):
-        for i, row in dataFrame.iterrows():
-            self.appendFormated(row['Date'], row['Open'], row['High'], row['Low'], row['Close'])
+        """Appends already formated rows in one pass, the indicators are computed once at the end.
+
+        :param dataFrame: dataframe containing the 'Date', 'Open', 'High', 'Low' and 'Close' columns
+        :type dataFrame: pandas.DataFrame
+        """
+        self._store.appendMany({column: dataFrame[column].to_numpy(dtype=float) for column in self.CANDLE_COLUMNS})
         self.update()
 
     def append(self, epochTime: float, price: float, shouldPrint: bool = False):
@@ -296,169 +337,80 @@ class LongTermDataMachine:
         self._append(epochTime, price)
         self.update(shouldPrint)
 
-    def update(self, shouldPrint: bool = False):
-        """Updates the GBDataMachine and computes bollinger bands, moving averages, etc."""
-        required_columns = ['Date', 'High', 'Low', 'Close', 'Open']
-        
-        # Ensure required columns exist in `self.ordered`
-        if not all(col in self.ordered.columns for col in required_columns):
-            print("Error: Required columns are missing in `self.ordered`.")
-            return
+    def requireIndicators(self, columns):
+        """Activates the indicators computing `columns`, they are computed over every candle
+        the first time and kept up to date afterwards. Candle columns are ignored.
 
-        # Flatten `self.newRound` if it's multi-dimensional
-        if isinstance(self.newRound, pd.DataFrame):
-            if self.newRound.shape[0] == 1:  # Single row DataFrame
-                new_row = self.newRound.iloc[0].to_dict()
-            else:
-                print("Error: `self.newRound` contains multiple rows.")
-                return
-        elif isinstance(self.newRound, dict):
-            new_row = self.newRound
-        else:
-            print("Error: `self.newRound` must be a dictionary or a single-row DataFrame.")
-            return
+        :param columns: names of the columns needed ('SMMA5', 'EMA20', ...)
+        :type columns: list[str]
+        :exception: KeyError if a column is not computed by any registered indicator
+        """
+        self.engine.require(columns)
+
+    def indicator(self, column: str) -> np.ndarray:
+        """Returns the values of an indicator column (no copy), activating it if needed.
+
+        :param column: name of the column ('SMMA5', ...)
+        :type column: str
+        """
+        self.requireIndicators([column])
+        return self._store.column(column)
+
+    def candle(self, offset: int = 1, indicators: list[str] = ()) -> Union[dict, None]:
+        """Returns the `offset`-th candle starting from the end with the given indicators,
+        activating them if needed.
+
+        :param offset: 1 for the candle still open, 2 for the last closed one, ... (default is 1)
+        :type offset: int
+        :param indicators: names of the indicator columns to add to the candle
+        :type indicators: list[str]
+        :returns: values by column name, None if there are not enough candles
+        :rtype: dict
+        """
+        self.requireIndicators(indicators)
+        if offset > len(self._store):
+            return None
+        return {column: self._store.last(column, offset) for column in self.CANDLE_COLUMNS + list(indicators)}
 
-        # Check if `new_row` contains the required keys
-        if not all(key in new_row for key in required_columns):
-            print("Error: `self.newRound` is missing required keys.")
+    def update(self, shouldPrint: bool = False):
+        """Updates the GBDataMachine and computes the required indicators (SMMA5, SMMA40, ...).
+
+        Only the rows added since the last update are computed, continuing from the
+        indicators running state."""
+        self._upsertOpenRound()
+        if len(self._store) == 0:
+            print("Error: Required columns are missing in `self.ordered`.")
             return
 
-        # Handle adding or updating rows
-        if self.ordered.empty or self.ordered.iloc[-1]['Date'] != new_row['Date']:
-            # Append the new row
-            self.ordered = pd.concat([self.ordered, pd.DataFrame([new_row])], ignore_index=True)
-            self.intervalJustClosed = True
-        else:
-            # Update the last row with new values
-            last_index = self.ordered.index[-1]
-            self.ordered.loc[last_index, ['High', 'Low', 'Close', 'Open']] = (
-                new_row['High'], new_row['Low'], new_row['Close'], new_row['Open']
-            )
+        self.engine.computeRows()
 
         # Print the last row if required
-        if shouldPrint and not self.ordered.empty:
-            print(self.ordered.iloc[[-1]])
-
-    # def update(self, shouldPrint: bool = False):
-    #     """Updates the GBDataMachine and computes bollinger bands, moving averages, ..."""
-    #     if all(col in self.ordered.columns for col in ['Date', 'High', 'Low', 'Close', 'Open']):
-    #         if self.ordered.empty or self.ordered.iloc[-1]['Date'] != self.newRound['Date']:
-    #             # Append the new row, ensuring it's in DataFrame format
-    #             new_row = pd.DataFrame([self.newRound])
-    #             self.ordered = pd.concat([self.ordered, new_row], ignore_index=True)
-    #             self.intervalJustClosed = True
-    #         else:
-    #             # Update the last row with new values
-    #             last_index = self.ordered.index[-1]
-    #             self.ordered.at[last_index, 'High'] = self.newRound['High']
-    #             self.ordered.at[last_index, 'Low'] = self.newRound['Low']
-    #             self.ordered.at[last_index, 'Close'] = self.newRound['Close']
-    #             self.ordered.at[last_index, 'Open'] = self.newRound['Open']
-        # if self.newRound['Date'] != 0:
-        #     if len(self.ordered.index) == 0 or self.ordered.at[len(self.ordered) - 1, 'Date'] != self.newRound['Date']:
-        #         self.ordered = pd.concat([self.ordered, self.newRound], ignore_index=True)
-        #         self.intervalJustClosed = True
-        #     else:
-        #         self.ordered.at[len(self.ordered) - 1, 'High'] = self.newRound['High']
-        #         self.ordered.at[len(self.ordered) - 1, 'Low'] = self.newRound['Low']
-        #         self.ordered.at[len(self.ordered) - 1, 'Close'] = self.newRound['Close']
-        #         self.ordered.at[len(self.ordered) - 1, 'Open'] = self.newRound['Open']
-
-        def calculate_sum(i: int, wSize: int):
-            """Calculate the sum of 'Close' values over the given window size."""
-            if i < wSize - 1:
-                return 0  # Not enough data to calculate the sum
-            return self.ordered.iloc[i - wSize + 1:i + 1]['Close'].sum()
-
-        def smma(i: int, wSize: int):
-            """
-            Calculate the Smoothed Moving Average (SMMA) at index `i` with window size `wSize`.
-
-            Args:
-                i (int): The current index in the DataFrame.
-                wSize (int): The window size for SMMA.
-
-            Returns:
-                float or None: The calculated SMMA value, or None if it cannot be calculated.
-            """
-            # Validate the window size
-            if wSize <= 0:
-                print("Error: Window size (wSize) must be a positive integer.")
-                return None
-            
-            # Ensure there is enough data to calculate SMMA
-            if i < wSize - 1:
-                return None  # Not enough data to calculate SMMA
-
-            if i == wSize - 1:
-                # Initial SMMA calculation as the simple average
-                sum_close = calculate_sum(i, wSize)
-                if wSize == 0 or sum_close is None:  # Avoid division by zero
-                    return None
-                return np.round(sum_close / wSize, decimals=10)
-            
-            # Retrieve the previous SMMA value safely
-            prev_smma = self.ordered.iloc[i - 1].get(f'SMMA{wSize}', 0)
-            close_price = self.ordered.iloc[i]['Close']
-            
-            if prev_smma is None or close_price is None:  # Ensure valid numeric inputs
-                return None
-            
-            # Calculate the SMMA and ensure no division by zero
-            denominator = wSize + 1
-            if denominator == 0:
-                print("Error: Division by zero in SMMA calculation.")
-                return None
-            
-            return np.round((prev_smma * wSize + close_price) / denominator, decimals=10)
-
-        # Ensure there is enough data to calculate SMMA5
-        if len(self.ordered) >= 5:
-            new_smma5 = smma(len(self.ordered) - 1, 5)
-            self.ordered.loc[self.ordered.index[-1], 'SMMA5'] = new_smma5
-
-        # Ensure there is enough data to calculate SMMA40
-        if len(self.ordered) >= 40:
-            new_smma40 = smma(len(self.ordered) - 1, 40)
-            self.ordered.loc[self.ordered.index[-1], 'SMMA40'] = new_smma40
-
-        # def sum(i: int, wSize: int):
-        #     s = 0
-        #     for j in range(0, wSize): s += self.ordered.iloc[i - j]['Close']
-        #     return s
-
-        # def smma(i: int, wSize: int):
-        #     if i == wSize:
-        #         return np.round(sum(i, wSize) / wSize, decimals=10)
-        #     return np.round((self.ordered.iloc[i - 1]['SMMA' + str(wSize + 1)] or 0 * wSize + self.ordered.iloc[i]['Close']) / (wSize + 1), decimals=10)
-
-        # size = len(self.ordered.index)
-        # if size < 5: return
-        # newSm = smma(size - 1, 5 - 1)
-        # self.ordered.loc[self.ordered.index[-1], 'SMMA5'] = newSm
-
-        # if size < 40: return
-        # newSm = smma(size - 1, 40 - 1)
-        # self.ordered.loc[self.ordered.index[-1], 'SMMA40'] = newSm
-
         if shouldPrint:
-            last = self.ordered.iloc[-1]
-            print(last)
+            print(self._store.row(-1))
 
-    def convertForGraphicViews(self):
-        """Convert data and format it for :ref:`GraphViewer<GraphViewer>`.
+    def convertForGraphicViews(self, onlyNew: bool = False):
+        """Convert data and format it for :ref:`GraphViewer<GraphViewer>`. Both dataframes are
+        read-only views on the candle store indexed by date, nothing is copied.
 
+        :param onlyNew: only returns the candles added since the last call, starting with the last
+            candle it returned as it may have changed since (default is False)
+        :type onlyNew: bool
         :returns: (DataFrame containing data for Plot 1, Same for Plot 2)
         :rtype: (pandas.DataFrame, pandas.DataFrame)
         """
-        data1, data2 = copy.deepcopy(self.ordered), copy.deepcopy(self.bollingerGaps)
-        data1, data2 = data1.iloc[self.movingAverageSize:], data2.iloc[self.movingAverageSize:]
-        data1["Date"], data2["Date"] = pd.to_datetime(data1["Date"], unit='s'), pd.to_datetime(data2["Date"], unit='s')
-        data1, data2 = data1.set_index('Date'), data2.set_index('Date')
+        start = self.movingAverageSize
+        if onlyNew and self.graphicViewDate is not None:
+            start = max(start, int(np.searchsorted(self._store.column('Date'), self.graphicViewDate)))
+        start = min(start, len(self._store))
+        if start < len(self._store):
+            self.graphicViewDate = float(self._store.column('Date')[-1])
+        # Candles and indicators shown, indexed by date, the Bollinger gaps go in the second plot
+        data1 = self._store.view(start, self.CANDLE_COLUMNS[1:] + self.viewIndicators)
+        data2 = pd.DataFrame({'Value': self._store.view(start, ['BollingerGap'])['BollingerGap']}, copy=False)
         return data1, data2
 
     def memoryUsage(self):
-        return self.ordered.memory_usage(deep=True).sum()
+        return self._store.memoryUsage()
 
     def printPrices(self):
         print(self.ordered.to_csv(index=False))
@@ -467,7 +419,7 @@ class LongTermDataMachine:
         return self.bollingerGaps.iloc[[-1]].iloc[0]['Value']
 
     def lastPrice(self):
-        return self.ordered.iloc[-1]["Close"] if len(self.ordered.index) != 0 else None
+        return self._store.last('Close') if len(self._store) != 0 else None
 
     def intervalClosed(self):
         ret = self.intervalJustClosed
@@ -2,6 +2,7 @@
 ### GreedyBoyDecisionMaker class
 ###
 
+import math
 import time
 import tempfile
 import pandas as pd
@@ -9,8 +10,8 @@ import requests
 import csv
 
 from LongTermDataMachine import LongTermDataMachine
+from GBClients import GBClientFactory
 from KrakenApi import KrakenApi
-from github import Github
 from GBConstants import GBConstants
 
 class LongTermDecisionMaker:
@@ -75,7 +76,7 @@ class LongTermDecisionMaker:
                 for result in resp:
                     self.dataMachine.appendFormated(result[0], result[1], result[2], result[3], result[4])
 
-        if self.dataMachine.ordered.size == 0:
+        if len(self.dataMachine.store) == 0:
             self.dataFiles = dict()
             try:
                 self.dataFiles[self.initial] = None
@@ -104,7 +105,7 @@ class LongTermDecisionMaker:
         #################################
         # Trying to add data from today
         try:
-            lastDate = self.dataMachine.ordered.iloc[-1]["Date"]
+            lastDate = self.dataMachine.store.last('Date')
             #self.dataMachine = GBDataMachine.fromFilename(self.dataPathWrite if not empty else self.todayDataFilename)
             todayData = pd.read_csv(self.todayDataFilename, parse_dates=True)
             todayData = todayData.drop(todayData[todayData.epoch < lastDate].index)
@@ -121,13 +122,13 @@ class LongTermDecisionMaker:
         #print(self.dataMachine.ordered.to_csv(index=False))
 
     def AddOrderMax(self, buyOrSell: str):
-        price = self.dataMachine.ordered.iloc[-1]["Close"]  # Gets Last price registered
+        price = self.dataMachine.lastPrice()  # Gets Last price registered
         amount = self.fiatBalance / price if buyOrSell == "buy" else self.cryptoBalance
         self.AddOrder(buyOrSell, amount, price)
 
     def AddOrder(self, buyOrSell: str, amount, price = None):
         if not price:
-            price = self.dataMachine.ordered.iloc[-1]["Close"] # Gets Last price registered
+            price = self.dataMachine.lastPrice() # Gets Last price registered
 
         if self.buySellLimit != 0:
             maxAmount = self.buySellLimit / price # Gets max amount to buy or sell
@@ -190,30 +191,43 @@ class LongTermDecisionMaker:
         ########################################################################
         ## SMMA Strategy
         def smmaStrategy():
-            last = self.dataMachine.ordered.iloc[-1]
+            last = self.dataMachine.candle(1, ['SMMA5', 'SMMA40'])
+            if last is None:
+                return
             closePrice, smma5, smma40 = last['Close'], last['SMMA5'], last['SMMA40']
             #print(time.strftime('%d/%m/%Y %H:%M:%S', time.gmtime(self.dataMachine.ordered.iloc[-1]['Date'])) +
             #      " || Close: {0:6.5f}, SMMA5: {1:6.5f}, SMMA40: {2:6.5f}".format(closePrice, smma5, smma40))
-            if smma5 is None or smma40 is None:
+            if math.isnan(smma5) or math.isnan(smma40):
                 return
             if smma5 == 0 or smma40 == 0:
                 return
             
             if self.buyOrSellPosition == "buy":
                 if smma5 > smma40 and smma5 / smma40 >= 1.02:
-                    print(time.strftime('%d/%m/%Y %H:%M:%S', time.gmtime(self.dataMachine.ordered.iloc[-1]['Date']))
+                    print(time.strftime('%d/%m/%Y %H:%M:%S', time.gmtime(last['Date']))
                           + " || Close: {0:6.5f}, SMMA5: {1:6.5f}, SMMA40: {2:6.5f}".format(closePrice, smma5, smma40))
                     self.AddOrderMax("buy")
             elif self.buyOrSellPosition == "sell":
                 if smma5 < smma40 and smma40 / smma5 >= 1.02:
-                    print(time.strftime('%d/%m/%Y %H:%M:%S', time.gmtime(self.dataMachine.ordered.iloc[-1]['Date']))
+                    print(time.strftime('%d/%m/%Y %H:%M:%S', time.gmtime(last['Date']))
                           + " || Close: {0:6.5f}, SMMA5: {1:6.5f}, SMMA40: {2:6.5f}".format(closePrice, smma5, smma40))
                     self.AddOrderMax("sell")
 
         smmaStrategy()
 
+    @property
+    def greedyBoyRepo(self):
+        """Github repository of the data, built on first use by :attr:`clients`."""
+        return self.clients.greedyBoyRepo
+
+    @property
+    def krakenApi(self) -> KrakenApi:
+        """Kraken API, built on first use by :attr:`clients`."""
+        return self.clients.krakenApi
+
     def __init__(self, apiKey, apiPrivateKey, githubToken, repoName, dataBranchName, initial, todayDataFilename,
-                 ordersTempPath, ordersGithubPath, krakenToken = None, bollingerTolerance: float = 20, testTime: float = None):
+                 ordersTempPath, ordersGithubPath, krakenToken = None, bollingerTolerance: float = 20, testTime: float = None,
+                 clients: GBClientFactory = None):
         self.initial = initial
         self.dataPathWrite = tempfile.gettempdir() + "/data" + initial + "_old.csv"
         self.githubDataFilename = time.strftime(GBConstants.DATE_FORMAT, time.localtime(time.time() - 86400)) + ".csv"
@@ -229,12 +243,8 @@ class LongTermDecisionMaker:
         # For testing purposes
         self.testTime = testTime
 
-        # Github repo
-        g = Github(githubToken)
-        self.greedyBoyRepo = g.get_repo(repoName)
-
-        # Kraken API
-        self.krakenApi = KrakenApi(apiKey, apiPrivateKey, krakenToken)
+        # Github repo and Kraken API, built on first use
+        self.clients = clients if clients else GBClientFactory(apiKey, apiPrivateKey, githubToken, repoName, krakenToken)
 
         # Decision making
         self.lastOrder, self.lastData = None, None
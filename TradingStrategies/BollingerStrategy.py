@@ -1,2 +1,157 @@
-class BollingerStrategy:
-    pass
\ No newline at end of file
+import numpy as np
+import pandas as pd
+import time
+import GBKernels
+from GBConstants import GBConstants
+from GBUtilities import GBUtilities
+from IGreedyBoyDecisionMaker_module import IGreedyBoyDecisionMaker
+from IGreedyBoyStrategy_module import IGreedyBoyStrategy
+
+class BollingerStrategy(IGreedyBoyStrategy):
+    """
+    Buys when the price bounces back from under the low bollinger band and sells when it falls back from
+    over the high bollinger band. The state is the highest and lowest bollinger gaps seen since the last
+    order, so each tick costs the same whatever the history length. An order not followed by the expected
+    move after one candle is reversed.
+    """
+
+    def __init__(self, decisionMaker: IGreedyBoyDecisionMaker, tolerance: float = 20, interval: int = 15):
+        """
+        :param decisionMaker: The decision maker placing the orders.
+        :param tolerance: Distance to the bands (in bollinger percent) under which the ticks are ignored,
+            and bounce needed to place an order. (default is 20)
+        :param interval: Time gap of the candles (in min), an order is reversed once it is that old. (default is 15)
+        """
+        self.decisionMaker = decisionMaker
+        self.tolerance, self.interval = tolerance, interval
+        self.highest = self.lowest = 50
+        self.lastOrder = None
+
+    @property
+    def indicators(self) -> list[str]:
+        """
+        The indicator columns read by the strategy.
+        :return: The bollinger gap column.
+        """
+        return ['BollingerGap']
+
+    def onCandleClose(self, candle: dict, indicators: dict):
+        """
+        Nothing to do, the strategy follows the candle still open in :func:`onTick`.
+        """
+        pass
+
+    def onTick(self, epochTime: float, price: float):
+        """
+        Checks the bollinger gap of the candle still open after each tick.
+        :param epochTime: The timestamp of the tick.
+        :param price: The price of the tick.
+        """
+        if not self.decisionMaker.buyOrSellPosition:
+            return
+        current = self.decisionMaker.candle(1, self.indicators)
+        curBolVal = current['BollingerGap']
+        # The last order of the decision maker, also read from the reports after a restart or placed by another caller
+        order = self.decide(self.decisionMaker.buyOrSellPosition, epochTime, price, curBolVal, self.decisionMaker.lastOrder)
+        if order is None:
+            return
+        print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(current['Date'])))
+        print("Current bollinger value :", curBolVal)
+        self.decisionMaker.AddOrderMax(order)
+
+    def decide(self, position: str, epochTime: float, price: float, curBolVal: float, lastOrder: dict = None) -> str:
+        """
+        Updates the state with a tick and returns the order to place, if any.
+        :param position: The position of the decision maker ("buy" or "sell").
+        :param epochTime: The timestamp of the tick.
+        :param price: The price of the tick.
+        :param curBolVal: The bollinger gap of the candle still open.
+        :param lastOrder: The last order placed ('Date', 'Price', 'Order'), reversed if it went the wrong way.
+            (default is None, the last order returned by decide, like in :func:`signals`)
+        :return: "buy", "sell" or None.
+        """
+        lastOrder = lastOrder if lastOrder is not None else self.lastOrder
+        if curBolVal <= 100 - self.tolerance and curBolVal >= self.tolerance:
+            return None
+
+        if curBolVal > self.highest: self.highest = curBolVal
+        elif curBolVal < self.lowest: self.lowest = curBolVal
+
+        order = None
+        if lastOrder and lastOrder['Date'] + self.interval * 60 < epochTime:
+            # Reverses an order that went the wrong way
+            if lastOrder['Order'] == "buy" and price < lastOrder['Price']:
+                order = "sell"
+            elif lastOrder['Order'] == "sell" and price > lastOrder['Price']:
+                order = "buy"
+        if order is None:
+            if position == "buy" and self.lowest < 0 and curBolVal - self.lowest >= self.tolerance:
+                order = "buy"
+            elif position == "sell" and self.highest > 100 and self.highest - curBolVal >= self.tolerance:
+                order = "sell"
+        if order is not None:
+            self.lastOrder = {'Date': epochTime, 'Price': price, 'Order': order}
+            self.highest = self.lowest = 50
+        return order
+
+    @staticmethod
+    def tickGaps(epochs: np.ndarray, prices: np.ndarray, interval: int = 15, movingAverageSize: int = 30) -> np.ndarray:
+        """
+        Returns the bollinger gap of the candle still open after each tick, as read by :func:`onTick`,
+        computed for every tick at once from running sums of the close prices.
+        :param epochs: The timestamps of the ticks.
+        :param prices: The prices of the ticks.
+        :param interval: The time gap of the candles (in min).
+        :param movingAverageSize: The size of the moving average window.
+        :return: The bollinger gaps (NaN until `movingAverageSize - 1` candles are closed).
+        """
+        epochs, prices = np.asarray(epochs, dtype=float), np.asarray(prices, dtype=float)
+        if len(epochs) == 0:
+            return np.empty(0)
+        candles = GBUtilities.ticksToCandles(epochs, prices, interval)
+        starts = GBKernels.bucketStarts(epochs, interval)[1]
+        candleIndexes = np.repeat(np.arange(len(starts)), np.diff(np.concatenate([starts, [len(prices)]])))
+
+        # Window of the candle k: the closes of the candles k - size + 1 .. k - 1 and the price of the tick
+        size = movingAverageSize
+        shift = candles['Close'][0]
+        closes = candles['Close'] - shift
+        totals = np.concatenate([[0.0], np.cumsum(closes)])
+        squares = np.concatenate([[0.0], np.cumsum(closes * closes)])
+        first = np.maximum(candleIndexes - size + 1, 0)
+        x = prices - shift
+        total = totals[candleIndexes] - totals[first] + x
+        square = squares[candleIndexes] - squares[first] + x * x
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (square - total * total / size) / (size - 1)
+            std = np.sqrt(np.maximum(variance, 0.0))
+            mean = total / size + shift
+            hBand, lBand = mean + std * 2, mean - std * 2
+            gaps = np.round((prices - lBand) / (hBand - lBand) * 100, 2)
+        gaps[(hBand == lBand) | (candleIndexes < size - 1)] = np.nan
+        return gaps
+
+    @staticmethod
+    def signals(epochs: np.ndarray, prices: np.ndarray, gaps: np.ndarray, tolerance: float = 20, interval: int = 15,
+                buyFirst: bool = True) -> pd.DataFrame:
+        """
+        Batch counterpart of :func:`onTick` for backtests, each order of the whole balance switching the position.
+        Only the ticks close to or beyond the bands are visited, the others are filtered out at once.
+        :param epochs: The timestamps of the ticks.
+        :param prices: The prices of the ticks.
+        :param gaps: The bollinger gaps of the candle still open after each tick, see :func:`tickGaps`.
+        :param tolerance: See the constructor.
+        :param interval: See the constructor.
+        :param buyFirst: True if the strategy starts waiting to buy, False if it starts waiting to sell.
+        :return: A DataFrame with one row per order: 'Date' (timestamp of the tick), 'Price' and 'Order'.
+        """
+        epochs, prices, gaps = np.asarray(epochs, dtype=float), np.asarray(prices, dtype=float), np.asarray(gaps, dtype=float)
+        strategy = BollingerStrategy(None, tolerance, interval)
+        position = "buy" if buyFirst else "sell"
+        orders = []
+        for i in np.flatnonzero(~((gaps <= 100 - tolerance) & (gaps >= tolerance))):
+            order = strategy.decide(position, epochs[i], prices[i], gaps[i])
+            if order is not None:
+                orders.append((epochs[i], prices[i], order))
+                position = "sell" if order == "buy" else "buy"
+        return pd.DataFrame(orders, columns=['Date', 'Price', 'Order'])
@@ -1,12 +1,129 @@
+import numpy as np
 import pandas as pd
 import time
+import GBKernels
 from GBConstants import GBConstants
 from IGreedyBoyDecisionMaker_module import IGreedyBoyDecisionMaker
+from IGreedyBoyStrategy_module import IGreedyBoyStrategy
 
-class EMACrossover:
-    def __init__(self, decisionMaker: IGreedyBoyDecisionMaker):
+class EMACrossover(IGreedyBoyStrategy):
+    def __init__(self, decisionMaker: IGreedyBoyDecisionMaker, low: int = 5, high: int = 40, threshold: float = 1.000):
+        """
+        :param decisionMaker: The decision maker placing the orders.
+        :param low: The low EMA value used when notified by a data machine. (default is 5)
+        :param high: The high EMA value used when notified by a data machine. (default is 40)
+        :param threshold: The minimum ratio between the EMAs to place an order, see :func:`GBBacktester.sweep`. (default is 1.000)
+        :exception: AssertionError if low or high is not a positive integer or low >= high
+        """
+        assert isinstance(low, int) and low > 0, "Low EMA value must be a positive integer"
+        assert isinstance(high, int) and high > 0, "High EMA value must be a positive integer"
+        assert low < high, "Low EMA value must be lower than high EMA value"
         self.decisionMaker = decisionMaker
-        self.emaValues = GBConstants.getEMAValues()
+        self.low, self.high = low, high
+        self.threshold = threshold
+
+    @property
+    def indicators(self) -> list[str]:
+        """
+        The indicator columns given to onCandleClose.
+        :return: The low and high EMA columns.
+        """
+        return self.requiredIndicators(self.low, self.high)
+
+    def onCandleClose(self, candle: dict, indicators: dict):
+        """
+        Event counterpart of :func:`run` with the low and high EMA values of the constructor.
+        :param candle: The values of the closed candle.
+        :param indicators: The values of the EMA columns of the closed candle.
+        """
+        if not self.decisionMaker.buyOrSellPosition:
+            return
+        self.__decide(candle['Close'], self.low, indicators['EMA' + str(self.low)],
+                      self.high, indicators['EMA' + str(self.high)])
+
+    def __decide(self, closePrice: float, low: int, emaLow: float, high: int, emaHigh: float):
+        if self.decisionMaker.buyOrSellPosition == "buy":
+            if emaLow > emaHigh and emaLow / emaHigh >= self.threshold:
+                print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.candle()['Date'])) +
+                        " || Close: {0:6.5f}, EMA{1}: {2:6.5f}, EMA{3}: {4:6.5f}".format(closePrice, low, emaLow, high, emaHigh))
+                self.decisionMaker.AddOrderMax("buy")
+        elif self.decisionMaker.buyOrSellPosition == "sell":
+            if emaLow < emaHigh and emaHigh / emaLow >= self.threshold:
+                print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.candle()['Date'])) +
+                        " || Close: {0:6.5f}, EMA{1}: {2:6.5f}, EMA{3}: {4:6.5f}".format(closePrice, low, emaLow, high, emaHigh))
+                self.decisionMaker.AddOrderMax("sell")
+                print("")
+
+    @staticmethod
+    def requiredIndicators(low: int = 5, high: int = 40) -> list[str]:
+        """
+        Returns the indicator columns read by the strategy, to be required on the data machine.
+        :param low: The low EMA value.
+        :param high: The high EMA value.
+        :return: The indicator columns ('EMA5', 'EMA40').
+        """
+        return ['EMA' + str(low), 'EMA' + str(high)]
+
+    @staticmethod
+    def crossovers(emaLow: np.ndarray, emaHigh: np.ndarray, threshold=1.000) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the candles where the strategy buys while waiting to buy and sells while waiting to sell,
+        the candle still open (the last one) being never checked.
+        :param emaLow: The values of the low EMA column, or one row per configuration.
+        :param emaHigh: The values of the high EMA column, shaped like `emaLow`.
+        :param threshold: The minimum ratio between the EMAs, or one per row. (default is 1.000)
+        :return: The buy signals and the sell signals.
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            buys = (emaLow > emaHigh) & (emaLow / emaHigh >= threshold)
+            sells = (emaLow < emaHigh) & (emaHigh / emaLow >= threshold)
+        if buys.shape[-1] != 0:
+            buys[..., -1] = sells[..., -1] = False
+        return buys, sells
+
+    @staticmethod
+    def signals(dates: np.ndarray, emaLow: np.ndarray, emaHigh: np.ndarray, buyFirst: bool = True,
+                threshold: float = 1.000) -> pd.DataFrame:
+        """
+        Batch counterpart of :func:`run`, returns every order placed by the strategy over the whole history.
+        Like `run`, a candle is checked once it is closed and the order is placed when the next candle opens,
+        each order of the whole balance switching the position between buying and selling.
+        :param dates: The dates of the candles, the last one being the candle still open (never checked).
+        :param emaLow: The values of the low EMA column.
+        :param emaHigh: The values of the high EMA column.
+        :param buyFirst: True if the strategy starts waiting to buy, False if it starts waiting to sell.
+        :param threshold: The minimum ratio between the EMAs, see :func:`crossovers`. (default is 1.000)
+        :return: A DataFrame with one row per order: 'Date' (date of the candle opened when the order is
+            placed, the date printed by `run`), 'Candle' (index of the closed candle checked) and 'Order' ('buy' or 'sell').
+        """
+        dates, emaLow, emaHigh = np.asarray(dates), np.asarray(emaLow), np.asarray(emaHigh)
+        indexes, sides = GBKernels.alternatingSignals(*EMACrossover.crossovers(emaLow, emaHigh, threshold), buyFirst)
+        return pd.DataFrame({
+            'Date': dates[indexes + 1],
+            'Candle': indexes,
+            'Order': np.where(sides > 0, "buy", "sell")
+        })
+
+    def runBatch(self, low: int, high: int) -> pd.DataFrame:
+        """
+        Runs the EMA crossover strategy over every candle of the decision maker at once, see :func:`signals`.
+        No order is placed, the position of the decision maker gives the side of the first one, the threshold
+        of the constructor filters the crossovers like in :func:`run`.
+        :param low: The low EMA value.
+        :param high: The high EMA value.
+        :return: The orders the strategy places, see :func:`signals`.
+        :exception: AssertionError if low or high is not a positive integer or low >= high
+        """
+        assert isinstance(low, int) and low > 0, "Low EMA value must be a positive integer"
+        assert isinstance(high, int) and high > 0, "High EMA value must be a positive integer"
+        assert low < high, "Low EMA value must be lower than high EMA value"
+
+        # Activates the EMA columns if needed
+        self.decisionMaker.candle(1, self.requiredIndicators(low, high))
+        ordered = self.decisionMaker.ordered
+        return self.signals(ordered['Date'].to_numpy(), ordered['EMA' + str(low)].to_numpy(),
+                            ordered['EMA' + str(high)].to_numpy(), self.decisionMaker.buyOrSellPosition != "sell",
+                            self.threshold)
 
     def run(self, low: int, high: int):
         """
@@ -14,10 +131,10 @@ class EMACrossover:
         :param low: The low EMA value.
         :param high: The high EMA value.
         :return: None
-        :exception: AssertionError if low is not in self.emaValues or high is not in self.emaValues or low >= high
+        :exception: AssertionError if low or high is not a positive integer or low >= high
         """
-        assert low in self.emaValues, "Low EMA value not found in GBConstants"
-        assert high in self.emaValues, "High EMA value not found in GBConstants"
+        assert isinstance(low, int) and low > 0, "Low EMA value must be a positive integer"
+        assert isinstance(high, int) and high > 0, "High EMA value must be a positive integer"
         assert low < high, "Low EMA value must be lower than high EMA value"
 
         if not self.decisionMaker.buyOrSellPosition:
@@ -26,22 +143,10 @@ class EMACrossover:
         if not self.decisionMaker.isIntervalClosed():
             return
         
-        last = float(self.decisionMaker.ordered.iloc[-2])
-        closePrice = float(last['Close'])
-        emaLow = float(last['EMA' + str(low)])
-        emaHigh = float(last['EMA' + str(high)])
-
-        if self.decisionMaker.buyOrSellPosition == "buy":
-            if emaLow > emaHigh and emaLow / emaHigh >= 1.000:
-                print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.bollingerGaps.iloc[-1]['Date'])) +
-                        " || Close: {0:6.5f}, EMA{1}: {2:6.5f}, EMA{3}: {4:6.5f}".format(closePrice, low, emaLow, high, emaHigh))
-                self.decisionMaker.AddOrderMax("buy")
-        elif self.decisionMaker.buyOrSellPosition == "sell":
-            if emaLow < emaHigh and emaHigh / emaLow >= 1.000:
-                print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.bollingerGaps.iloc[-1]['Date'])) +
-                        " || Close: {0:6.5f}, EMA{1}: {2:6.5f}, EMA{3}: {4:6.5f}".format(closePrice, low, emaLow, high, emaHigh))
-                self.decisionMaker.AddOrderMax("sell")
-                print("")
+        last = self.decisionMaker.candle(2, self.requiredIndicators(low, high))
+        if last is None:
+            return
+        self.__decide(last['Close'], low, last['EMA' + str(low)], high, last['EMA' + str(high)])
     
     def run5_40(self):
         """
@@ -53,18 +158,20 @@ class EMACrossover:
         if not self.decisionMaker.isIntervalClosed():
             return
 
-        last = self.decisionMaker.ordered.iloc[-2]
-        closePrice, ema5, ema40 = float(last['Close']), float(last['EMA5']), float(last['EMA40'])
+        last = self.decisionMaker.candle(2, self.requiredIndicators(5, 40))
+        if last is None:
+            return
+        closePrice, ema5, ema40 = last['Close'], last['EMA5'], last['EMA40']
         # print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.dataMachine.bollingerGaps.iloc[-1]['Date'])) +
         #       " || Close: {0:6.5f}, EMA5: {1:6.5f}, EMA40: {2:6.5f}".format(closePrice, ema5, ema40))
         if self.decisionMaker.buyOrSellPosition == "buy":
             if ema5 > ema40 and ema5 / ema40 >= 1.000:
-                print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.bollingerGaps.iloc[-1]['Date'])) +
+                print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.candle()['Date'])) +
                         " || Close: {0:6.5f}, EMA5: {1:6.5f}, EMA40: {2:6.5f}".format(closePrice, ema5, ema40))
                 self.decisionMaker.AddOrderMax("buy")
         elif self.decisionMaker.buyOrSellPosition == "sell":
             if ema5 < ema40 and ema40 / ema5 >= 1.000:
-                print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.bollingerGaps.iloc[-1]['Date'])) +
+                print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.candle()['Date'])) +
                         " || Close: {0:6.5f}, EMA5: {1:6.5f}, EMA40: {2:6.5f}".format(closePrice, ema5, ema40))
                 self.decisionMaker.AddOrderMax("sell")
                 print("")
\ No newline at end of file
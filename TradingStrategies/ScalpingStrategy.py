@@ -1,3 +1,139 @@
+import numpy as np
+import pandas as pd
+import time
+import GBKernels
+from GBConstants import GBConstants
+from IGreedyBoyDecisionMaker_module import IGreedyBoyDecisionMaker
+from IGreedyBoyStrategy_module import IGreedyBoyStrategy
 
-class ScalpingStrategy:
-    pass
\ No newline at end of file
+class ScalpingStrategy(IGreedyBoyStrategy):
+    """
+    Sells on a closed candle going up under the EMA50 after touching the EMA20, then buys back on the first
+    tick reaching the target (the EMA50 gap) or the stop-loss. Begins by selling, so the crypto is needed first.
+    The state is the open trade, entries are checked once per candle and exits in O(1) on each tick.
+    """
+
+    def __init__(self, decisionMaker: IGreedyBoyDecisionMaker):
+        """
+        :param decisionMaker: The decision maker placing the orders.
+        """
+        self.decisionMaker = decisionMaker
+        # Open trade: {'MaxPercentage', 'SellPrice', 'Min'}, None while waiting to sell
+        self.scalping = None
+        self.justSold = False
+
+    @property
+    def indicators(self) -> list[str]:
+        """
+        The indicator columns given to onCandleClose.
+        :return: The EMA20 and EMA50 columns.
+        """
+        return ['EMA20', 'EMA50']
+
+    def onCandleClose(self, candle: dict, indicators: dict):
+        """
+        Sells if the closed candle is an entry, see :func:`isEntry`.
+        :param candle: The values of the closed candle.
+        :param indicators: The values of the EMA columns of the closed candle.
+        """
+        if not self.decisionMaker.buyOrSellPosition or self.scalping is not None:
+            return
+        ema20, ema50 = indicators['EMA20'], indicators['EMA50']
+        closePrice = candle['Close']
+        if self.isEntry(candle['Open'], candle['High'], candle['Low'], closePrice, ema20, ema50):
+            print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.candle()['Date'])))
+            print("Close: {0:6.5f}, EMA20: {1:6.5f}, EMA50: {2:6.5f}, Percentage : {3:6.3f}".format(closePrice, ema20, ema50, (ema50 / closePrice - 1) * 100))
+            self.decisionMaker.AddOrderMax("sell")
+            self.scalping = self.trade(closePrice, ema20, ema50)
+            # The exit is checked from the next tick on
+            self.justSold = True
+
+    def onTick(self, epochTime: float, price: float):
+        """
+        Buys back once the price reaches the target or the stop-loss of the open trade.
+        :param epochTime: The timestamp of the tick.
+        :param price: The price of the tick.
+        """
+        if self.justSold:
+            self.justSold = False
+            return
+        if not self.decisionMaker.buyOrSellPosition or self.scalping is None:
+            return
+        if self.isExit(self.scalping, price):
+            print(time.strftime(GBConstants.PRINT_DATE_TIME_FORMAT, time.gmtime(self.decisionMaker.candle()['Date'])))
+            print("Close: {0:6.5f}, Percentage : {1:6.3f}".format(price, (self.scalping['SellPrice'] / price - 1) * 100 - 0.2))
+            self.decisionMaker.AddOrderMax("buy")
+            self.scalping = None
+
+    @staticmethod
+    def isEntry(openPrice, high, low, closePrice, ema20, ema50):
+        """
+        Returns whether a closed candle is a selling entry, works on single values as well as on arrays.
+        :return: True (or a boolean array) if the candle goes up, touches the EMA20 and stays 0.8% under the EMA50.
+        """
+        with np.errstate(invalid='ignore'):
+            return (openPrice < closePrice) & (low <= ema20) & (openPrice <= ema20) \
+                & (high >= ema20) & (high < ema50) & (ema50 / closePrice >= 1.008)
+
+    @staticmethod
+    def trade(closePrice: float, ema20: float, ema50: float) -> dict:
+        """
+        Returns the trade opened by selling on a candle.
+        :param closePrice: The close price of the entry candle.
+        :param ema20: The EMA20 value of the entry candle.
+        :param ema50: The EMA50 value of the entry candle.
+        :return: The target gap ('MaxPercentage'), the reference sell price ('SellPrice') and the close price ('Min').
+        """
+        return {
+            'MaxPercentage': ema50 / closePrice,
+            'SellPrice': max(closePrice, ema20),
+            'Min': closePrice
+        }
+
+    @staticmethod
+    def isExit(scalping: dict, price):
+        """
+        Returns whether a price closes the trade, works on single values as well as on arrays.
+        :param scalping: The open trade, see :func:`trade`.
+        :param price: The price of the tick.
+        """
+        return (price >= scalping['Min'] * scalping['MaxPercentage']) | \
+            (price <= scalping['SellPrice'] / ((scalping['MaxPercentage'] - 1) * 1.2 + 1))
+
+    @staticmethod
+    def signals(epochs: np.ndarray, prices: np.ndarray, candles: dict, ema20: np.ndarray, ema50: np.ndarray,
+                interval: int = 15) -> pd.DataFrame:
+        """
+        Batch counterpart of the notified strategy for backtests. Entries are checked on every candle at once,
+        then each exit is the first tick matching it, so the cost depends on the number of trades only.
+        :param epochs: The timestamps of the ticks.
+        :param prices: The prices of the ticks.
+        :param candles: The candles built from the ticks ('Open', 'High', 'Low', 'Close' arrays, see
+            :func:`GBUtilities.ticksToCandles`), the last one being the candle still open (never checked).
+        :param ema20: The EMA20 values of the candles.
+        :param ema50: The EMA50 values of the candles.
+        :param interval: The time gap of the candles (in min).
+        :return: A DataFrame with one row per order: 'Date' (timestamp of the tick), 'Price' and 'Order'.
+        """
+        epochs, prices = np.asarray(epochs, dtype=float), np.asarray(prices, dtype=float)
+        ema20, ema50 = np.asarray(ema20, dtype=float), np.asarray(ema50, dtype=float)
+        orders = []
+        if len(epochs) == 0:
+            return pd.DataFrame(orders, columns=['Date', 'Price', 'Order'])
+        # A closed candle is notified on the first tick of the next one
+        starts = GBKernels.bucketStarts(epochs, interval)[1]
+        entries = np.flatnonzero(ScalpingStrategy.isEntry(candles['Open'][:-1], candles['High'][:-1], candles['Low'][:-1],
+                                                          candles['Close'][:-1], ema20[:-1], ema50[:-1]))
+        tick = 0
+        for candle in entries:
+            sellTick = starts[candle + 1]
+            if sellTick <= tick:
+                continue
+            orders.append((epochs[sellTick], prices[sellTick], "sell"))
+            scalping = ScalpingStrategy.trade(candles['Close'][candle], ema20[candle], ema50[candle])
+            exits = np.flatnonzero(ScalpingStrategy.isExit(scalping, prices[sellTick + 1:]))
+            if len(exits) == 0:
+                break
+            tick = sellTick + 1 + exits[0]
+            orders.append((epochs[tick], prices[tick], "buy"))
+        return pd.DataFrame(orders, columns=['Date', 'Price', 'Order'])